@@ -16,6 +16,7 @@ class BaseAgent:
         self._agent_id = agent_id if agent_id else actual_type.__name__ + str(self.agent_count_by_type[actual_type])
         self._env = None
         self._observers_cache = None
+        self._reported_time = None
         super(BaseAgent, self).__init__()
 
     @property
@@ -38,7 +39,12 @@ class BaseAgent:
 
     @property
     def time(self):
-        return self.env.now
+        """
+        Current simulation time, or time of past event agent is reporting - e.g. when several events are simulated
+        within a single simulation event
+        :rtype: float
+        """
+        return self._reported_time if self._reported_time is not None else self.env.now
 
     def __str__(self):
         return self.__unicode__()
@@ -51,7 +57,8 @@ class BaseAgent:
         return self.agent_id < other.agent_id
 
     def __eq__(self, other):
-        assert type(self) == type(other)
+        if type(self) != type(other):
+            return NotImplemented
         return self.agent_id == other.agent_id
 
     def __hash__(self):
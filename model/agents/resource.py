@@ -1,7 +1,8 @@
-import itertools
-
 from model.agents.base_agents import BaseAgent
+from model.infrastructure import INFINITY
+from model.knowledge_representation import FactSet
 from model.knowledge_representation.lesson_type import Lecture, Exam
+from model.knowledge_representation.publication_schedule import PublicationSchedule
 from model.simulation.resource_access import ResourceAccessService
 
 
@@ -9,6 +10,12 @@ __author__ = 'e.kolpakov'
 
 
 class Resource(BaseAgent):
+    """
+    Published lectures, exams and facts to study are cached and only recomputed when lessons get published: either by
+    publication process, which also fires publication_event, or on access if simulation time passed next publication.
+    Lessons can be added and removed while simulation runs - only the changed lessons are (un)published.
+    Subscribers are notified whenever facts to study or publication schedule change.
+    """
     def __init__(self, name, lessons, *args, **kwargs):
         """
         :type name: str
@@ -16,10 +23,26 @@ class Resource(BaseAgent):
         """
         super(Resource, self).__init__(*args, **kwargs)
         self._name = name
-        self._lessons = lessons
+        self._lessons = list(lessons)
+        self._schedule = PublicationSchedule(self._lessons)
+        self._lesson_positions = {id(lesson): position for position, lesson in enumerate(self._lessons)}
+        self._next_position = len(self._lessons)
+        self._publication_event = None
+        self._schedule_changed_event = None
+        self._subscribers = []
+        self._reset_publications()
 
         self._resource_access_service = None
 
+    @BaseAgent.env.setter
+    def env(self, value):
+        """
+        :param value: simpy.Environment
+        """
+        BaseAgent.env.fset(self, value)
+        self._schedule_changed_event = None
+        self._reset_publications()
+
     @property
     def name(self):
         """
@@ -34,24 +57,164 @@ class Resource(BaseAgent):
         """
         return tuple(self._lessons)
 
+    @property
+    def publication_schedule(self):
+        """ :rtype: PublicationSchedule """
+        return self._schedule
+
+    @property
+    def publication_event(self):
+        """
+        Event triggered with tuple of newly published lessons at next publication
+        :rtype: simpy.events.Event
+        """
+        if self._publication_event is None:
+            self._publication_event = self.env.event()
+        return self._publication_event
+
+    @property
+    def next_publication(self):
+        """
+        Time of next publication, lessons published by current time might not have been processed yet
+        :rtype: float
+        """
+        return self._next_publication
+
     @property
     def lectures(self):
-        return tuple(self._get_lessons_of_type(Lecture))
+        self._update_publications()
+        return self._published_lectures
 
     @property
     def exams(self):
-        return tuple(self._get_lessons_of_type(Exam))
-
-    def _get_lessons_of_type(self, lesson_type):
-        return (
-            lesson
-            for lesson in self.lessons
-            if isinstance(lesson, lesson_type) and lesson.publish_at <= self.env.now
-        )
+        self._update_publications()
+        return self._published_exams
 
     @property
     def facts_to_study(self):
-        return tuple(itertools.chain(*[lecture.facts for lecture in self.lectures]))
+        """
+        :rtype: FactSet
+        """
+        self._update_publications()
+        return self._facts_to_study
+
+    def subscribe(self, subscriber):
+        """
+        :param callable subscriber: called with resource after facts to study or publication schedule change
+        """
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """
+        :param callable subscriber: subscriber to remove
+        """
+        self._subscribers.remove(subscriber)
+
+    def add_lesson(self, lesson):
+        """
+        Adds lesson to resource. Lesson that should have already been published is published immediately.
+        :param BaseLesson lesson: lesson
+        """
+        self._lessons.append(lesson)
+        self._lesson_positions[id(lesson)] = self._next_position
+        self._next_position += 1
+        self._schedule.add(lesson)
+
+        if self.env is not None and lesson.publish_at <= self._published_until:
+            self._set_published(self._published_lessons + (lesson, ))
+            if isinstance(lesson, Lecture):
+                self._facts_to_study = self._facts_to_study | lesson.facts
+            self._notify_published((lesson, ))
+        else:
+            self._next_publication = min(self._next_publication, lesson.publish_at)
+            self._notify_schedule_changed()
+        self._notify_subscribers()
+
+    def has_lesson(self, lesson):
+        """
+        :param BaseLesson lesson: lesson
+        :rtype: bool
+        """
+        return id(lesson) in self._lesson_positions
+
+    def remove_lesson(self, lesson):
+        """
+        :param BaseLesson lesson: lesson
+        :raises ValueError: if lesson is not in resource
+        """
+        position = self._lesson_positions.pop(id(lesson), None)
+        if position is None:
+            raise ValueError("{0} is not in {1}".format(lesson, self))
+        self._lessons.remove(lesson)
+        self._schedule.remove(lesson)
+
+        if lesson in self._published_lessons:
+            self._set_published(tuple(published for published in self._published_lessons if published is not lesson))
+            if isinstance(lesson, Lecture):
+                facts = FactSet()
+                for lecture in self._published_lectures:
+                    facts = facts | lecture.facts
+                self._facts_to_study = facts
+            # exams are indexed too - subscribers learn about any withdrawn publication
+            self._notify_subscribers()
+
+    def publish(self):
+        """
+        Simpy process publishing lessons as their publication time comes
+        """
+        while True:
+            if self._schedule_changed_event is None:
+                self._schedule_changed_event = self.env.event()
+            events = [self._schedule_changed_event]
+            if self._next_publication < INFINITY:
+                events.append(self.env.timeout(max(self._next_publication - self.env.now, 0)))
+            yield self.env.any_of(events)
+            self._update_publications()
+
+    def _reset_publications(self):
+        self._published_until = -INFINITY
+        self._published_lessons = ()
+        self._published_lectures, self._published_exams = (), ()
+        self._facts_to_study = FactSet()
+        self._next_publication = self._schedule.next_publication(-INFINITY)
+
+    def _update_publications(self):
+        now = self.env.now
+        if now < self._next_publication:
+            return
+
+        new_lessons = self._schedule.published_between(self._published_until, now)
+        self._published_until = now
+        self._next_publication = self._schedule.next_publication(now)
+
+        self._set_published(self._published_lessons + new_lessons)
+        facts = self._facts_to_study
+        for lesson in new_lessons:
+            if isinstance(lesson, Lecture):
+                facts = facts | lesson.facts
+        self._facts_to_study = facts
+        self._notify_published(new_lessons)
+        self._notify_subscribers()
+
+    def _set_published(self, lessons):
+        # published lessons are kept in resource order, not publication order
+        self._published_lessons = tuple(sorted(lessons, key=lambda lesson: self._lesson_positions[id(lesson)]))
+        self._published_lectures = tuple(lesson for lesson in self._published_lessons if isinstance(lesson, Lecture))
+        self._published_exams = tuple(lesson for lesson in self._published_lessons if isinstance(lesson, Exam))
+
+    def _notify_published(self, lessons):
+        if self._publication_event is not None and lessons:
+            event, self._publication_event = self._publication_event, None
+            event.succeed(lessons)
+
+    def _notify_schedule_changed(self):
+        if self._schedule_changed_event is not None and not self._schedule_changed_event.triggered:
+            event, self._schedule_changed_event = self._schedule_changed_event, None
+            event.succeed()
+
+    def _notify_subscribers(self):
+        for subscriber in tuple(self._subscribers):
+            subscriber(self)
 
     @property
     def resource_access_service(self):
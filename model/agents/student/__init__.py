@@ -3,4 +3,5 @@ __author__ = 'e.kolpakov'
 # there's __all_- in that module: simpler than always remember to modify this
 from model.agents.student.preconfigured_students import *
 
-from model.agents.student.student import Student
\ No newline at end of file
+from model.agents.student.student import Student
+from model.agents.student.cohort import Cohort, RationalCohort
@@ -1,6 +1,9 @@
 from abc import ABCMeta, abstractmethod
 import logging
 
+from simpy import Interrupt
+
+from model.infrastructure import INFINITY
 
 __author__ = 'e.kolpakov'
 
@@ -51,6 +54,20 @@ class IdleActivity(BaseStudentActivity):
 class StudySessionActivity(BaseStudentActivity):
     can_skip_if_not_required_by_goal = True
 
+    def __init__(self, *args, **kwargs):
+        super(StudySessionActivity, self).__init__(*args, **kwargs)
+        self._study_process = None
+
+    def cancel(self):
+        if self._study_process is not None and self._study_process.is_alive:
+            self._study_process.interrupt()
+
+    def _study_resource(self, resource, until):
+        try:
+            return (yield from self._student.study_resource(resource, until))
+        except Interrupt:
+            return False
+
     def run(self, **kwargs):
         entered = self.env.now
         self._logger.debug("{student} study session of length {length} started at {time}".format(
@@ -60,20 +77,27 @@ class StudySessionActivity(BaseStudentActivity):
         study_until = entered + self._length
 
         choose_resource = self._student.behavior.resource_choice.choose_resource
-        study_resource = self._student.study_resource
         get_accessible_resources = self._student.get_accessible_resources
 
         remaining_time, resources = (study_until - self.env.now), list(get_accessible_resources())
+        # resource with unfinished lecture is resumed without choosing among resources again
+        resource_to_study = self._student.lecture_progress.interrupted_resource
         while remaining_time > 0 and resources:
-            resource_to_study = choose_resource(self._student, self._student.curriculum, resources, remaining_time)
+            if not any(resource is resource_to_study for resource in resources):
+                resource_to_study = choose_resource(self._student, self._student.curriculum, resources, remaining_time)
             if resource_to_study is None:
                 break
             self._logger.info("{0}: resource {1} chosen at {2}".format(self._student, resource_to_study, self.env.now))
-            study_event = self.env.process(study_resource(resource_to_study, study_until))
-            completed = yield study_event
+            if self._student.coalesced_study:
+                # interrupts reach studying generator directly, no need for a separate process
+                completed = yield from self._study_resource(resource_to_study, study_until)
+            else:
+                self._study_process = self.env.process(self._study_resource(resource_to_study, study_until))
+                completed = yield self._study_process
             if not completed:
                 break
             remaining_time, resources = (study_until - self.env.now), list(get_accessible_resources())
+            resource_to_study = None
 
 
 class PeerStudentInteractionActivity(BaseStudentActivity):
@@ -105,4 +129,28 @@ class PassExamActivity(BaseStudentActivity):
         self._student.accept_feedback(exam=exam, exam_feedback=exam_feedback)
         self._logger.info("{student} {exam} attempt finished with grade {grade} at {now}".format(
             student=self._student, exam=exam, now=self.env.now, grade=exam_feedback.grade
-        ))
\ No newline at end of file
+        ))
+
+
+class DormantActivity(BaseStudentActivity):
+    """
+    Student with nothing to study, no exam to attempt and no message to read waits for something that can give new
+    options instead of looping through activities: a lesson published by a known resource, a message, an access grant,
+    a new known resource or a fact being forgotten.
+    """
+    def __init__(self, student, length=INFINITY, env=None):
+        super(DormantActivity, self).__init__(student, length, env)
+
+    def run(self, **kwargs):
+        self._logger.debug("{student} goes dormant at {time}".format(student=self._student, time=self.env.now))
+        events = [self._student.wake_event]
+        events.extend(resource.publication_event for resource in self._student.known_resources)
+        wake_at = self._student.next_forgetting_time
+        if wake_at < INFINITY:
+            events.append(self.env.timeout(max(wake_at - self.env.now, 0)))
+        yield self.env.any_of(events)
+        self._student.woke_up()
+        self._logger.debug("{student} wakes up at {time}".format(student=self._student, time=self.env.now))
+
+    def cancel(self):
+        self._student.woke_up()
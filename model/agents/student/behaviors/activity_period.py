@@ -1,5 +1,6 @@
 from abc import ABCMeta, abstractmethod
-import random
+from array import array
+import sys
 
 __author__ = 'e.kolpakov'
 
@@ -65,36 +66,99 @@ class FixedActivityLengthsBehavior(BaseActivityLengthsBehavior):
 
 
 class RandomActivityLengthsBehavior(BaseActivityLengthsBehavior):
-    @staticmethod
-    def _get_rounded_random(max_value, decimal_points=2):
-        return round(random.random() * max_value, decimal_points)
+    RANDOM_STREAM = 'activity_lengths'
+
+    def _get_rounded_random(self, student, max_value, decimal_points=2):
+        return round(student.random_stream(self.RANDOM_STREAM).random() * max_value, decimal_points)
 
     def get_idle_period(self, student, current_time):
-        return self._get_rounded_random(self._idle_period)
+        return self._get_rounded_random(student, self._idle_period)
 
     def get_study_period(self, student, current_time):
-        return self._get_rounded_random(self._study_period)
+        return self._get_rounded_random(student, self._study_period)
 
     def get_peer_interaction_period(self, student, current_time):
-        return self._get_rounded_random(self._peer_interaction_period)
+        return self._get_rounded_random(student, self._peer_interaction_period)
 
     def get_pass_exam_period(self, student, current_time):
-        return self._get_rounded_random(self._pass_exam_period)
+        return self._get_rounded_random(student, self._pass_exam_period)
 
 
 class QuarterHourRandomActivityLengthsBehavior(BaseActivityLengthsBehavior):
-    @staticmethod
-    def _get_random_quarters(max_value):
-        return random.randrange(max_value*4) * 1.0 / 4.0
+    RANDOM_STREAM = 'activity_lengths'
+
+    def _get_random_quarters(self, student, max_value):
+        return student.random_stream(self.RANDOM_STREAM).randrange(max_value*4) * 1.0 / 4.0
 
     def get_idle_period(self, student, current_time):
-        return self._get_random_quarters(self._idle_period)
+        return self._get_random_quarters(student, self._idle_period)
 
     def get_study_period(self, student, current_time):
-        return self._get_random_quarters(self._study_period)
+        return self._get_random_quarters(student, self._study_period)
 
     def get_peer_interaction_period(self, student, current_time):
-        return self._get_random_quarters(self._peer_interaction_period)
+        return self._get_random_quarters(student, self._peer_interaction_period)
 
     def get_pass_exam_period(self, student, current_time):
-        return self._get_random_quarters(self._pass_exam_period)
\ No newline at end of file
+        return self._get_random_quarters(student, self._pass_exam_period)
+
+
+def _repeat_word(word, count):
+    return int.from_bytes(word.to_bytes(8, 'little') * count, 'little')
+
+
+class BatchedRandomMixin:
+    """
+    Draws uniform random numbers for every random stream in batches. Random bits of a whole batch are drawn from the
+    stream at once and turned into doubles by integer and buffer operations over the whole batch, so no
+    interpreter-level work is done per number besides handing it out. Numbers have 52 random bits.
+    Numbers drawn ahead are buffered by the stream itself, so they go away together with the stream.
+    """
+    def __init__(self, *args, batch_size=256, **kwargs):
+        """
+        :param int batch_size: number of random numbers drawn at once
+        """
+        super(BatchedRandomMixin, self).__init__(*args, **kwargs)
+        if batch_size < 1:
+            raise ValueError("Positive batch size expected, got {0}".format(batch_size))
+        self._batch_size = batch_size
+        # every 64 bit word keeps random mantissa and gets exponent of 1.0 - a double in [1, 2)
+        self._mantissa_mask = _repeat_word((1 << 52) - 1, batch_size)
+        self._exponent = _repeat_word(0x3FF << 52, batch_size)
+
+    def _uniform(self, student):
+        """
+        :return float: random number in [0, 1)
+        """
+        stream = student.random_stream(self.RANDOM_STREAM)
+        numbers = getattr(stream, 'buffer', None)
+        if numbers is None:
+            # global random module fallback - there is nothing to keep a batch with
+            return stream.random()
+        if not numbers:
+            numbers.extend(self._draw_batch(stream))
+        return numbers.pop() - 1.0
+
+    def _draw_batch(self, stream):
+        """
+        :param RandomStream|random.Random stream: random stream
+        :return list[float]: random numbers in [1, 2), popping from a list is much faster than indexing an array
+        """
+        bits = stream.getrandbits(64 * self._batch_size) & self._mantissa_mask | self._exponent
+        return array('d', bits.to_bytes(8 * self._batch_size, sys.byteorder)).tolist()
+
+
+class BatchedRandomActivityLengthsBehavior(BatchedRandomMixin, RandomActivityLengthsBehavior):
+    """
+    Same distribution as RandomActivityLengthsBehavior
+    """
+    def _get_rounded_random(self, student, max_value, decimal_points=2):
+        return round(self._uniform(student) * max_value, decimal_points)
+
+
+class BatchedQuarterHourRandomActivityLengthsBehavior(BatchedRandomMixin, QuarterHourRandomActivityLengthsBehavior):
+    """
+    Same distribution as QuarterHourRandomActivityLengthsBehavior
+    """
+    def _get_random_quarters(self, student, max_value):
+        return int(self._uniform(student) * max_value * 4) / 4.0
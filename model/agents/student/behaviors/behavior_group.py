@@ -1,9 +1,11 @@
 from model.agents.student.behaviors.stop_participation import BaseStopParticipationBehavior
 from model.agents.student.behaviors.knowledge_acquisition import BaseFactsAcquisitionBehavior
+from model.agents.student.behaviors.knowledge_decay import BaseKnowledgeDecayBehavior
 from model.agents.student.behaviors.resource_choice import BaseResourceChoiceBehavior
 from model.agents.student.behaviors.student_interaction import BaseSendMessagesBehavior
 from model.agents.student.behaviors.activity_period import BaseActivityLengthsBehavior
-from model.infrastructure.descriptors import TypedDescriptor
+from model.agents.student.behaviors.inbox import BaseInboxBehavior
+from model.infrastructure.descriptors import TypedDescriptor, TypedDescriptorWithDefault
 
 
 __author__ = 'e.kolpakov'
@@ -15,6 +17,8 @@ class BehaviorGroup:
     stop_participation = TypedDescriptor(BaseStopParticipationBehavior, 'stop_participation')
     activity_periods = TypedDescriptor(BaseActivityLengthsBehavior, 'activity_periods')
     send_messages = TypedDescriptor(BaseSendMessagesBehavior, 'send_messages')
+    knowledge_decay = TypedDescriptorWithDefault(BaseKnowledgeDecayBehavior, 'knowledge_decay')
+    inbox = TypedDescriptorWithDefault(BaseInboxBehavior, 'inbox')
 
     @classmethod
     def make_group(cls, **kwargs):
@@ -0,0 +1,116 @@
+from model.agents.student.messages import FactMessage, ResourceMessage
+
+
+__author__ = 'e.kolpakov'
+
+
+class BaseInboxBehavior:
+    """
+    Every message is kept, the most recent one is processed first
+    """
+    def message_key(self, message):
+        """
+        Messages with equal keys are collapsed when delivered, None disables collapsing
+        :param BaseMessage message: message
+        :rtype: collections.Hashable|None
+        """
+        return None
+
+    def admit(self, student, message):
+        """
+        Checks if message should be delivered to student's inbox or dropped
+        :param Student student: recipient
+        :param BaseMessage message: message
+        :rtype: bool
+        """
+        return True
+
+    def priority(self, student, message):
+        """
+        Messages with higher priority are processed first, the most recent one among equal
+        :param Student student: recipient
+        :param BaseMessage message: message
+        :rtype: int
+        """
+        return 0
+
+    def blocker(self, student, message):
+        """
+        Token priority of message depends on - message priority is re-evaluated when fact with that code is learnt
+        :param Student student: recipient
+        :param BaseMessage message: message
+        :rtype: str|None
+        """
+        return None
+
+    def next_message(self, student, inbox):
+        """
+        Removes next message to process from non-empty inbox
+        :param Student student: recipient
+        :param Mailbox inbox: inbox
+        :rtype: BaseMessage|None
+        :return: None if no remaining message is worth processing
+        """
+        return inbox.take()
+
+    def fact_learnt(self, student, inbox, fact):
+        """
+        :param Student student: recipient
+        :param Mailbox inbox: inbox
+        :param knowledge_representation.Fact fact: fact student has just learnt
+        """
+        pass
+
+
+class DeduplicatingInboxBehavior(BaseInboxBehavior):
+    """
+    Messages about the same fact or resource are collapsed, facts already known are dropped both on delivery and when
+    processed. Facts learnable right away are processed first, then resources, then facts with unmet dependencies.
+    """
+    LEARNABLE_FACT_PRIORITY = 2
+    RESOURCE_PRIORITY = 1
+    OTHER_PRIORITY = 0
+
+    def message_key(self, message):
+        if isinstance(message, FactMessage):
+            return FactMessage, message.fact.code
+        if isinstance(message, ResourceMessage):
+            return ResourceMessage, message.resource.agent_id
+        return None
+
+    def admit(self, student, message):
+        if isinstance(message, FactMessage):
+            return message.fact not in student.knowledge
+        if isinstance(message, ResourceMessage):
+            return not student.knows_resource(message.resource)
+        return True
+
+    def priority(self, student, message):
+        if isinstance(message, FactMessage):
+            knowledge = student.knowledge
+            if message.fact not in knowledge and message.fact.is_available(knowledge):
+                return self.LEARNABLE_FACT_PRIORITY
+        elif isinstance(message, ResourceMessage):
+            return self.RESOURCE_PRIORITY
+        return self.OTHER_PRIORITY
+
+    def blocker(self, student, message):
+        # fact with unmet dependencies becomes learnable no sooner than its first missing dependency is learnt
+        if isinstance(message, FactMessage):
+            knowledge = student.knowledge
+            indexer, mask = knowledge.indexer, knowledge.mask
+            for code in message.fact.dependencies:
+                index = indexer.find_index(code)
+                if index is None or not mask >> index & 1:
+                    return code
+        return None
+
+    def next_message(self, student, inbox):
+        while inbox:
+            message = inbox.take()
+            if self.admit(student, message):
+                return message
+        return None
+
+    def fact_learnt(self, student, inbox, fact):
+        inbox.release(fact.code)
@@ -1,5 +1,3 @@
-from model.knowledge_representation import get_available_facts
-
 __author__ = 'e.kolpakov'
 
 
@@ -30,4 +28,4 @@ class AllDependenciesAcquisitionBehavior(BaseFactsAcquisitionBehavior):
         :type lecture: Lecture
         :rtype: frozenset[knowledge_representation.Fact]
         """
-        return get_available_facts(lecture.facts, student.knowledge)
\ No newline at end of file
+        return student.knowledge_states.transition(student.knowledge, lecture).facts_to_acquire
\ No newline at end of file
@@ -0,0 +1,43 @@
+import math
+
+from model.infrastructure import INFINITY
+
+
+__author__ = 'e.kolpakov'
+
+
+class BaseKnowledgeDecayBehavior:
+    """
+    Knowledge never decays
+    """
+    def retention_period(self, student, fact, reinforcements):
+        """
+        Gets time a fact is retained after being learnt or reinforced
+        :param Student student: student
+        :param knowledge_representation.Fact fact: fact
+        :param int reinforcements: number of times the fact was learnt or reinforced, this one included
+        :rtype: float
+        """
+        return INFINITY
+
+
+class ExponentialKnowledgeDecayBehavior(BaseKnowledgeDecayBehavior):
+    """
+    Forgetting curve: retention is exp(-t / stability), a fact is forgotten once its retention drops below threshold.
+    Every reinforcement multiplies stability by stability_growth (spacing effect).
+    """
+    def __init__(self, stability=100.0, stability_growth=2.0, retention_threshold=0.5):
+        """
+        :param float stability: stability of newly learnt fact
+        :param float stability_growth: stability multiplier applied on every reinforcement
+        :param float retention_threshold: retention, in interval (0, 1), below which fact is forgotten
+        """
+        if not 0 < retention_threshold < 1:
+            raise ValueError("Retention threshold should be in (0, 1), {0} given".format(retention_threshold))
+        self._stability = stability
+        self._stability_growth = stability_growth
+        self._decay_factor = math.log(1.0 / retention_threshold)
+
+    def retention_period(self, student, fact, reinforcements):
+        stability = self._stability * self._stability_growth ** (reinforcements - 1)
+        return stability * self._decay_factor
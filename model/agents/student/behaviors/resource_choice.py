@@ -1,5 +1,4 @@
 from collections import defaultdict
-import random
 
 from model.agents.student.behaviors.common import GoalDrivenBehaviorMixin
 from model.knowledge_representation import get_available_facts
@@ -41,6 +40,8 @@ class BaseResourceChoiceBehavior(ResourceChoiceMixin):
 
 
 class RandomResourceChoiceBehavior(BaseResourceChoiceBehavior):
+    RANDOM_STREAM = 'resource_choice'
+
     def resource_choice_map(self, student, curriculum, available_resources, remaining_time=None):
         """
         :param student: Student
@@ -48,7 +49,10 @@ class RandomResourceChoiceBehavior(BaseResourceChoiceBehavior):
         :param available_resources: tuple[Resource]
         :return dict[Resource, float]: Resource to confidence map
         """
-        return {resource: random.random() for resource in available_resources}
+        rng = student.random_stream(self.RANDOM_STREAM)
+        # numbers are drawn in agent id order, so every resource gets the same number whatever order it is given in
+        resources = sorted(available_resources, key=lambda resource: resource.agent_id)
+        return {resource: rng.random() for resource in resources}
 
 
 class RationalResourceChoiceBehavior(BaseResourceChoiceBehavior):
@@ -60,11 +64,12 @@ class RationalResourceChoiceBehavior(BaseResourceChoiceBehavior):
         :return dict[Resource, float]: Resource to confidence map
         """
         def new_facts_count(resource):
-            facts = set(resource.facts_to_study)
-            available_facts = get_available_facts(facts, student.knowledge)
+            available_facts = get_available_facts(resource.facts_to_study, student.knowledge, student.knowledge_states)
             return len(available_facts)
 
-        return {resource: new_facts_count(resource) for resource in available_resources}
+        # resources teaching nothing new would score 0 anyway
+        candidates = student.resources_to_learn_from(available_resources)
+        return {resource: new_facts_count(resource) for resource in candidates}
 
 
 class GoalDrivenResourceChoiceBehavior(BaseResourceChoiceBehavior, GoalDrivenBehaviorMixin):
@@ -26,7 +26,7 @@ class CourseCompleteStopParticipationBehavior(BaseStopParticipationBehavior):
         :param available_resources: list[Resource] | tuple[Resource]
         :rtype: bool
         """
-        return all(competency.is_mastered(student.knowledge) for competency in curriculum.all_competencies())
+        return student.knowledge >= curriculum.compile().competency_facts
 
 
 class AllGoalsAchievedStopParticipationBehavior(BaseStopParticipationBehavior, GoalDrivenBehaviorMixin):
@@ -1,4 +1,4 @@
-import random
+from itertools import islice
 
 from model.agents.student.messages import FactMessage, ResourceMessageAsync
 
@@ -42,20 +42,20 @@ class ChooseAllStudentsMixin:
 
 
 class ChooseRandomStudentsMixin:
-    @staticmethod
-    def choose_students(student):
-        known_students = student.known_students
-        if not known_students:
+    RANDOM_STREAM = 'choose_students'
+
+    def choose_students(self, student):
+        known_count = student.known_students_count
+        if not known_count:
             return tuple()
 
-        student_number = random.randint(1, len(known_students))
-        try:
-            return random.sample(known_students, student_number)
-        except TypeError:
-            raise
+        rng = student.random_stream(ChooseRandomStudentsMixin.RANDOM_STREAM)
+        return student.sample_known_students(rng.randint(1, known_count), rng)
 
 
 class RandomFactMessagesMixin:
+    RANDOM_STREAM = 'fact_messages'
+
     def generate_messages(self, from_student, to_student, **kwargs):
         """
         :param Student from_student: student sending messages
@@ -63,14 +63,19 @@ class RandomFactMessagesMixin:
         :param kwargs: keyword arguments
         :rtype: itertools.Iterable[BaseMessage]
         """
-        if from_student.knowledge:
-            fact = random.sample(from_student.knowledge, 1)[0]
+        knowledge = from_student.knowledge
+        if knowledge:
+            # knowledge is a set - facts are picked by position in its iteration order, which follows fact indices
+            rng = from_student.random_stream(RandomFactMessagesMixin.RANDOM_STREAM)
+            fact = next(islice(knowledge, rng.randrange(len(knowledge)), None))
             yield FactMessage(fact)
 
         yield from super(RandomFactMessagesMixin, self).generate_messages(from_student, to_student, **kwargs)
 
 
 class RandomResourceMessagesMixin:
+    RANDOM_STREAM = 'resource_messages'
+
     def generate_messages(self, from_student, to_student, **kwargs):
         """
         :param Student from_student: student sending messages
@@ -80,7 +85,9 @@ class RandomResourceMessagesMixin:
         """
         available_resources = from_student.known_resources
         if available_resources:
-            resource = random.sample(available_resources, 1)[0]
+            # sets of resources iterate in hash order, which varies between processes
+            rng = from_student.random_stream(RandomResourceMessagesMixin.RANDOM_STREAM)
+            resource = rng.choice(sorted(available_resources, key=lambda candidate: candidate.agent_id))
             yield ResourceMessageAsync(resource)
 
         yield from super(RandomResourceMessagesMixin, self).generate_messages(from_student, to_student, **kwargs)
@@ -0,0 +1,483 @@
+from collections import Counter
+from itertools import islice
+import logging
+import random
+
+from model.agents.base_agents import IntelligentAgent
+from model.agents.student.preconfigured_students import RationalStudentBehaviorMixin
+from model.agents.student.student import Student
+from model.infrastructure import INFINITY
+from model.infrastructure.observers import Observer, AgentCallObserver, DeltaObserver
+from model.knowledge_representation import FactSet, KnowledgeStateTable
+from model.knowledge_representation.lesson_type import ExamFeedback
+from model.simulation.resource_access import ResourceRosterMixin
+from model.simulation.result import ResultTopics
+
+
+__author__ = 'e.kolpakov'
+
+
+class CohortMember:
+    """
+    Students of a cohort sharing the same knowledge state, passed to behaviors in place of a student. Exposes the part
+    of student interface behaviors use; cohorts have no goals.
+    """
+    __slots__ = ('_cohort', '_knowledge')
+
+    def __init__(self, cohort, knowledge):
+        """
+        :param Cohort cohort: cohort
+        :param FactSet knowledge: knowledge state
+        """
+        self._cohort = cohort
+        self._knowledge = knowledge
+
+    @property
+    def cohort(self):
+        """ :rtype: Cohort """
+        return self._cohort
+
+    @property
+    def knowledge(self):
+        """ :rtype: FactSet """
+        return self._knowledge
+
+    @property
+    def agent_id(self):
+        return self._cohort.agent_id
+
+    @property
+    def name(self):
+        return self._cohort.name
+
+    @property
+    def skill(self):
+        return self._cohort.skill
+
+    @property
+    def behavior(self):
+        """ :rtype: BehaviorGroup """
+        return self._cohort.behavior
+
+    @property
+    def curriculum(self):
+        return self._cohort.curriculum
+
+    @property
+    def env(self):
+        return self._cohort.env
+
+    @property
+    def goals(self):
+        return ()
+
+    @property
+    def known_resources(self):
+        return self._cohort.known_resources
+
+    @property
+    def knowledge_states(self):
+        """ :rtype: KnowledgeStateTable """
+        return self._cohort.knowledge_states
+
+    def random_stream(self, purpose):
+        return self._cohort.random_stream(purpose)
+
+    def resources_to_learn_from(self, resources):
+        """
+        :param collections.Iterable[Resource] resources: resources
+        :rtype: tuple[Resource]
+        """
+        knowledge = self._knowledge
+        return tuple(
+            resource for resource in resources
+            if self._cohort.knowledge_states.available_facts(resource.facts_to_study, knowledge)
+        )
+
+    def learn(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact learnt
+        """
+        self._knowledge = self._cohort.knowledge_states.with_fact(self._knowledge, fact)
+
+
+class Cohort(IntelligentAgent, ResourceRosterMixin):
+    """
+    Statistically identical students represented as numbers of students per state - knowledge and passed exams.
+    Behaviors are applied once per state rather than once per student, so simulation cost depends on number of
+    distinct states, not cohort size. Students of a cohort follow a common schedule: activity lengths are drawn once
+    per round and every activity takes its whole length. Students in a state can be split into branches making
+    independent behavior decisions, so random behaviors spread students over states.
+
+    Cohorts do not exchange messages, do not forget facts and do not resume interrupted lectures. Cohort with nothing
+    to do waits for a lesson publication or access grant, like a dormant student.
+    """
+    EXPECTED_PASS_PROBABILITY = Student.EXPECTED_PASS_PROBABILITY
+
+    def __init__(self, name, size, behavior, knowledge=(), skill=None, branches=1, **kwargs):
+        """
+        :param str name: name
+        :param int size: number of students
+        :param BehaviorGroup behavior: behaviors of cohort students
+        :param collections.Iterable[knowledge_representation.Fact] knowledge: initial knowledge of every student
+        :param float|None skill: skill of every student
+        :param int branches: maximum number of branches students in a state are split into every round
+        """
+        super(Cohort, self).__init__(**kwargs)
+        if size < 1:
+            raise ValueError("Positive cohort size expected, got {0}".format(size))
+        if branches < 1:
+            raise ValueError("Positive number of branches expected, got {0}".format(branches))
+        self._name = name
+        self._size = size
+        self._behavior = behavior
+        self._skill = skill if skill else 1
+        self._branches = branches
+        # simulation injects a table shared by all its students
+        self._knowledge_states = KnowledgeStateTable()
+        self._states = Counter({(self._knowledge_states.intern(FactSet.from_facts(knowledge)), frozenset()): size})
+        self._finished = Counter()
+        self._exam_attempts = Counter()
+
+        self._logger = logging.getLogger(__name__)
+
+        # injected properties
+        self._curriculum = None
+        self._resource_index = None
+        self._random_streams = None
+        self._stop_participation_event = None
+        self._wake_event = None
+        # injected properties end
+
+    def __unicode__(self):
+        return "{type} {name}({id}) of {size}".format(
+            type=type(self).__name__, id=self._agent_id, name=self._name, size=self._size
+        )
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def size(self):
+        """ :rtype: int """
+        return self._size
+
+    @property
+    def behavior(self):
+        """ :rtype: BehaviorGroup """
+        return self._behavior
+
+    @property
+    def skill(self):
+        return self._skill
+
+    @property
+    def check_fact_skill(self):
+        return self._skill * 10
+
+    @property
+    def curriculum(self):
+        """ :rtype: knowledge_representation.Curriculum """
+        return self._curriculum
+
+    @curriculum.setter
+    def curriculum(self, value):
+        self._curriculum = value
+        if value is not None:
+            # states share fact indexer with curriculum lessons, as knowledge of students does
+            indexer = value.fact_indexer
+            self._states = Counter({
+                (self._knowledge_states.intern(FactSet.from_facts(knowledge, indexer)), passed): count
+                for (knowledge, passed), count in self._states.items()
+            })
+
+    @property
+    def knowledge_states(self):
+        """ :rtype: KnowledgeStateTable """
+        return self._knowledge_states
+
+    @knowledge_states.setter
+    def knowledge_states(self, value):
+        self._knowledge_states = value
+        self._states = Counter({
+            (value.intern(knowledge), passed): count for (knowledge, passed), count in self._states.items()
+        })
+
+    @property
+    def resource_index(self):
+        """ :rtype: FactResourceIndex """
+        return self._resource_index
+
+    @resource_index.setter
+    def resource_index(self, value):
+        self._resource_index = value
+
+    @property
+    def random_streams(self):
+        """ :rtype: RandomStreams """
+        return self._random_streams
+
+    @random_streams.setter
+    def random_streams(self, value):
+        self._random_streams = value
+
+    def random_stream(self, purpose):
+        """
+        :param str purpose: what numbers are drawn for
+        :rtype: RandomStream|random.Random
+        """
+        if self._random_streams is None:
+            return random
+        return self._random_streams.stream(self.agent_id, purpose)
+
+    @property
+    def stop_participation_event(self):
+        if not self._stop_participation_event:
+            self._stop_participation_event = self.env.event()
+        return self._stop_participation_event
+
+    def stop_participation(self):
+        self.stop_participation_event.succeed()
+
+    def wake(self):
+        """
+        Wakes cohort up if it waits for something to do
+        """
+        if self._wake_event is not None and not self._wake_event.triggered:
+            self._wake_event.succeed()
+
+    def add_resource(self, resource):
+        super(Cohort, self).add_resource(resource)
+        self.wake()
+
+    @property
+    def knowledge_distribution(self):
+        """
+        Number of students per knowledge state, including students who stopped participating
+        :rtype: dict[FactSet, int]
+        """
+        result = Counter()
+        for states in (self._states, self._finished):
+            for (knowledge, _), count in states.items():
+                result[knowledge] += count
+        return dict(result)
+
+    @property
+    @Observer.observe(topic=ResultTopics.COHORT_COMMON_KNOWLEDGE)
+    @DeltaObserver.observe(topic=ResultTopics.COHORT_COMMON_KNOWLEDGE_DELTA, delta=lambda new, old: new-old)
+    def knowledge(self):
+        """
+        Facts known by every student of the cohort
+        :rtype: FactSet
+        """
+        states = iter(self.knowledge_distribution)
+        result = next(states)
+        for knowledge in states:
+            result = result & knowledge
+        return result
+
+    @property
+    @Observer.observe(topic=ResultTopics.COHORT_MEAN_KNOWLEDGE_COUNT)
+    def mean_knowledge_count(self):
+        """
+        Average number of facts known by a student
+        :rtype: float
+        """
+        return sum(len(knowledge) * count for knowledge, count in self.knowledge_distribution.items()) / self._size
+
+    @property
+    @Observer.observe(topic=ResultTopics.KNOWLEDGE_DISTRIBUTION)
+    def observed_knowledge_distribution(self):
+        return self.knowledge_distribution
+
+    @AgentCallObserver.observe(topic=ResultTopics.COHORT_RESOURCE_USAGE)
+    def use_resource(self, resource, count):
+        """
+        :param Resource resource: resource studied
+        :param int count: number of students studying it
+        """
+        self._logger.debug("{cohort}: {count} students study {resource}".format(
+            cohort=self, count=count, resource=resource
+        ))
+
+    @AgentCallObserver.observe(topic=ResultTopics.COHORT_EXAM_RESULTS)
+    def accept_feedback(self, exam=None, exam_feedback=None, count=1):
+        """
+        :param Exam exam: exam attempted
+        :param ExamFeedback exam_feedback: feedback
+        :param int count: number of students who got the feedback
+        """
+        self._logger.debug("{cohort}: {count} students got {grade} for {exam}".format(
+            cohort=self, count=count, grade=exam_feedback.grade, exam=exam
+        ))
+
+    def get_accessible_resources(self):
+        """
+        :rtype: list[Resource]
+        """
+        # sorted so that decisions do not depend on hash order
+        resources = sorted(self.known_resources, key=lambda resource: resource.agent_id)
+        return [resource for resource in resources if resource.allow_access(self)]
+
+    def start(self):
+        periods = self._behavior.activity_periods
+        while True:
+            self._stop_finished_students()
+            if not self._states:
+                self.stop_participation()
+                return
+            if not self._has_options():
+                yield from self._wait_for_options()
+                continue
+
+            study_length = periods.get_study_period(self, self.env.now)
+            studied = self._study(study_length)
+            yield self.env.timeout(study_length)
+            self._update_states(studied)
+
+            # cohorts do not exchange messages, but keep to the schedule of students
+            yield self.env.timeout(periods.get_peer_interaction_period(self, self.env.now))
+
+            exam_length = periods.get_pass_exam_period(self, self.env.now)
+            examined, feedbacks = self._take_exams(exam_length)
+            yield self.env.timeout(exam_length)
+            for exam_feedback, count in feedbacks:
+                self.accept_feedback(exam=exam_feedback.exam, exam_feedback=exam_feedback, count=count)
+            self._update_states(examined)
+
+            yield self.env.timeout(periods.get_idle_period(self, self.env.now))
+
+    def _split(self, count):
+        branches = min(count, self._branches)
+        size, remainder = divmod(count, branches)
+        return [size + 1] * remainder + [size] * (branches - remainder)
+
+    def _stop_finished_students(self):
+        stop_participation = self._behavior.stop_participation.stop_participation
+        resources = self.get_accessible_resources()
+        for state, count in list(self._states.items()):
+            if stop_participation(CohortMember(self, state[0]), self._curriculum, resources):
+                self._finished[state] += count
+                del self._states[state]
+
+    def _update_states(self, states):
+        if states != self._states:
+            self._states = states
+            self.observe()
+
+    def _study(self, study_length):
+        """
+        :param float study_length: study session length
+        :return Counter: number of students per state after study session
+        """
+        resources = self.get_accessible_resources()
+        result = Counter()
+        for (knowledge, passed), count in self._states.items():
+            for branch_count in self._split(count):
+                member = CohortMember(self, knowledge)
+                self._study_session(member, resources, study_length, branch_count)
+                result[(member.knowledge, passed)] += branch_count
+        return result
+
+    def _study_session(self, member, resources, study_length, count):
+        """
+        Studies resources as a study session activity of a student does
+        """
+        choose_resource = self._behavior.resource_choice.choose_resource
+        acquire_facts = self._behavior.knowledge_acquisition.acquire_facts
+        remaining = study_length
+        while remaining > 0 and resources:
+            resource = choose_resource(member, self._curriculum, resources, remaining)
+            if resource is None:
+                return
+            self.use_resource(resource, count)
+            studied_from = member.knowledge
+            for lecture in resource.lectures:
+                if member.knowledge >= lecture.facts:
+                    continue
+                for fact in acquire_facts(member, lecture):
+                    if fact in member.knowledge:
+                        continue
+                    time_to_study = fact.complexity / self._skill
+                    if time_to_study > remaining:
+                        return
+                    remaining -= time_to_study
+                    member.learn(fact)
+            if member.knowledge == studied_from:
+                return
+
+    def _take_exams(self, exam_length):
+        """
+        Students in every state attempt exam they expect to pass, if any. Attempt numbers count attempts of the
+        cohort, not of individual students.
+        :param float exam_length: pass exam activity length
+        :return (Counter, list[(ExamFeedback, int)]): number of students per state after exams, feedbacks with number of
+            students who got them
+        """
+        exams = [exam for resource in self.get_accessible_resources() for exam in resource.exams]
+        result, feedbacks = Counter(), []
+        for (knowledge, passed), count in self._states.items():
+            exam = self._choose_exam(knowledge, passed, exams, exam_length)
+            if exam is None:
+                result[(knowledge, passed)] += count
+                continue
+            self._exam_attempts[exam.code] += 1
+            grade = self._grade(knowledge, exam, exam_length)
+            feedback = ExamFeedback(exam, grade, grade >= exam.pass_threshold, self._exam_attempts[exam.code])
+            feedbacks.append((feedback, count))
+            result[(knowledge, passed | {exam.code} if feedback.passed else passed)] += count
+        return result, feedbacks
+
+    def _choose_exam(self, knowledge, passed, exams, exam_length):
+        """
+        Exam with the highest weighted readiness among exams students expect to pass, have not passed and can complete
+        in time, as Student.choose_exam does
+        """
+        chosen, best = None, None
+        for exam in exams:
+            if exam.code in passed or exam.total_complexity / self.check_fact_skill > exam_length:
+                continue
+            readiness = self._knowledge_states.transition(knowledge, exam).known_ratio
+            if readiness <= self.EXPECTED_PASS_PROBABILITY:
+                continue
+            if best is None or exam.weight * readiness > best:
+                chosen, best = exam, exam.weight * readiness
+        return chosen
+
+    def _grade(self, knowledge, exam, exam_length):
+        checked = exam.facts_checked_within(min(exam_length, exam.allowed_time) * self.check_fact_skill)
+        if checked == len(exam.facts):
+            known = self._knowledge_states.transition(knowledge, exam).known_count
+        else:
+            known = sum(1 for fact in islice(exam.facts, checked) if fact in knowledge)
+        return known / float(len(exam.facts))
+
+    def _has_options(self):
+        """
+        Checks if students in any state have a resource teaching something learnable right away or an exam to attempt,
+        as Student._has_options does. Study sessions too short to learn a fact do not make cohort wait.
+        :rtype: bool
+        """
+        resources = self.get_accessible_resources()
+        exams = [exam for resource in resources for exam in resource.exams]
+        for knowledge, passed in self._states:
+            if CohortMember(self, knowledge).resources_to_learn_from(resources):
+                return True
+            if self._choose_exam(knowledge, passed, exams, INFINITY) is not None:
+                return True
+        return False
+
+    def _wait_for_options(self):
+        self._logger.debug("{cohort} waits for something to do at {time}".format(cohort=self, time=self.env.now))
+        self._wake_event = self.env.event()
+        events = [self._wake_event]
+        events.extend(resource.publication_event for resource in self.known_resources)
+        yield self.env.any_of(events)
+        self._wake_event = None
+
+
+class RationalCohort(Cohort, RationalStudentBehaviorMixin):
+    def __init__(self, name, size, knowledge=(), **kwargs):
+        behavior = self.get_behavior(**kwargs)
+        super(RationalCohort, self).__init__(name, size, behavior, knowledge, **kwargs)
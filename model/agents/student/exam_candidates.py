@@ -0,0 +1,118 @@
+import heapq
+
+from model.knowledge_representation import FactSet
+
+
+__author__ = 'e.kolpakov'
+
+
+class ExamCandidates:
+    """
+    Exams available to a student with cached time estimates and readiness. Number of known facts of every exam is
+    updated incrementally from knowledge changes, exams student expects to pass are kept in a heap ordered by
+    weighted readiness, so choosing an exam pops heap entries instead of estimating every available exam.
+    Entries invalidated by knowledge changes or passed exams are dropped when popped.
+    """
+    def __init__(self, student):
+        """
+        :param Student student: student
+        """
+        self._student = student
+        self._order = {}
+        self._durations = {}
+        self._known_counts = {}
+        self._fact_exams = {}
+        self._known_mask = 0
+        self._indexer = None
+        self._heap = []
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, exam):
+        return exam in self._order
+
+    def rebuild(self, exams):
+        """
+        :param collections.Iterable[Exam] exams: available exams, earlier ones win ties like in first-max selection
+        """
+        student, knowledge = self._student, self._student.knowledge
+        self._indexer = knowledge.indexer
+        self._known_mask = knowledge.mask
+        self._order, self._durations, self._known_counts, self._fact_exams = {}, {}, {}, {}
+        self._heap, self._entries = [], {}
+        for exam in exams:
+            if exam in self._order:
+                continue
+            self._order[exam] = len(self._order)
+            self._durations[exam] = student.estimate_exam_time(exam)
+            self._known_counts[exam] = student.knowledge_states.transition(knowledge, exam).known_count
+            for fact_index in self._indexer.indices_of(FactSet.from_facts(exam.facts, self._indexer).mask):
+                self._fact_exams.setdefault(fact_index, []).append(exam)
+            self._push(exam)
+
+    def readiness(self, exam):
+        """
+        Share of exam facts student knows
+        :param Exam exam: candidate exam
+        :rtype: float
+        """
+        self._update_knowledge()
+        return self._known_counts[exam] / float(len(exam.facts))
+
+    def choose(self, complete_before):
+        """
+        Exam with the highest weighted readiness among exams student expects to pass, has not passed yet and can
+        complete in time
+        :param float complete_before: time exam should be completed by
+        :rtype: Exam|None
+        """
+        self._update_knowledge()
+        now, progress = self._student.env.now, self._student.progress
+        heap, too_long, chosen = self._heap, [], None
+        while heap:
+            entry = heapq.heappop(heap)
+            exam = entry[2]
+            if self._entries.get(exam) is not entry:
+                continue
+            # TODO allow attempting passed exam again if there's room for improvement
+            if progress.passed_exam(exam):
+                del self._entries[exam]
+                continue
+            too_long.append(entry)
+            if now + self._durations[exam] <= complete_before:
+                chosen = exam
+                break
+        for entry in too_long:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    def _update_knowledge(self):
+        knowledge = self._student.knowledge
+        known_mask = FactSet.from_facts(knowledge, self._indexer).mask
+        changed_mask = known_mask ^ self._known_mask
+        if not changed_mask:
+            return
+        learnt_mask = known_mask & changed_mask
+        self._known_mask = known_mask
+        changed_exams = set()
+        for fact_index in self._indexer.indices_of(changed_mask):
+            delta = 1 if learnt_mask >> fact_index & 1 else -1
+            for exam in self._fact_exams.get(fact_index, ()):
+                self._known_counts[exam] += delta
+                changed_exams.add(exam)
+        for exam in changed_exams:
+            self._push(exam)
+
+    def _push(self, exam):
+        probability = self._known_counts[exam] / float(len(exam.facts))
+        if probability <= self._student.EXPECTED_PASS_PROBABILITY or self._student.progress.passed_exam(exam):
+            self._entries.pop(exam, None)
+            return
+        entry = (-exam.weight * probability, self._order[exam], exam)
+        self._entries[exam] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
@@ -13,12 +13,25 @@ class AbstractGoal(StopParticipationBehaviorMixin, metaclass=ABCMeta):
     def __init__(self, weight=1.0):
         self.weight = weight
 
+    @property
+    def target_competencies(self):
+        """
+        Competencies goal achievement depends on
+        :rtype: collections.Iterable[knowledge_representation.Competency]
+        """
+        return ()
+
     @abstractmethod
     def achieved(self, student):
+        """
+        Evaluates goal from scratch - use student.progress.is_achieved for cheap incrementally maintained flag
+        :param Student student: student
+        :rtype: bool
+        """
         pass
 
     def stop_participation(self, student, curriculum, available_resources):
-        return self.achieved(student)
+        return student.progress.is_achieved(self)
 
     def requires_activity(self, student, activity_type):
         return True
@@ -42,9 +55,8 @@ class WeightedFactGoalMixin:
             result += self.DEPENDENCY_FACT_WEIGHT
         return result if result > 0 else self.OTHER_FACT_WEIGHT
 
-    def get_resource_facts_weight(self, resource, prior_knowledge):
-        facts = set(resource.facts_to_study)
-        available_facts = get_available_facts(facts, prior_knowledge)
+    def get_resource_facts_weight(self, resource, prior_knowledge, knowledge_states=None):
+        available_facts = get_available_facts(resource.facts_to_study, prior_knowledge, knowledge_states)
         return sum(map(self._get_fact_weight, available_facts))
 
     # Still uses greedy approach. A* suits better, but a bit more complicated, so requires more thorough testing
@@ -52,8 +64,8 @@ class WeightedFactGoalMixin:
     # TODO add unit tests
     def resource_choice_map(self, student, curriculum, available_resources, remaining_time=None):
         return {
-            resource: self.get_resource_facts_weight(resource, student.knowledge)
-            for resource in available_resources
+            resource: self.get_resource_facts_weight(resource, student.knowledge, student.knowledge_states)
+            for resource in student.resources_to_learn_from(available_resources)
         }
 
 
@@ -67,11 +79,15 @@ class StudyCompetenciesGoal(WeightedFactGoalMixin, ResourceChoiceMixin, Abstract
         target_facts = frozenset(fact for competency in target_competencies for fact in competency.facts)
         super(StudyCompetenciesGoal, self).__init__(target_facts=target_facts, **kwargs)
 
+    @property
+    def target_competencies(self):
+        return tuple(self._target_competencies)
+
     def achieved(self, student):
         return all(competency.is_mastered(student.knowledge) for competency in self._target_competencies)
 
     def requires_activity(self, student, activity_type):
-        if activity_type == StudySessionActivity and self.achieved(student):
+        if activity_type == StudySessionActivity and student.progress.is_achieved(self):
             return False
         return super().requires_activity(student, activity_type)
 
@@ -85,7 +101,7 @@ class StudyAllCompetenciesGoal(StudyCompetenciesGoal):
         return all(competency.is_mastered(student.knowledge) for competency in self._target_competencies)
 
     def requires_activity(self, student, activity_type):
-        if activity_type == StudySessionActivity and self.achieved(student):
+        if activity_type == StudySessionActivity and student.progress.is_achieved(self):
             return False
         return super().requires_activity(student, activity_type)
 
@@ -104,6 +120,6 @@ class PassExamGoal(WeightedFactGoalMixin, ResourceChoiceMixin, AbstractGoal):
         return any(result.passed for result in exam_results)
 
     def requires_activity(self, student, activity_type):
-        if activity_type == StudySessionActivity and self.achieved(student):
+        if activity_type == StudySessionActivity and student.progress.is_achieved(self):
             return False
         return super().requires_activity(student, activity_type)
@@ -0,0 +1,138 @@
+__author__ = 'e.kolpakov'
+
+
+class LectureCursor:
+    """
+    Position of a student within acquisition plan of a lecture
+    """
+    __slots__ = ('_lecture', '_plan', '_position')
+
+    def __init__(self, lecture, plan):
+        """
+        :param Lecture lecture: lecture
+        :param tuple[knowledge_representation.Fact] plan: facts to study, in order
+        """
+        self._lecture = lecture
+        self._plan = plan
+        self._position = 0
+
+    @property
+    def lecture(self):
+        """ :rtype: Lecture """
+        return self._lecture
+
+    @property
+    def plan(self):
+        """ :rtype: tuple[knowledge_representation.Fact] """
+        return self._plan
+
+    @property
+    def position(self):
+        """ :rtype: int """
+        return self._position
+
+    @property
+    def is_complete(self):
+        """ :rtype: bool """
+        return self._position >= len(self._plan)
+
+    def next_fact(self):
+        """
+        :rtype: knowledge_representation.Fact|None
+        """
+        return self._plan[self._position] if self._position < len(self._plan) else None
+
+    @property
+    def remaining(self):
+        """
+        Facts of the plan not studied yet
+        :rtype: tuple[knowledge_representation.Fact]
+        """
+        return self._plan[self._position:]
+
+    def advance(self, count=1):
+        """
+        :param int count: number of facts studied
+        """
+        self._position += count
+
+
+class LectureProgress:
+    """
+    Lectures a student has started but not finished. Acquisition plan is computed when lecture is started and is kept
+    until lecture is finished, so study sessions that run out of time resume from the next fact of the plan instead
+    of planning lecture again. Resource of the last interrupted lecture is remembered so next session can resume it.
+    """
+    def __init__(self):
+        self._cursors = {}
+        self._interrupted = None
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def __contains__(self, lecture):
+        return lecture in self._cursors
+
+    def cursor(self, lecture):
+        """
+        :param Lecture lecture: lecture
+        :rtype: LectureCursor|None
+        """
+        return self._cursors.get(lecture)
+
+    def start(self, lecture, plan):
+        """
+        :param Lecture lecture: lecture
+        :param collections.Iterable[knowledge_representation.Fact] plan: facts to study, in order
+        :rtype: LectureCursor
+        """
+        cursor = self._cursors[lecture] = LectureCursor(lecture, tuple(plan))
+        return cursor
+
+    def complete(self, lecture):
+        """
+        :param Lecture lecture: finished lecture
+        """
+        self.discard(lecture)
+
+    def discard(self, lecture):
+        """
+        Forgets lecture progress, lecture is planned from scratch when taken next time
+        :param Lecture lecture: lecture
+        """
+        self._cursors.pop(lecture, None)
+        if self._interrupted is not None and self._interrupted[1] == lecture:
+            self._interrupted = None
+
+    def retain(self, lectures):
+        """
+        Forgets progress of lectures not among given ones, e.g. lectures that are no longer available to student
+        :param collections.Iterable[Lecture] lectures: lectures to keep progress of
+        """
+        available = set(lectures)
+        for lecture in [lecture for lecture in self._cursors if lecture not in available]:
+            self.discard(lecture)
+        if self._interrupted is not None and self._interrupted[1] not in available:
+            self._interrupted = None
+
+    def interrupted(self, resource, lecture):
+        """
+        :param Resource resource: resource being studied
+        :param Lecture lecture: lecture that was not finished
+        """
+        self._interrupted = (resource, lecture)
+
+    @property
+    def interrupted_resource(self):
+        """
+        Resource studied when last unfinished lecture was interrupted
+        :rtype: Resource|None
+        """
+        return self._interrupted[0] if self._interrupted is not None else None
+
+    @property
+    def interrupted_lecture(self):
+        """
+        :rtype: Lecture|None
+        """
+        return self._interrupted[1] if self._interrupted is not None else None
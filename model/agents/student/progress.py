@@ -0,0 +1,135 @@
+__author__ = 'e.kolpakov'
+
+
+class StudentProgress:
+    """
+    Incrementally maintained student progress: number of learnt facts of tracked competencies, passed exams and goal
+    achievement flags. Competencies and goals are tracked from the first request about them, after that queries are
+    O(1). Goals are only re-evaluated when a tracked competency gets mastered or an exam gets passed.
+    """
+    def __init__(self, student):
+        """
+        :param Student student: student whose progress is tracked
+        """
+        self._student = student
+        self._competencies = {}
+        self._learnt_counts = {}
+        self._fact_competencies = {}
+        self._passed_exams = set()
+        self._goals = {}
+        self._goal_achieved_event = None
+
+    @property
+    def goal_achieved_event(self):
+        """
+        Event triggered with tuple of newly achieved goals when any tracked goal gets achieved
+        :rtype: simpy.events.Event
+        """
+        if self._goal_achieved_event is None:
+            self._goal_achieved_event = self._student.env.event()
+        return self._goal_achieved_event
+
+    def track_competency(self, competency):
+        """
+        :param knowledge_representation.Competency competency: competency
+        """
+        code = competency.code
+        if code in self._competencies:
+            return
+        self._competencies[code] = competency
+        self._learnt_counts[code] = len(competency.facts & self._student.knowledge)
+        for fact in competency.facts:
+            self._fact_competencies.setdefault(fact.code, []).append(code)
+
+    def untrack_competency(self, competency):
+        """
+        :param knowledge_representation.Competency competency: competency
+        """
+        code = competency.code
+        if self._competencies.pop(code, None) is None:
+            return
+        del self._learnt_counts[code]
+        for fact in competency.facts:
+            self._fact_competencies[fact.code].remove(code)
+
+    def is_mastered(self, competency):
+        """
+        :param knowledge_representation.Competency competency: competency
+        :rtype: bool
+        """
+        self.track_competency(competency)
+        return self._learnt_counts[competency.code] == len(competency.facts)
+
+    def mastered_ratio(self, competency):
+        """
+        :param knowledge_representation.Competency competency: competency
+        :rtype: float
+        """
+        self.track_competency(competency)
+        return self._learnt_counts[competency.code] / len(competency.facts)
+
+    def passed_exam(self, exam):
+        """
+        :param Exam exam: exam
+        :rtype: bool
+        """
+        return exam.code in self._passed_exams
+
+    def track_goals(self, goals):
+        """
+        :param collections.Iterable[AbstractGoal] goals: goals
+        """
+        for goal in goals:
+            self.is_achieved(goal)
+
+    def is_achieved(self, goal):
+        """
+        :param AbstractGoal goal: goal
+        :rtype: bool
+        """
+        achieved = self._goals.get(goal)
+        if achieved is None:
+            for competency in goal.target_competencies:
+                self.track_competency(competency)
+            achieved = self._goals[goal] = goal.achieved(self._student)
+        return achieved
+
+    def fact_learnt(self, fact):
+        """
+        Should be called once for every newly learnt fact
+        :param knowledge_representation.Fact fact: fact
+        """
+        competency_mastered = False
+        for code in self._fact_competencies.get(fact.code, ()):
+            self._learnt_counts[code] += 1
+            if self._learnt_counts[code] == len(self._competencies[code].facts):
+                competency_mastered = True
+        if competency_mastered:
+            self._update_goals()
+
+    def fact_forgotten(self, fact):
+        """
+        Should be called once for every forgotten fact. Achieved goals stay achieved.
+        :param knowledge_representation.Fact fact: fact
+        """
+        for code in self._fact_competencies.get(fact.code, ()):
+            self._learnt_counts[code] -= 1
+
+    def feedback_received(self, exam, exam_feedback):
+        """
+        :param Exam exam: exam
+        :param ExamFeedback exam_feedback: exam feedback
+        """
+        if exam_feedback.passed and exam.code not in self._passed_exams:
+            self._passed_exams.add(exam.code)
+            self._update_goals()
+
+    def _update_goals(self):
+        achieved = [goal for goal, flag in self._goals.items() if not flag and goal.achieved(self._student)]
+        if not achieved:
+            return
+        for goal in achieved:
+            self._goals[goal] = True
+        if self._goal_achieved_event is not None:
+            event, self._goal_achieved_event = self._goal_achieved_event, None
+            event.succeed(tuple(achieved))
@@ -0,0 +1,87 @@
+import heapq
+
+from model.infrastructure import INFINITY
+
+
+__author__ = 'e.kolpakov'
+
+
+class FactRetention:
+    """
+    Tracks when learnt facts expire. Nothing is scheduled in simulation: expiration times are kept in a heap and
+    expired facts are popped in batches when knowledge is queried, so a query costs a single comparison unless some
+    fact has actually expired. Facts that never expire are not tracked at all.
+    """
+    def __init__(self):
+        self._expire_at = {}
+        self._reinforcements = {}
+        self._facts = {}
+        self._heap = []
+
+    @property
+    def next_expiry(self):
+        """ :rtype: float """
+        return self._heap[0][0] if self._heap else INFINITY
+
+    def __len__(self):
+        return len(self._expire_at)
+
+    def is_tracked(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact
+        :rtype: bool
+        """
+        return fact.code in self._expire_at
+
+    def expires_at(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact
+        :return float: time fact is forgotten at, INFINITY if fact is not tracked
+        """
+        return self._expire_at.get(fact.code, INFINITY)
+
+    def reinforcements(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact
+        :rtype: int
+        """
+        return self._reinforcements.get(fact.code, 0)
+
+    def reinforce(self, fact, now, retention_period):
+        """
+        :param knowledge_representation.Fact fact: learnt or reinforced fact
+        :param float now: current time
+        :param float retention_period: time fact is retained from now
+        """
+        code = fact.code
+        if retention_period == INFINITY:
+            self._forget(code)
+            return
+        expire_at = now + retention_period
+        self._expire_at[code] = expire_at
+        self._reinforcements[code] = self._reinforcements.get(code, 0) + 1
+        self._facts[code] = fact
+        heapq.heappush(self._heap, (expire_at, code))
+        # superseded heap entries are skipped when popped, but shouldn't accumulate indefinitely
+        if len(self._heap) > 2 * len(self._expire_at) + 64:
+            self._heap = [(expire_at, code) for code, expire_at in self._expire_at.items()]
+            heapq.heapify(self._heap)
+
+    def pop_expired(self, now):
+        """
+        Stops tracking facts expired by given time
+        :param float now: current time
+        :rtype: list[knowledge_representation.Fact]
+        """
+        expired, heap = [], self._heap
+        while heap and heap[0][0] <= now:
+            expire_at, code = heapq.heappop(heap)
+            if self._expire_at.get(code) == expire_at:
+                expired.append(self._facts[code])
+                self._forget(code)
+        return expired
+
+    def _forget(self, code):
+        self._expire_at.pop(code, None)
+        self._reinforcements.pop(code, None)
+        self._facts.pop(code, None)
@@ -1,38 +1,69 @@
-from collections import defaultdict
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
 import logging
-from itertools import cycle
+import random
+from itertools import cycle, islice
 
-from pubsub import pub
+from simpy import Interrupt
 
 from model.agents.base_agents import IntelligentAgent
 from model.agents.student.activities import (
-    IdleActivity, StudySessionActivity, PeerStudentInteractionActivity, PassExamActivity
+    IdleActivity, StudySessionActivity, PeerStudentInteractionActivity, PassExamActivity, DormantActivity
 )
+from model.agents.student.exam_candidates import ExamCandidates
+from model.agents.student.lecture_progress import LectureProgress
 from model.agents.student.messages import BaseMessage
+from model.agents.student.progress import StudentProgress
+from model.agents.student.retention import FactRetention
 from model.infrastructure import INFINITY
+from model.infrastructure.mailbox import MailboxBus
 from model.infrastructure.observers import Observer, observer_trigger, AgentCallObserver, DeltaObserver
+from model.knowledge_representation import Competency, FactSet, KnowledgeStateTable
+from model.knowledge_representation.curriculum import CurriculumChange
 from model.simulation.resource_access import ResourceRosterMixin
 from model.simulation.result import ResultTopics
+from model.simulation.social_graph import SocialGraph
 
 
 __author__ = 'e.kolpakov'
 
 
 class Student(IntelligentAgent, ResourceRosterMixin):
-    def __init__(self, name, knowledge, behavior, skill=None, goals=None, **kwargs):
+    EXPECTED_PASS_PROBABILITY = 0.8
+
+    def __init__(
+            self, name, knowledge, behavior, skill=None, goals=None, coalesced_study=False, mailbox_bus=None,
+            social_graph=None, dormant_when_idle=False, **kwargs
+    ):
         """
         :type name: str
-        :type knowledge: list[knowledge_representation.Fact]
+        :type knowledge: collections.Iterable[knowledge_representation.Fact]
         :type behavior: BehaviorGroup
         :type skill: double
+        :param bool coalesced_study: study lecture facts within a single simulation event, see study_facts
+        :param MailboxBus|None mailbox_bus: bus to register inbox with, students exchanging messages share one bus;
+            private bus by default
+        :param SocialGraph|None social_graph: graph to join, students meeting each other share one graph; private
+            graph by default
+        :param bool dormant_when_idle: go dormant when there is nothing to do, see DormantActivity
         """
         super(Student, self).__init__(**kwargs)
         self._name = name
         self._behavior = behavior
-        self._knowledge = set(knowledge)
+        # simulation injects a table shared by all its students
+        self._knowledge_states = KnowledgeStateTable()
+        self._knowledge = self._knowledge_states.intern(FactSet.from_facts(knowledge))
+        self._knowledge_version = 0
         self._skill = skill if skill else 1
+        self._coalesced_study = coalesced_study
         self._goals = goals or []
         self._exam_results = defaultdict(list)
+        self._exam_attempts = defaultdict(int)
+        self._dormant_when_idle = dormant_when_idle
+        self._wake_event = None
+        self._progress = StudentProgress(self)
+        self._lecture_progress = LectureProgress()
+        self._retention = FactRetention()
 
         self._logger = logging.getLogger(__name__)
 
@@ -41,15 +72,32 @@ class Student(IntelligentAgent, ResourceRosterMixin):
 
         # injected properties
         self._curriculum = None
+        self._resource_index = None
+        self._random_streams = None
         self._env = None
         self._stop_participation_event = None
         # injected properties end
 
-        self._known_students = {}
-        self._inbox = []
+        self._learnable_frontier = None
+        self._learnable_resources = (None, None)
+        self._exam_candidates = ExamCandidates(self)
+        self._exam_candidates_key = None
+
+        self._social_graph = social_graph if social_graph is not None else SocialGraph()
+        self._social_id = self._social_graph.add_member(self)
+        self._mailbox_bus = mailbox_bus if mailbox_bus is not None else MailboxBus()
+        self._inbox_address = self._mailbox_bus.register()
+        self._inbox = self._mailbox_bus.mailbox(self._inbox_address)
+        inbox_behavior = self._behavior.inbox
+        self._inbox.configure(
+            key=inbox_behavior.message_key, admit=lambda message: inbox_behavior.admit(self, message),
+            priority=lambda message: inbox_behavior.priority(self, message),
+            blocker=lambda message: inbox_behavior.blocker(self, message)
+        )
+        if dormant_when_idle:
+            self._inbox.listen(self.wake)
 
         self.__init_activities()
-        self.__subscribe_to_inbox()
 
     def __init_activities(self):
         self._activity_lengths = {
@@ -59,16 +107,13 @@ class Student(IntelligentAgent, ResourceRosterMixin):
             PassExamActivity: self.behavior.activity_periods.get_pass_exam_period
         }
 
-    def __subscribe_to_inbox(self):
-        self._logger.info("{student} subscribes to inbox {address}".format(student=self, address=self.inbox_address))
-        pub.subscribe(self._receive_message, self.inbox_address)
-
     def __lt__(self, other):
         assert isinstance(other, Student)
         return self.agent_id < other.agent_id
 
     def __eq__(self, other):
-        assert isinstance(other, Student)
+        if not isinstance(other, Student):
+            return NotImplemented
         return self.agent_id == other.agent_id
 
     def __hash__(self):
@@ -83,7 +128,23 @@ class Student(IntelligentAgent, ResourceRosterMixin):
 
     @property
     def inbox_address(self):
-        return "Student {name} (id: {id})".format(name=self.name, id=self.agent_id)
+        """ :rtype: int """
+        return self._inbox_address
+
+    @property
+    def mailbox_bus(self):
+        """ :rtype: MailboxBus """
+        return self._mailbox_bus
+
+    @property
+    def social_id(self):
+        """ :rtype: int """
+        return self._social_id
+
+    @property
+    def social_graph(self):
+        """ :rtype: SocialGraph """
+        return self._social_graph
 
     @property
     def behavior(self):
@@ -102,17 +163,55 @@ class Student(IntelligentAgent, ResourceRosterMixin):
     def exam_results(self):
         return self._exam_results
 
+    @property
+    def progress(self):
+        """ :rtype: StudentProgress """
+        return self._progress
+
+    @property
+    def lecture_progress(self):
+        """ :rtype: LectureProgress """
+        return self._lecture_progress
+
     @property
     @Observer.observe(topic=ResultTopics.KNOWLEDGE_SNAPSHOT)
     @Observer.observe(topic=ResultTopics.KNOWLEDGE_COUNT, converter=lambda x: len(x))
     @DeltaObserver.observe(topic=ResultTopics.KNOWLEDGE_DELTA, delta=lambda new, old: new-old)
     def knowledge(self):
-        """ :rtype: frozenset """
-        return frozenset(self._knowledge)
+        """
+        Immutable fact set, returned as is - a new one is created when knowledge changes
+        :rtype: FactSet
+        """
+        return self._get_knowledge()
+
+    @property
+    def knowledge_version(self):
+        """
+        Incremented whenever facts are learnt or forgotten, so values derived from knowledge can be cached by
+        (student, knowledge_version)
+        :rtype: int
+        """
+        self._get_knowledge()
+        return self._knowledge_version
 
     @property
     def known_students(self):
-        return tuple(self._known_students.values())
+        graph = self._social_graph
+        return tuple(map(graph.member, graph.neighbors(self._social_id)))
+
+    @property
+    def known_students_count(self):
+        """ :rtype: int """
+        return self._social_graph.degree(self._social_id)
+
+    def sample_known_students(self, count, rng=random):
+        """
+        :param int count: number of students
+        :param random.Random rng: random number generator
+        :rtype: list[Student]
+        """
+        graph = self._social_graph
+        return [graph.member(node) for node in graph.sample_neighbors(self._social_id, count, rng)]
 
     @property
     def stop_participation_event(self):
@@ -120,11 +219,49 @@ class Student(IntelligentAgent, ResourceRosterMixin):
             self._stop_participation_event = self.env.event()
         return self._stop_participation_event
 
+    @property
+    def dormant_when_idle(self):
+        """ :rtype: bool """
+        return self._dormant_when_idle
+
+    @property
+    def wake_event(self):
+        """
+        Event triggered when dormant student should wake up
+        :rtype: simpy.events.Event
+        """
+        if self._wake_event is None:
+            self._wake_event = self.env.event()
+        return self._wake_event
+
+    @property
+    def next_forgetting_time(self):
+        """ :rtype: float """
+        return self._retention.next_expiry
+
+    def wake(self):
+        """
+        Wakes student up if dormant
+        """
+        if self._wake_event is not None and not self._wake_event.triggered:
+            self._wake_event.succeed()
+
+    def woke_up(self):
+        """
+        Called by dormant activity when it ends, next dormant activity waits for a new wake event
+        """
+        self._wake_event = None
+
     @property
     def skill(self):
         """ :return: double """
         return self._skill
 
+    @property
+    def coalesced_study(self):
+        """ :rtype: bool """
+        return self._coalesced_study
+
     @property
     def check_fact_skill(self):
         # TODO separate parameter for time calculation
@@ -138,51 +275,142 @@ class Student(IntelligentAgent, ResourceRosterMixin):
     @curriculum.setter
     def curriculum(self, value):
         """ :type value: knowledge_representation.Curriculum """
+        if self._curriculum is not None:
+            self._curriculum.unsubscribe(self._on_curriculum_change)
         self._curriculum = value
+        if value is not None:
+            value.subscribe(self._on_curriculum_change)
+            # knowledge shares fact indexer with curriculum lessons, so operations between them are bit operations
+            self._knowledge = self._knowledge_states.intern(FactSet.from_facts(self._knowledge, value.fact_indexer))
+            self._exam_candidates_key = None
+
+    @property
+    def knowledge_states(self):
+        """ :rtype: KnowledgeStateTable """
+        return self._knowledge_states
+
+    @knowledge_states.setter
+    def knowledge_states(self, value):
+        """ :type value: KnowledgeStateTable """
+        self._knowledge_states = value
+        self._knowledge = value.intern(self._knowledge)
+
+    @property
+    def resource_index(self):
+        """ :rtype: FactResourceIndex """
+        return self._resource_index
+
+    @resource_index.setter
+    def resource_index(self, value):
+        """ :type value: FactResourceIndex """
+        self._resource_index = value
+        self._learnable_frontier = value.create_frontier() if value is not None else None
+        self._learnable_resources = (None, None)
+
+    @property
+    def random_streams(self):
+        """ :rtype: RandomStreams """
+        return self._random_streams
+
+    @random_streams.setter
+    def random_streams(self, value):
+        """ :type value: RandomStreams """
+        self._random_streams = value
+
+    def random_stream(self, purpose):
+        """
+        Random number generator of this student for given purpose. Falls back to global random module if no random
+        streams were injected.
+        :param str purpose: what numbers are drawn for
+        :rtype: RandomStream|random.Random
+        """
+        if self._random_streams is None:
+            return random
+        return self._random_streams.stream(self.agent_id, purpose)
 
     def start(self):
         for activity in self._next_activity_generator():
             activity_process = self._start_activity(activity)
-            if activity_process:
-                yield self.env.process(activity_process)
+            if not activity_process:
+                continue
+            process = self.env.process(self._run_interruptible(activity, activity_process))
+            self._progress.track_goals(self.goals)
+            while process.is_alive:
+                yield self.env.any_of([process, self._progress.goal_achieved_event])
+                if process.is_alive and self._should_stop_participation():
+                    # goal achieved in the middle of activity - no reason to wait until it ends
+                    process.interrupt()
+                    self.stop_participation()
+                    return
 
     def stop_participation(self):
         # TODO: check if we really want to stop participation
         self.stop_participation_event.succeed()
 
     def get_accessible_resources(self):
-        return (resource for resource in self.known_resources if resource.allow_access(self))
+        """
+        :rtype: list[Resource]
+        """
+        # sorted so that decisions do not depend on hash order
+        resources = sorted(self.known_resources, key=lambda resource: resource.agent_id)
+        return [resource for resource in resources if resource.allow_access(self)]
+
+    def resources_to_learn_from(self, resources):
+        """
+        Filters out resources that teach nothing student can learn right away. Without resource index all resources
+        are returned.
+        :param collections.Iterable[Resource] resources: resources
+        :rtype: tuple[Resource]
+        """
+        if self._learnable_frontier is None:
+            return tuple(resources)
+        self._resource_index.sync(self.env.now)
+        key = (self.knowledge_version, self._resource_index.version)
+        cached_key, teaching = self._learnable_resources
+        if cached_key != key:
+            self._learnable_frontier.update(self._knowledge)
+            teaching = self._learnable_frontier.resources()
+            self._learnable_resources = (key, teaching)
+        return tuple(resource for resource in resources if resource in teaching)
 
     def meet(self, other_student):
         if not isinstance(other_student, Student):
             message = "Expected student, got {other_student}".format(other_student=other_student)
             self._logger.warn(message)
             raise ValueError(message)
+        if other_student.social_graph is not self._social_graph:
+            raise ValueError("Student {other} belongs to another social graph".format(other=other_student))
         if self == other_student:
             self._logger.info("Student {student} already knows himself".format(student=self))
-        if other_student.agent_id in self._known_students.keys():
+        if not self._social_graph.add_edge(self._social_id, other_student.social_id):
             self._logger.info("Already met student {other}".format(other=other_student))
 
-        self._known_students[other_student.agent_id] = other_student
-
     @AgentCallObserver.observe(topic=ResultTopics.EXAM_RESULTS)
     def accept_feedback(self, exam=None, exam_feedback=None):
         self._exam_results[exam.code].append(exam_feedback)
+        self._progress.feedback_received(exam, exam_feedback)
+
+    def register_exam_attempt(self, exam):
+        """
+        :param Exam exam: exam being attempted
+        :return int: attempt number
+        """
+        self._exam_attempts[exam.code] += 1
+        return self._exam_attempts[exam.code]
 
     def get_available_exams(self):
         accessible_resources = self.get_accessible_resources()
         return (exam for resource in accessible_resources for exam in resource.exams)
 
     def estimate_exam_time(self, exam):
-        return sum(fact.complexity / self.check_fact_skill for fact in exam.facts)
+        return exam.total_complexity / self.check_fact_skill
 
     # TODO: exam should expose competencies instead of facts, than student should weight his chances of passing based on
     # weighted sum of ratios of mastery of that competencies. For now it uses facts, which essentially means student
     # knows exam questions beforehand.
     # TODO: behavior?
     def _estimate_pass_probability(self, exam):
-        knows_facts = exam.facts & self.knowledge
-        return len(knows_facts) / float(len(exam.facts))
+        return self._knowledge_states.transition(self._get_knowledge(), exam).known_ratio
 
     def expects_can_pass(self, exam):
         """
@@ -190,24 +418,26 @@ class Student(IntelligentAgent, ResourceRosterMixin):
         :param Exam exam: exam to check
         :return: bool
         """
-        return self._estimate_pass_probability(exam) > 0.8
+        return self._estimate_pass_probability(exam) > self.EXPECTED_PASS_PROBABILITY
 
     # TODO: behavior (goal driven)
     def choose_exam(self, complete_before=INFINITY):
-        exams = self.get_available_exams()
-        exam_map = {
-            exam: self._estimate_pass_probability(exam)
-            for exam in exams
-            if self.env.now + self.estimate_exam_time(exam) <= complete_before
-        }
-        exams_to_attempt = {
-            exam: exam.weight * probability
-            for exam, probability in exam_map.items()
-            if self.expects_can_pass(exam) and not self._passed_exam(exam)
-        }
-        if not exams_to_attempt:
-            return None
-        return max(exams_to_attempt, key=exams_to_attempt.get)
+        """
+        Chooses exam student expects to pass with the highest weighted pass probability among exams that can be
+        completed in time. Available exams are only collected again when resource index reports exam publications or
+        known resources change; without resource index they are collected on every call.
+        :param float complete_before: time exam should be completed by
+        :rtype: Exam|None
+        """
+        if self._resource_index is None:
+            self._exam_candidates.rebuild(self.get_available_exams())
+        else:
+            self._resource_index.sync(self.env.now)
+            key = (self._resource_index.exams_version, self.roster_version)
+            if key != self._exam_candidates_key:
+                self._exam_candidates.rebuild(self.get_available_exams())
+                self._exam_candidates_key = key
+        return self._exam_candidates.choose(complete_before)
 
     @AgentCallObserver.observe(topic=ResultTopics.RESOURCE_USAGE)
     def study_resource(self, resource, until=INFINITY):
@@ -218,8 +448,7 @@ class Student(IntelligentAgent, ResourceRosterMixin):
         self._logger.debug("{self}: Studying resource, until {until}".format(self=self, until=until))
         # TODO: behavior?
         study_result = True
-        lectures_to_study = [lecture for lecture in resource.lectures if lecture.facts - self.knowledge]
-        for lecture in lectures_to_study:
+        for lecture in self._lectures_to_study(resource):
             self._logger.debug("{student}: Studying {lecture}, until {until}".format(
                 student=self, lecture=lecture, until=until)
             )
@@ -228,13 +457,32 @@ class Student(IntelligentAgent, ResourceRosterMixin):
                 student=self, lecture=lecture, time=self.env.now
             ))
             if not study_result:
+                self._lecture_progress.interrupted(resource, lecture)
                 break
 
         return study_result
 
+    def _lectures_to_study(self, resource):
+        """
+        Lectures are checked against knowledge as they are reached, interrupted lecture of this resource goes first
+        :type resource: agents.Resource
+        :rtype: collections.Iterable[Lecture]
+        """
+        interrupted = None
+        if self._lecture_progress.interrupted_resource is resource:
+            interrupted = self._lecture_progress.interrupted_lecture
+            if resource.has_lesson(interrupted) and not self._get_knowledge() >= interrupted.facts:
+                yield interrupted
+            else:
+                self._lecture_progress.discard(interrupted)
+        for lecture in resource.lectures:
+            if lecture is not interrupted and not self._get_knowledge() >= lecture.facts:
+                yield lecture
+
     def study_fact(self, fact, until=INFINITY):
-        if fact in self._knowledge:
+        if fact in self._get_knowledge():
             self._logger.debug("{student}: {fact} already known - skipping".format(student=self, fact=fact))
+            return True
 
         self._logger.debug("{student}: studies {fact}".format(student=self, fact=fact))
         time_to_study = fact.complexity / self.skill
@@ -245,13 +493,94 @@ class Student(IntelligentAgent, ResourceRosterMixin):
         self._add_fact(fact)
         return True
 
+    def study_facts(self, cursor, until=INFINITY):
+        """
+        Studies remaining facts of lecture plan one after another as study_fact does, but within a single timeout.
+        Facts are learnt when timeout ends or gets interrupted, knowledge is still reported at the time every fact
+        would have been learnt by study_fact.
+        :param LectureCursor cursor: lecture cursor, advanced past studied facts
+        :param float until: upper time bound for studying
+        :return int: number of facts studied
+        """
+        facts, skill, finish_times = cursor.remaining, self.skill, []
+        finish_at = start = self.env.now
+        knowledge = self._get_knowledge()
+        for fact in facts:
+            # known facts are skipped in no time
+            if fact not in knowledge:
+                finish_at += fact.complexity / skill
+            if finish_at > until:
+                break
+            finish_times.append(finish_at)
+        if not finish_times:
+            if facts:
+                self._logger.debug("{self}: not enough time to study fact - skipping".format(self=self))
+            return 0
+
+        studied = len(finish_times)
+        try:
+            if finish_times[-1] > start:
+                yield self.env.timeout(finish_times[-1] - start)
+        except Interrupt:
+            # fact finishing exactly at interruption time is not learnt, as with separate timeouts
+            self._learn_studied_facts(cursor, bisect_left(finish_times, self.env.now), finish_times, knowledge)
+            raise
+        # closed (GeneratorExit) studies learn nothing - no simulated time has passed for them
+        self._learn_studied_facts(cursor, studied, finish_times, knowledge)
+        return studied
+
+    def _learn_studied_facts(self, cursor, studied, finish_times, knowledge):
+        """
+        Learns first studied facts of lecture cursor, reporting each one at its finish time
+        :param LectureCursor cursor: lecture cursor, advanced past studied facts
+        :param int studied: number of facts studied
+        :param list[float] finish_times: finish time of every planned fact
+        :param knowledge: knowledge before the studies started
+        """
+        for fact, learnt_at in zip(cursor.remaining[:studied], finish_times):
+            if fact in knowledge:
+                continue
+            self._reported_time = learnt_at
+            try:
+                self._add_fact(fact)
+            finally:
+                self._reported_time = None
+        cursor.advance(studied)
+
     def check_fact(self, fact, until=INFINITY):
         # TODO: probabilistic check, revisiting lectures if missed, behavior
         time_to_check = fact.complexity / self.check_fact_skill
         enough_time = self.env.now + time_to_check <= until
         timeout = min(time_to_check, until - self.env.now)
         yield self.env.timeout(timeout)
-        return enough_time and fact in self._knowledge
+        return enough_time and fact in self._get_knowledge()
+
+    def check_exam_facts(self, exam, until=INFINITY):
+        """
+        Checks exam facts one after another as check_fact does, but within a single timeout
+        :param Exam exam: exam
+        :param float until: upper time bound for checking
+        :return int: number of facts checked in time and known
+        """
+        skill, start = self.check_fact_skill, self.env.now
+        checked = exam.facts_checked_within((until - start) * skill)
+        check_all = checked == len(exam.facts)
+        duration = exam.total_complexity / skill if check_all else max(until - start, 0)
+        if self._retention.next_expiry <= start + duration:
+            # facts forgotten during the exam only count if checked before they expire
+            knowledge, check_at, known = self._get_knowledge(), start, 0
+            for fact in islice(exam.facts, checked):
+                check_at += fact.complexity / skill
+                if fact in knowledge and self._retention.expires_at(fact) > check_at:
+                    known += 1
+            yield self.env.timeout(duration)
+            self._get_knowledge()
+            return known
+        yield self.env.timeout(duration)
+        if check_all:
+            return self._knowledge_states.transition(self._get_knowledge(), exam).known_count
+        knowledge = self._get_knowledge()
+        return sum(1 for fact in islice(exam.facts, checked) if fact in knowledge)
 
     def process_messages(self, until=INFINITY):
         success = True
@@ -259,29 +588,84 @@ class Student(IntelligentAgent, ResourceRosterMixin):
             student=self, count=len(self._inbox)
         ))
         while success and self._inbox:
-            message = self._inbox.pop()
+            message = self.behavior.inbox.next_message(self, self._inbox)
+            if message is None:
+                break
             self._logger.debug("{student} reads message {message} from inbox".format(student=self, message=message))
             success = yield from message.process(self, until)
 
     def send_messages(self, until=INFINITY):
+        bus = self._mailbox_bus
+        # message addressed to several students is sent once and delivered to all of them at once
+        recipients = OrderedDict()
         for to_student, messages in self.behavior.send_messages.get_messages(self):
-            address = to_student.inbox_address
+            if to_student.mailbox_bus is not bus:
+                raise ValueError("{student} and {other} do not share mailbox bus".format(
+                    student=self, other=to_student
+                ))
             for message in messages:
-                time_to_send = message.time_to_send(self)
-                if self.env.now + time_to_send > until:
-                    # there might be less involving messages in the queue - should try sending them
-                    # On the other hand, it does not allow for short-circuiting out of this process
-                    # if there are little time left. TODO: implement short-circuit
-                    continue
-                yield self.env.timeout(time_to_send)
-                self._logger.debug("{student} sends message {message} to {address}".format(
-                    student=self, message=message, address=address
+                recipients.setdefault(id(message), (message, []))[1].append(to_student.inbox_address)
+
+        held_back = set()
+        for message, addresses in recipients.values():
+            for address in addresses:
+                if address not in held_back and not bus.accepts(address):
+                    # backpressure - recipient mailbox is full, remaining messages to it are held back
+                    self._logger.debug("{student}: inbox {address} is full".format(student=self, address=address))
+                    held_back.add(address)
+            addresses = [address for address in addresses if address not in held_back]
+            if not addresses:
+                continue
+            time_to_send = message.time_to_send(self)
+            if self.env.now + time_to_send > until:
+                # there might be less involving messages in the queue - should try sending them
+                # On the other hand, it does not allow for short-circuiting out of this process
+                # if there are little time left. TODO: implement short-circuit
+                continue
+            yield self.env.timeout(time_to_send)
+            self._logger.debug("{student} sends message {message} to {addresses}".format(
+                student=self, message=message, addresses=addresses
+            ))
+            delivered = bus.send_many(addresses, self._validate_message(message))
+            if delivered < len(addresses):
+                self._logger.debug("{student}: message {message} dropped or collapsed by {count} inboxes".format(
+                    student=self, message=message, count=len(addresses) - delivered
                 ))
-                pub.sendMessage(address, message=message)
 
     @observer_trigger
     def _add_fact(self, fact):
-        self._knowledge.add(fact)
+        knowledge = self._get_knowledge()
+        if fact not in knowledge:
+            self._knowledge = self._knowledge_states.with_fact(knowledge, fact)
+            self._knowledge_version += 1
+            self._progress.fact_learnt(fact)
+            self._behavior.inbox.fact_learnt(self, self._inbox, fact)
+        elif not self._retention.is_tracked(fact):
+            # initial knowledge and facts that are never forgotten need no reinforcement
+            return
+        reinforcements = self._retention.reinforcements(fact) + 1
+        retention_period = self.behavior.knowledge_decay.retention_period(self, fact, reinforcements)
+        self._retention.reinforce(fact, self.time, retention_period)
+
+    def _get_knowledge(self):
+        next_expiry = self._retention.next_expiry
+        if next_expiry != INFINITY and next_expiry <= self.env.now:
+            self._forget_expired_facts()
+        return self._knowledge
+
+    def _forget_expired_facts(self):
+        forgotten = self._retention.pop_expired(self.env.now)
+        if not forgotten:
+            return
+        indexer = self._knowledge.indexer
+        forgotten_mask = indexer.codes_mask(fact.code for fact in forgotten)
+        self._knowledge = self._knowledge_states.intern(FactSet(self._knowledge.mask & ~forgotten_mask, indexer))
+        self._knowledge_version += 1
+        for fact in forgotten:
+            self._progress.fact_forgotten(fact)
+        self._logger.debug("{student} forgot {count} facts by {time}".format(
+            student=self, count=len(forgotten), time=self.env.now
+        ))
 
     def _start_activity(self, activity, **kwargs):
         self._logger.debug("{student} Starting activity {activity} with args {kwargs}".format(
@@ -292,23 +676,95 @@ class Student(IntelligentAgent, ResourceRosterMixin):
         self._current_activity_end = self.env.now + activity.length
         return process
 
+    def _on_curriculum_change(self, change):
+        """
+        :param CurriculumChange change: curriculum change
+        """
+        self._logger.debug("{student} notified: {change}".format(student=self, change=change))
+        if change.kind != CurriculumChange.REMOVED:
+            return
+        if isinstance(change.entity, Competency):
+            self._progress.untrack_competency(change.entity)
+        elif change.entity in self._lecture_progress:
+            self._lecture_progress.discard(change.entity)
+
+    def _run_interruptible(self, activity, activity_process):
+        try:
+            yield from activity_process
+        except Interrupt:
+            self._logger.debug("{student} activity {activity} interrupted at {time}".format(
+                student=self, activity=activity, time=self.env.now
+            ))
+            activity.cancel()
+
+    def _should_stop_participation(self):
+        return self.behavior.stop_participation.stop_participation(
+            self, self.curriculum, self.get_accessible_resources()
+        )
+
     def _receive_message(self, message):
+        """
+        Puts message into own inbox, messages from other students are appended by mailbox bus directly
+        :param BaseMessage message: message
+        :return bool: True if message was accepted
+        """
+        self._logger.debug("{student} received message {message}".format(student=self, message=message))
+        return self._inbox.put(self._validate_message(message))
+
+    def _validate_message(self, message):
         if not isinstance(message, BaseMessage):
             message = "Expected message type, got {message}".format(message=message)
             self._logger.warn(message)
             raise ValueError(message)
-        self._logger.debug("{student} received message {message}".format(student=self, message=message))
-        self._inbox.append(message)
+        return message
+
+    def add_resource(self, resource):
+        super(Student, self).add_resource(resource)
+        self.wake()
+
+    def forget_resource(self, resource):
+        super(Student, self).forget_resource(resource)
+        self._discard_unavailable_lectures()
+
+    def access_changed(self):
+        super(Student, self).access_changed()
+        self._discard_unavailable_lectures()
+
+    def _discard_unavailable_lectures(self):
+        """
+        Drops progress of started lectures student can no longer take, so they do not pile up
+        """
+        if self._lecture_progress:
+            self._lecture_progress.retain(
+                lecture for resource in self.get_accessible_resources() for lecture in resource.lectures
+            )
+
+    def _has_options(self):
+        """
+        Checks if student has anything to do: a lecture to resume, a resource teaching something learnable right away,
+        an exam to attempt or a message to read
+        :rtype: bool
+        """
+        if self._inbox or self._lecture_progress.interrupted_resource is not None:
+            return True
+        if self.resources_to_learn_from(self.get_accessible_resources()):
+            return True
+        return self.choose_exam(INFINITY) is not None
 
     def _next_activity_generator(self):
         for activity_type in cycle([
             StudySessionActivity, PeerStudentInteractionActivity, PassExamActivity, IdleActivity
         ]):
-            if self.behavior.stop_participation.stop_participation(
-                    self, self.curriculum, self.get_accessible_resources()
-            ):
+            if self._should_stop_participation():
                 self.stop_participation()
                 return
+            if activity_type is StudySessionActivity and self._dormant_when_idle:
+                # not every wake up gives new options, e.g. publication of lessons teaching known facts
+                while not self._has_options():
+                    yield DormantActivity(self, env=self.env)
+                    if self._should_stop_participation():
+                        self.stop_participation()
+                        return
             if activity_type.can_skip_if_not_required_by_goal and not self._activity_required(activity_type):
                 continue
             activity_length = self._activity_lengths.get(activity_type)(self, self.env.now)
@@ -316,7 +772,3 @@ class Student(IntelligentAgent, ResourceRosterMixin):
 
     def _activity_required(self, activity):
         return not self.goals or any(map(lambda goal: goal.requires_activity(self, activity), self.goals))
-
-    def _passed_exam(self, exam):
-        # TODO allow attempting passed exam again if there's room for improvement
-        return any(feedback.passed for feedback in self._exam_results.get(exam.code, []))
@@ -0,0 +1,324 @@
+import heapq
+from collections import OrderedDict
+
+
+__author__ = 'e.kolpakov'
+
+
+class OverflowPolicy:
+    DROP_NEWEST = 'drop_newest'
+    DROP_OLDEST = 'drop_oldest'
+    BACKPRESSURE = 'backpressure'
+
+    ALL = (DROP_NEWEST, DROP_OLDEST, BACKPRESSURE)
+
+
+class Mailbox:
+    """
+    Inbox of a single agent. Messages are appended to the right and read from the right, so the most recent message
+    is read first. Bounded mailbox either drops new or old messages when full, or refuses them so sender can hold
+    them back (backpressure). Owner can configure admission filter, dropping unwanted messages on delivery, and
+    message key - message with the same key as a pending one is collapsed into it, and a listener called whenever a
+    message is added.
+    Owner can also configure message priority, so messages can be taken by priority from a heap instead of scanning
+    the mailbox. Priority is evaluated on delivery and rechecked when message is taken. Messages whose priority can
+    only grow when something happens (e.g. a fact is learnt) are blocked on a token and re-evaluated on its release.
+    """
+    __slots__ = (
+        '_messages', '_capacity', '_policy', '_dropped', '_collapsed', '_key', '_admit', '_pending_keys', '_listener',
+        '_priority', '_blocker', '_next_sequence', '_heap', '_filed', '_blocked', '_watchers'
+    )
+
+    def __init__(self, capacity=None, policy=OverflowPolicy.DROP_NEWEST):
+        """
+        :param int|None capacity: maximum number of messages, None for unbounded mailbox
+        :param str policy: OverflowPolicy value
+        """
+        if policy not in OverflowPolicy.ALL:
+            raise ValueError("Unknown overflow policy {0}".format(policy))
+        if capacity is not None and capacity < 1:
+            raise ValueError("Positive capacity expected, got {0}".format(capacity))
+        self._capacity = capacity
+        self._policy = policy
+        # sequence number -> message, in delivery order; messages can be removed from any position in O(1)
+        self._messages = OrderedDict()
+        self._next_sequence = 0
+        self._dropped = 0
+        self._collapsed = 0
+        self._key = None
+        self._admit = None
+        self._priority = None
+        self._blocker = None
+        self._listener = None
+        self._reset_indices()
+
+    def configure(self, key=None, admit=None, priority=None, blocker=None):
+        """
+        :param callable|None key: message -> hashable key or None, messages with equal keys are collapsed
+        :param callable|None admit: message -> bool, messages it returns False for are dropped on delivery
+        :param callable|None priority: message -> number, take returns message with the highest one
+        :param callable|None blocker: message -> hashable token or None, priority of message is re-evaluated when
+            its token is released
+        """
+        self._key = key
+        self._admit = admit
+        self._priority = priority
+        self._blocker = blocker
+        self._reset_indices()
+        for sequence, message in self._messages.items():
+            self._index(sequence, message)
+
+    def listen(self, listener):
+        """
+        :param callable|None listener: called without arguments after a message is added, None to stop listening
+        """
+        self._listener = listener
+
+    @property
+    def capacity(self):
+        """ :rtype: int|None """
+        return self._capacity
+
+    @property
+    def policy(self):
+        """ :rtype: str """
+        return self._policy
+
+    @property
+    def dropped(self):
+        """
+        Number of messages lost due to overflow
+        :rtype: int
+        """
+        return self._dropped
+
+    @property
+    def collapsed(self):
+        """
+        Number of messages collapsed into equivalent pending ones
+        :rtype: int
+        """
+        return self._collapsed
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __bool__(self):
+        return bool(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages.values())
+
+    def is_full(self):
+        """ :rtype: bool """
+        return self._capacity is not None and len(self._messages) >= self._capacity
+
+    def accepts(self):
+        """
+        Checks if next message would be accepted - only backpressure mailboxes refuse messages
+        :rtype: bool
+        """
+        return self._policy != OverflowPolicy.BACKPRESSURE or not self.is_full()
+
+    def put(self, message):
+        """
+        :param message: message
+        :return bool: True if message was added, even if some older message was dropped for it; False if it was
+            refused, dropped or collapsed into an equivalent pending message
+        """
+        if self._admit is not None and not self._admit(message):
+            return False
+        if self._key is not None and self._key(message) in self._pending_keys:
+            # equivalent message is already pending
+            self._collapsed += 1
+            return False
+        if self.is_full():
+            if self._policy == OverflowPolicy.BACKPRESSURE:
+                return False
+            self._dropped += 1
+            if self._policy == OverflowPolicy.DROP_NEWEST:
+                return False
+            self._forget(*self._messages.popitem(last=False))
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self._messages[sequence] = message
+        self._index(sequence, message)
+        if self._listener is not None:
+            self._listener()
+        return True
+
+    def pop(self):
+        """
+        Removes and returns most recent message
+        :raises IndexError: if mailbox is empty
+        """
+        if not self._messages:
+            raise IndexError("pop from an empty mailbox")
+        return self._forget(*self._messages.popitem())
+
+    def take(self):
+        """
+        Removes and returns message with the highest priority, the most recent one among equal. Mailbox without
+        configured priority returns the most recent message.
+        :raises IndexError: if mailbox is empty
+        """
+        if self._priority is None:
+            return self.pop()
+        heap, filed = self._heap, self._filed
+        while heap:
+            negated_priority, negated_sequence = heapq.heappop(heap)
+            sequence = -negated_sequence
+            if filed.get(sequence) != -negated_priority:
+                # message is gone or was filed again with other priority
+                continue
+            message = self._messages[sequence]
+            if self._priority(message) != -negated_priority:
+                # priority dropped since message was filed, e.g. a fact it depends on was forgotten
+                self._unblock(sequence)
+                self._file(sequence, message)
+                continue
+            del self._messages[sequence]
+            return self._forget(sequence, message)
+        raise IndexError("take from an empty mailbox")
+
+    def release(self, token):
+        """
+        Re-evaluates priority of messages blocked on token
+        :param token: token returned by blocker
+        """
+        sequences = self._watchers.pop(token, ())
+        for sequence in sequences:
+            del self._blocked[sequence]
+            self._file(sequence, self._messages[sequence])
+
+    def clear(self):
+        self._messages.clear()
+        self._reset_indices()
+
+    def _reset_indices(self):
+        self._pending_keys = {}
+        # heap of (-priority, -sequence) entries, entries not matching priority filed for sequence are stale
+        self._heap = []
+        self._filed = {}
+        self._blocked = {}
+        self._watchers = {}
+
+    def _index(self, sequence, message):
+        if self._key is not None:
+            key = self._key(message)
+            if key is not None:
+                self._pending_keys[key] = sequence
+        if self._priority is not None:
+            self._file(sequence, message)
+
+    def _file(self, sequence, message):
+        priority = self._priority(message)
+        self._filed[sequence] = priority
+        heap = self._heap
+        if len(heap) > 2 * len(self._filed) + 32:
+            # too many stale entries - rebuild heap from live ones
+            heap[:] = [(-filed_priority, -filed) for filed, filed_priority in self._filed.items()]
+            heapq.heapify(heap)
+        else:
+            heapq.heappush(heap, (-priority, -sequence))
+        token = self._blocker(message) if self._blocker is not None else None
+        if token is not None:
+            self._blocked[sequence] = token
+            self._watchers.setdefault(token, set()).add(sequence)
+
+    def _unblock(self, sequence):
+        token = self._blocked.pop(sequence, None)
+        if token is not None:
+            watchers = self._watchers[token]
+            watchers.discard(sequence)
+            if not watchers:
+                del self._watchers[token]
+
+    def _forget(self, sequence, message):
+        if self._key is not None:
+            key = self._key(message)
+            if key is not None and self._pending_keys.get(key) == sequence:
+                del self._pending_keys[key]
+        if self._priority is not None:
+            del self._filed[sequence]
+            self._unblock(sequence)
+        return message
+
+
+class MailboxBus:
+    """
+    Integer addressed mailboxes. Sending is a direct append to recipient mailbox - there are no topics or listener
+    lookups involved, so registering and messaging large numbers of agents stays cheap.
+    """
+    def __init__(self, capacity=None, policy=OverflowPolicy.DROP_NEWEST):
+        """
+        :param int|None capacity: default mailbox capacity, None for unbounded mailboxes
+        :param str policy: default OverflowPolicy value
+        """
+        self._capacity = capacity
+        self._policy = policy
+        self._mailboxes = []
+
+    def __len__(self):
+        return sum(1 for mailbox in self._mailboxes if mailbox is not None)
+
+    def register(self, capacity=None, policy=None):
+        """
+        Creates mailbox
+        :param int|None capacity: mailbox capacity, defaults to bus capacity
+        :param str|None policy: overflow policy, defaults to bus policy
+        :return int: mailbox address
+        """
+        mailbox = Mailbox(
+            capacity if capacity is not None else self._capacity, policy if policy is not None else self._policy
+        )
+        self._mailboxes.append(mailbox)
+        return len(self._mailboxes) - 1
+
+    def unregister(self, address):
+        """
+        Removes mailbox, messages sent to its address are discarded afterwards. Addresses are not reused.
+        :param int address: mailbox address
+        """
+        self._mailbox(address)
+        self._mailboxes[address] = None
+
+    def mailbox(self, address):
+        """
+        :param int address: mailbox address
+        :rtype: Mailbox
+        """
+        return self._mailbox(address)
+
+    def accepts(self, address):
+        """
+        :param int address: mailbox address
+        :rtype: bool
+        """
+        mailbox = self._mailboxes[address]
+        return mailbox is None or mailbox.accepts()
+
+    def send(self, address, message):
+        """
+        :param int address: recipient address
+        :param message: message
+        :return bool: True if message was delivered
+        """
+        mailbox = self._mailboxes[address]
+        return mailbox is not None and mailbox.put(message)
+
+    def send_many(self, addresses, message):
+        """
+        Delivers the same message to several recipients
+        :param collections.Iterable[int] addresses: recipient addresses
+        :param message: message
+        :return int: number of recipients message was delivered to, collapsed duplicates are not counted
+        """
+        mailboxes = self._mailboxes
+        return sum(1 for address in addresses if mailboxes[address] is not None and mailboxes[address].put(message))
+
+    def _mailbox(self, address):
+        mailbox = self._mailboxes[address] if 0 <= address < len(self._mailboxes) else None
+        if mailbox is None:
+            raise ValueError("No mailbox at address {0}".format(address))
+        return mailbox
@@ -0,0 +1,56 @@
+import random
+from hashlib import sha256
+
+
+__author__ = 'e.kolpakov'
+
+
+class RandomStream(random.Random):
+    """
+    Random number generator of a single agent and purpose. Seeded once from a key derived from simulation seed, so
+    drawing numbers costs the same as with the random module. Streams with different keys are independent.
+    """
+    def __init__(self, key):
+        """
+        :param bytes key: stream key
+        """
+        super(RandomStream, self).__init__(int.from_bytes(key, 'little'))
+        self.buffer = []
+        """ :type: list[float] numbers drawn ahead by consumers drawing in batches, discarded along with the stream """
+
+
+class RandomStreams:
+    """
+    Random streams derived from a single seed, one per agent and purpose. Stream key is a hash of the seed, agent id
+    and purpose, so numbers an agent draws do not depend on other agents, on order agents are simulated in or on which
+    process simulates them.
+    """
+    def __init__(self, seed):
+        """
+        :param seed: simulation seed, anything with stable string representation
+        """
+        self._seed = seed
+        self._streams = {}
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def stream(self, agent_id, purpose):
+        """
+        :param str agent_id: agent id
+        :param str purpose: what numbers are drawn for, e.g. behavior name
+        :rtype: RandomStream
+        """
+        key = (agent_id, purpose)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = RandomStream(self.derive_key(self._seed, agent_id, purpose))
+        return stream
+
+    @staticmethod
+    def derive_key(seed, agent_id, purpose):
+        """
+        :rtype: bytes
+        """
+        return sha256("{0}|{1}|{2}".format(seed, agent_id, purpose).encode('utf-8')).digest()
@@ -1,28 +1,20 @@
-from copy import deepcopy
-
 from .curriculum import Curriculum
+from .dependency_graph import DependencyGraph
 from .fact import Fact, Competency
+from .fact_set import FactSet, FactIndexer
+from .knowledge_state import KnowledgeStateTable
 
 __author__ = 'e.kolpakov'
 
 
-def get_available_facts(facts, known_facts):
+def get_available_facts(facts, known_facts, knowledge_states=None):
     """
-    :param facts: frozenset[Fact]
-    :param known_facts: frozenset[Fact]
-    :rtype: frozenset[knowledge_representation.fact.Fact]
+    :param facts: collections.Iterable[Fact]
+    :param known_facts: FactSet | frozenset[Fact]
+    :param KnowledgeStateTable|None knowledge_states: table to memoize result in, computed from scratch without one
+    :rtype: FactSet
     """
-    # TODO: this resembles connected-component search.
-    # Might be a good idea to rewrite using connected-component algorithm
-    to_check, new_available = deepcopy(facts), deepcopy(known_facts)
-
-    available = deepcopy(known_facts)
-
-    first_iteration = True
-    while new_available or first_iteration:
-        first_iteration = False
-        available |= new_available
-        to_check -= new_available
-        new_available = set(fact_to_check for fact_to_check in to_check if fact_to_check.is_available(available))
-
-    return frozenset(available & facts - known_facts)
\ No newline at end of file
+    if knowledge_states is not None:
+        return knowledge_states.available_facts(facts, known_facts)
+    indexer = facts.indexer if isinstance(facts, FactSet) else None
+    return DependencyGraph(facts, indexer).available_facts(known_facts)
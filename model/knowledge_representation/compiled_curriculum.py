@@ -0,0 +1,325 @@
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+
+from model.knowledge_representation.dependency_graph import DependencyGraph
+from model.knowledge_representation.fact_set import FactSet
+from model.knowledge_representation.publication_schedule import PublicationSchedule
+
+
+__author__ = 'e.kolpakov'
+
+
+class CompiledCurriculum:
+    """
+    Validated curriculum with derived data precomputed: facts in topological order, per-competency and per-lesson fact
+    sets, lessons grouped by type and a dependency graph over all facts.
+    Transitive prerequisites are memoized on first request: eagerly computing them for every fact of a large curriculum
+    takes memory quadratic in number of facts.
+    Owning Curriculum keeps it up to date as facts, competencies and lessons are added or removed: every change only
+    touches derived data of the changed entity.
+    """
+    def __init__(self, facts, competencies, lessons, indexer):
+        """
+        :param collections.Iterable[knowledge_representation.Fact] facts: facts in registration order
+        :param collections.Iterable[knowledge_representation.Competency] competencies: competencies
+        :param collections.Iterable[BaseLesson] lessons: lessons
+        :param FactIndexer indexer: fact indexer
+        :raises ValueError: if fact depends on unknown fact code or fact dependencies form a cycle
+        """
+        self._indexer = indexer
+        facts = tuple(facts)
+        self._validate_dependencies(facts)
+
+        # dictionaries keep insertion order, new facts only depend on existing ones - so order stays topological
+        self._fact_index = {fact.code: fact for fact in self._topological_order(facts)}
+        self._facts = None
+        self._all_facts = FactSet.from_facts(self._fact_index.values(), indexer)
+        self._dependency_graph = DependencyGraph(self._fact_index.values(), indexer)
+        self._prerequisites = {}
+
+        self._competencies = OrderedDict()
+        self._competency_fact_counts = Counter()
+        self._competency_facts = FactSet(0, indexer)
+        for competency in competencies:
+            self.add_competency(competency)
+
+        # lesson codes are looked up in unordered index, mapping ordered by publication is rebuilt on demand
+        self._lesson_index = {}
+        self._lessons = None
+        self._lesson_keys = []
+        # type -> (lesson keys, lessons), both sorted; tuples exposed by lessons_by_type are rebuilt on demand
+        self._lesson_type_index = OrderedDict()
+        self._lessons_by_type = {}
+        self._lesson_fact_counts = Counter()
+        self._publication_schedule = PublicationSchedule()
+        for lesson in sorted(lessons, key=self._lesson_key):
+            self.add_lesson(lesson)
+
+    @staticmethod
+    def _lesson_key(lesson):
+        return lesson.publish_at, lesson.code
+
+    @staticmethod
+    def _validate_dependencies(facts):
+        known_codes = frozenset(fact.code for fact in facts)
+        dangling = sorted(
+            "{fact} -> {dependency}".format(fact=fact.code, dependency=dependency)
+            for fact in facts for dependency in fact.dependencies if dependency not in known_codes
+        )
+        if dangling:
+            raise ValueError("Facts depend on unknown fact codes: {0}".format(", ".join(dangling)))
+
+    @staticmethod
+    def _topological_order(facts):
+        """
+        Orders facts so that every fact goes after all its dependencies, keeping registration order where possible
+        :param tuple[knowledge_representation.Fact] facts: facts
+        :rtype: tuple[knowledge_representation.Fact]
+        """
+        unmet_dependencies = {fact.code: len(fact.dependencies) for fact in facts}
+        dependents = {}
+        for fact in facts:
+            for dependency in fact.dependencies:
+                dependents.setdefault(dependency, []).append(fact)
+
+        ordered, ready = [], [fact for fact in facts if not fact.dependencies]
+        while ready:
+            next_ready = []
+            for fact in ready:
+                ordered.append(fact)
+                for dependent in dependents.get(fact.code, ()):
+                    unmet_dependencies[dependent.code] -= 1
+                    if unmet_dependencies[dependent.code] == 0:
+                        next_ready.append(dependent)
+            ready = next_ready
+
+        if len(ordered) != len(facts):
+            cyclic = sorted(code for code, unmet in unmet_dependencies.items() if unmet > 0)
+            raise ValueError("Fact dependencies form a cycle: {0}".format(", ".join(cyclic)))
+        return tuple(ordered)
+
+    @property
+    def indexer(self):
+        """ :rtype: FactIndexer """
+        return self._indexer
+
+    @property
+    def facts(self):
+        """
+        Facts in topological order - every fact goes after all its dependencies
+        :rtype: tuple[knowledge_representation.Fact]
+        """
+        if self._facts is None:
+            self._facts = tuple(self._fact_index.values())
+        return self._facts
+
+    @property
+    def all_facts(self):
+        """ :rtype: FactSet """
+        return self._all_facts
+
+    @property
+    def competency_facts(self):
+        """
+        Facts of all competencies combined
+        :rtype: FactSet
+        """
+        return self._competency_facts
+
+    @property
+    def dependency_graph(self):
+        """ :rtype: DependencyGraph """
+        return self._dependency_graph
+
+    @property
+    def competencies(self):
+        """ :rtype: collections.Mapping[str, knowledge_representation.Competency] """
+        return MappingProxyType(self._competencies)
+
+    @property
+    def lessons(self):
+        """
+        Lessons ordered by publication time
+        :rtype: collections.Mapping[str, BaseLesson]
+        """
+        if self._lessons is None:
+            self._lessons = OrderedDict((code, self._lesson_index[code]) for _, code in self._lesson_keys)
+        return MappingProxyType(self._lessons)
+
+    @property
+    def publication_schedule(self):
+        """ :rtype: PublicationSchedule """
+        return self._publication_schedule
+
+    @property
+    def lessons_by_type(self):
+        """ :rtype: collections.Mapping[type, tuple[BaseLesson]] """
+        if len(self._lessons_by_type) != len(self._lesson_type_index):
+            self._lessons_by_type = OrderedDict(
+                (lesson_type, self._lessons_by_type.get(lesson_type) or tuple(lessons))
+                for lesson_type, (_, lessons) in self._lesson_type_index.items()
+            )
+        return MappingProxyType(self._lessons_by_type)
+
+    def find_fact(self, fact_code):
+        """
+        :param str fact_code: fact code
+        :rtype: knowledge_representation.Fact
+        """
+        return self._fact_index.get(fact_code)
+
+    def lessons_of_type(self, lesson_type):
+        """
+        :param type lesson_type: lesson type, subclasses included
+        :rtype: tuple[BaseLesson]
+        """
+        return tuple(
+            lesson
+            for actual_type, lessons in self.lessons_by_type.items() if issubclass(actual_type, lesson_type)
+            for lesson in lessons
+        )
+
+    def competency_facts_of(self, competency_code):
+        """
+        :param str competency_code: competency code
+        :rtype: FactSet
+        """
+        return self._competencies[competency_code].facts
+
+    def lesson_facts_of(self, lesson_code):
+        """
+        :param str lesson_code: lesson code
+        :rtype: FactSet
+        """
+        return self._lesson_index[lesson_code].facts
+
+    def prerequisites_of(self, fact):
+        """
+        Transitive closure of fact dependencies
+        :param knowledge_representation.Fact fact: fact
+        :rtype: FactSet
+        """
+        prerequisites = self._prerequisites
+        to_resolve = [fact.code]
+        while to_resolve:
+            code = to_resolve[-1]
+            if code in prerequisites:
+                to_resolve.pop()
+                continue
+            current = self._fact_index[code]
+            unresolved = [dependency for dependency in current.dependencies if dependency not in prerequisites]
+            if unresolved:
+                to_resolve.extend(unresolved)
+                continue
+            mask = current.dependencies_mask(self._indexer)
+            for dependency in current.dependencies:
+                mask |= prerequisites[dependency].mask
+            prerequisites[code] = FactSet(mask, self._indexer)
+            to_resolve.pop()
+
+        return prerequisites[fact.code]
+
+    def add_fact(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact, its dependencies should already be in curriculum
+        :raises ValueError: if fact is already in curriculum or depends on unknown fact code
+        """
+        if fact.code in self._fact_index:
+            raise ValueError("{0} is already in curriculum".format(fact))
+        dangling = sorted(dependency for dependency in fact.dependencies if dependency not in self._fact_index)
+        if dangling:
+            raise ValueError("Facts depend on unknown fact codes: {0}".format(", ".join(
+                "{fact} -> {dependency}".format(fact=fact.code, dependency=dependency) for dependency in dangling
+            )))
+        self._fact_index[fact.code] = fact
+        self._facts = None
+        self._all_facts = self._all_facts.with_fact(fact)
+        self._dependency_graph.add_fact(fact)
+
+    def remove_fact(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact
+        :raises ValueError: if fact is not in curriculum or other facts, competencies or lessons refer to it
+        """
+        if fact.code not in self._fact_index:
+            raise ValueError("{0} is not in curriculum".format(fact))
+        fact_index = self._indexer.index_of(fact.code)
+        if self._dependency_graph.dependents_of(fact_index):
+            raise ValueError("Other facts depend on {0}".format(fact))
+        if self._competency_fact_counts[fact_index] or self._lesson_fact_counts[fact_index]:
+            raise ValueError("Competencies or lessons refer to {0}".format(fact))
+        del self._fact_index[fact.code]
+        self._facts = None
+        self._all_facts = FactSet(self._all_facts.mask & ~(1 << fact_index), self._indexer)
+        self._dependency_graph.remove_fact(fact)
+        self._prerequisites.pop(fact.code, None)
+
+    def add_competency(self, competency):
+        """
+        :param knowledge_representation.Competency competency: competency
+        """
+        self._competencies[competency.code] = competency
+        mask = self._competency_facts.mask
+        for fact_index in self._fact_indices(competency.facts):
+            self._competency_fact_counts[fact_index] += 1
+            mask |= 1 << fact_index
+        self._competency_facts = FactSet(mask, self._indexer)
+
+    def remove_competency(self, competency):
+        """
+        :param knowledge_representation.Competency competency: competency
+        """
+        del self._competencies[competency.code]
+        mask = self._competency_facts.mask
+        for fact_index in self._fact_indices(competency.facts):
+            self._competency_fact_counts[fact_index] -= 1
+            if not self._competency_fact_counts[fact_index]:
+                del self._competency_fact_counts[fact_index]
+                mask &= ~(1 << fact_index)
+        self._competency_facts = FactSet(mask, self._indexer)
+
+    def add_lesson(self, lesson):
+        """
+        :param BaseLesson lesson: lesson
+        """
+        key = self._lesson_key(lesson)
+        position = bisect_left(self._lesson_keys, key)
+        self._lesson_keys.insert(position, key)
+        self._lesson_index[lesson.code] = lesson
+        self._lessons = None
+
+        keys, lessons_of_type = self._lesson_type_index.setdefault(type(lesson), ([], []))
+        position = bisect_left(keys, key)
+        keys.insert(position, key)
+        lessons_of_type.insert(position, lesson)
+        self._lessons_by_type.pop(type(lesson), None)
+
+        for fact_index in self._fact_indices(getattr(lesson, 'facts', ())):
+            self._lesson_fact_counts[fact_index] += 1
+        self._publication_schedule.add(lesson)
+
+    def remove_lesson(self, lesson):
+        """
+        :param BaseLesson lesson: lesson
+        """
+        key = self._lesson_key(lesson)
+        del self._lesson_keys[bisect_left(self._lesson_keys, key)]
+        del self._lesson_index[lesson.code]
+        self._lessons = None
+
+        keys, lessons_of_type = self._lesson_type_index[type(lesson)]
+        position = bisect_left(keys, key)
+        del keys[position], lessons_of_type[position]
+        if not keys:
+            del self._lesson_type_index[type(lesson)]
+        self._lessons_by_type.pop(type(lesson), None)
+
+        for fact_index in self._fact_indices(getattr(lesson, 'facts', ())):
+            self._lesson_fact_counts[fact_index] -= 1
+            if not self._lesson_fact_counts[fact_index]:
+                del self._lesson_fact_counts[fact_index]
+        self._publication_schedule.remove(lesson)
+
+    def _fact_indices(self, facts):
+        return self._indexer.indices_of(FactSet.from_facts(facts, self._indexer).mask)
@@ -1,36 +1,178 @@
 import logging
 
+from model.knowledge_representation.compiled_curriculum import CompiledCurriculum
+from model.knowledge_representation.fact_set import FactIndexer
+
 __author__ = 'e.kolpakov'
 
 
+class CurriculumChange:
+    ADDED, REMOVED = 'added', 'removed'
+
+    __slots__ = ('_kind', '_entity')
+
+    def __init__(self, kind, entity):
+        """
+        :param str kind: CurriculumChange.ADDED or CurriculumChange.REMOVED
+        :param Fact|Competency|BaseLesson entity: added or removed entity
+        """
+        self._kind = kind
+        self._entity = entity
+
+    @property
+    def kind(self):
+        """ :rtype: str """
+        return self._kind
+
+    @property
+    def entity(self):
+        """ :rtype: Fact|Competency|BaseLesson """
+        return self._entity
+
+    def __str__(self):
+        return "{entity} {kind}".format(entity=self._entity, kind=self._kind)
+
+
 class Curriculum:
-    def __init__(self):
+    """
+    Facts, competencies and lessons can be added and removed at any time, also while simulation runs. Compiled
+    curriculum is updated incrementally and subscribers are notified about every change.
+    """
+    def __init__(self, fact_indexer=None):
+        """
+        :param FactIndexer|None fact_indexer: indexer assigning bit positions to registered facts, curriculum gets its
+            own by default
+        """
         self._competency_index = {}
         self._fact_index = {}
         self._lesson_index = {}
+        self._fact_indexer = fact_indexer if fact_indexer is not None else FactIndexer()
+        self._compiled = None
+        self._removed_fact_codes = set()
+        self._subscribers = []
+
+    @property
+    def fact_indexer(self):
+        """
+        :rtype: FactIndexer
+        """
+        return self._fact_indexer
+
+    def subscribe(self, subscriber):
+        """
+        :param callable subscriber: called with CurriculumChange after every change
+        """
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """
+        :param callable subscriber: subscriber to remove
+        """
+        self._subscribers.remove(subscriber)
 
     def register_competency(self, competency):
         """
-        Registers competency with curriculum.
+        Registers competency with curriculum. Competency built with other fact indexer is stored as a copy built with
+        curriculum fact indexer - use find_competency to get the registered one.
         :param competency: Competency
         """
+        competency = competency.with_indexer(self._fact_indexer)
         self._register(competency, self._competency_index)
+        if self._compiled is not None:
+            self._compiled.add_competency(competency)
+        self._notify(CurriculumChange.ADDED, competency)
 
     def register_fact(self, fact):
         """
-        Registers fact with curriculum
+        Registers fact with curriculum. Once curriculum is compiled, fact dependencies should be registered first.
         :param fact: Fact
         :return: None
+        :raises ValueError: if fact is already registered or depends on unknown fact code after curriculum is compiled
         """
         self._register(fact, self._fact_index)
+        edited = fact.code in self._removed_fact_codes
+        index = self._fact_indexer.find_index(fact.code)
+        previous = self._fact_indexer.fact_at(index) if index is not None else None
+        if edited:
+            # fact was edited - new version should represent the code from now on
+            self._removed_fact_codes.discard(fact.code)
+            self._fact_indexer.replace(fact)
+        else:
+            self._fact_indexer.register(fact)
+
+        if self._compiled is not None:
+            try:
+                self._compiled.add_fact(fact)
+            except ValueError:
+                # compiled curriculum is left intact - registration is rolled back so curriculum stays valid
+                self._unregister(fact.code, self._fact_index)
+                if previous is not None:
+                    self._fact_indexer.replace(previous)
+                if edited or previous is None:
+                    # rejected fact must not represent the code if it is registered again
+                    self._removed_fact_codes.add(fact.code)
+                raise
+        self._notify(CurriculumChange.ADDED, fact)
 
     def register_lesson(self, lesson):
         """
-        Registers lesson with curriculum
+        Registers lesson with curriculum. Lesson built with other fact indexer is stored as a copy built with
+        curriculum fact indexer - use find_lesson to get the registered one.
         :param Lesson lesson: Lesson to register
         :return: None
         """
+        if hasattr(lesson, 'with_indexer'):
+            lesson = lesson.with_indexer(self._fact_indexer)
         self._register(lesson, self._lesson_index)
+        if self._compiled is not None:
+            self._compiled.add_lesson(lesson)
+        self._notify(CurriculumChange.ADDED, lesson)
+
+    def remove_competency(self, competency_code):
+        """
+        :param str competency_code: competency code
+        :raises ValueError: if competency is not registered
+        """
+        competency = self._unregister(competency_code, self._competency_index)
+        if self._compiled is not None:
+            self._compiled.remove_competency(competency)
+        self._notify(CurriculumChange.REMOVED, competency)
+
+    def remove_fact(self, fact_code):
+        """
+        :param str fact_code: fact code
+        :raises ValueError: if fact is not registered or other facts, competencies or lessons refer to it
+        """
+        fact = self._find(fact_code, self._fact_index)
+        if fact is None:
+            raise ValueError("Fact {0} is not registered".format(fact_code))
+        self.compile().remove_fact(fact)
+        self._unregister(fact_code, self._fact_index)
+        self._removed_fact_codes.add(fact_code)
+        self._notify(CurriculumChange.REMOVED, fact)
+
+    def remove_lesson(self, lesson_code):
+        """
+        :param str lesson_code: lesson code
+        :raises ValueError: if lesson is not registered
+        """
+        lesson = self._unregister(lesson_code, self._lesson_index)
+        if self._compiled is not None:
+            self._compiled.remove_lesson(lesson)
+        self._notify(CurriculumChange.REMOVED, lesson)
+
+    def compile(self):
+        """
+        Validates curriculum and builds CompiledCurriculum. Result is kept up to date as curriculum changes.
+        :rtype: CompiledCurriculum
+        :raises ValueError: if fact depends on unknown fact code or fact dependencies form a cycle
+        """
+        if self._compiled is None:
+            self._compiled = CompiledCurriculum(
+                self._fact_index.values(), self._competency_index.values(), self._lesson_index.values(),
+                self._fact_indexer
+            )
+        return self._compiled
 
     def find_competency(self, competency_code):
         """
@@ -85,6 +227,20 @@ class Curriculum:
 
         index[code] = entity
 
+    @staticmethod
+    def _unregister(code, index):
+        entity = index.pop(code, None)
+        if entity is None:
+            message = "{0} is not registered".format(code)
+            logging.getLogger(__name__).warn(message)
+            raise ValueError(message)
+        return entity
+
+    def _notify(self, kind, entity):
+        change = CurriculumChange(kind, entity)
+        for subscriber in tuple(self._subscribers):
+            subscriber(change)
+
     @staticmethod
     def _find(code, index, default=None):
         """
@@ -0,0 +1,142 @@
+from model.knowledge_representation.fact_set import FactIndexer, FactSet
+
+
+__author__ = 'e.kolpakov'
+
+
+class DependencyGraph:
+    """
+    Dependency graph over a collection of facts with reverse (fact -> dependents) index.
+    Facts that become available given some prior knowledge are found by propagating availability from facts with
+    no unmet dependencies to their dependents, so a single query is O(facts + dependency edges).
+    Facts can be added and removed, at a cost proportional to the number of their dependencies.
+    """
+    def __init__(self, facts, indexer=None):
+        """
+        :param collections.Iterable[knowledge_representation.Fact] facts: facts in graph
+        :param FactIndexer|None indexer: indexer to build masks with, private one by default
+        """
+        self._indexer = indexer if indexer is not None else FactIndexer()
+        # removed facts leave None in their position, so positions of other facts stay valid
+        self._fact_indices = []
+        self._dependency_indices = []
+        self._positions = {}
+        self._dependents = {}
+
+        for fact in facts:
+            fact_index = self._indexer.register(fact)
+            if fact_index not in self._positions:
+                self._append(fact_index, fact)
+
+        self._mask = self._indexer.mask_of_indices(self._positions)
+
+    def _append(self, fact_index, fact):
+        position = len(self._fact_indices)
+        self._positions[fact_index] = position
+        self._fact_indices.append(fact_index)
+        # dependencies are taken from given fact objects - facts with the same code are not guaranteed to be equal
+        dependency_indices = tuple(self._indexer.index_of(code) for code in fact.dependencies)
+        self._dependency_indices.append(dependency_indices)
+        for dependency_index in dependency_indices:
+            self._dependents.setdefault(dependency_index, []).append(position)
+
+    @property
+    def indexer(self):
+        """ :rtype: FactIndexer """
+        return self._indexer
+
+    @property
+    def facts(self):
+        """ :rtype: FactSet """
+        return FactSet(self._mask, self._indexer)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add_fact(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact to add, ignored if fact with the same code is in graph
+        """
+        fact_index = self._indexer.register(fact)
+        if fact_index in self._positions:
+            return
+        self._append(fact_index, fact)
+        self._mask |= 1 << fact_index
+
+    def remove_fact(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact to remove, ignored if not in graph
+        """
+        fact_index = self._indexer.find_index(fact.code)
+        position = self._positions.pop(fact_index, None)
+        if position is None:
+            return
+        for dependency_index in self._dependency_indices[position]:
+            self._dependents[dependency_index].remove(position)
+        self._fact_indices[position] = None
+        self._dependency_indices[position] = ()
+        self._mask &= ~(1 << fact_index)
+
+    def dependencies_of(self, fact_index):
+        """
+        Lists indices of direct dependencies of fact in graph
+        :param int fact_index: fact index
+        :rtype: tuple[int]|None
+        :return: None if fact is not in graph
+        """
+        position = self._positions.get(fact_index)
+        return self._dependency_indices[position] if position is not None else None
+
+    def dependents_of(self, fact_index):
+        """
+        Lists indices of facts in graph directly depending on given fact
+        :param int fact_index: fact index
+        :rtype: tuple[int]
+        """
+        fact_indices = self._fact_indices
+        return tuple(fact_indices[position] for position in self._dependents.get(fact_index, ()))
+
+    def available_facts(self, known_facts):
+        """
+        Finds facts in graph that can be learnt given known facts, including ones that depend on other facts in graph
+        :param FactSet|collections.Iterable[knowledge_representation.Fact] known_facts: known facts
+        :rtype: FactSet
+        """
+        known_mask = FactSet.from_facts(known_facts, self._indexer).mask
+        # testing single bit of a large integer is linear in its size, testing a byte is not
+        known_bits = known_mask.to_bytes((known_mask.bit_length() + 7) >> 3, 'little')
+        known_limit = len(known_bits) << 3
+        fact_indices, dependency_indices = self._fact_indices, self._dependency_indices
+
+        unmet_dependencies, ready = {}, []
+        for position, fact_index in enumerate(fact_indices):
+            if fact_index is None:
+                continue
+            if fact_index < known_limit and known_bits[fact_index >> 3] >> (fact_index & 7) & 1:
+                continue
+            missing = sum(
+                1 for index in dependency_indices[position]
+                if index >= known_limit or not known_bits[index >> 3] >> (index & 7) & 1
+            )
+            if missing:
+                unmet_dependencies[position] = missing
+            else:
+                ready.append(position)
+
+        available = []
+        dependents = self._dependents
+        while ready:
+            position = ready.pop()
+            fact_index = fact_indices[position]
+            available.append(fact_index)
+            for dependent in dependents.get(fact_index, ()):
+                remaining = unmet_dependencies.get(dependent)
+                if remaining is None:
+                    continue
+                if remaining == 1:
+                    del unmet_dependencies[dependent]
+                    ready.append(dependent)
+                else:
+                    unmet_dependencies[dependent] = remaining - 1
+
+        return FactSet(self._indexer.mask_of_indices(available), self._indexer)
@@ -1,7 +1,12 @@
+from model.knowledge_representation.fact_set import FactSet
+
+
 __author__ = 'e.kolpakov'
 
 
 class Fact:
+    __slots__ = ('_code', '_complexity', '_dependencies', '_dependencies_mask', '_hash')
+
     def __init__(self, code, dependencies=None, complexity=1.0):
         """
         :param code: str
@@ -10,6 +15,8 @@ class Fact:
         self._code = code
         self._complexity = complexity
         self._dependencies = frozenset(dependencies if dependencies else [])
+        self._dependencies_mask = None
+        self._hash = hash(code)
 
     @property
     def code(self):
@@ -25,14 +32,26 @@ class Fact:
     def dependencies(self):
         return self._dependencies
 
+    def dependencies_mask(self, indexer):
+        """
+        :param FactIndexer indexer: indexer to build mask with
+        :rtype: int
+        """
+        if self._dependencies_mask is None or self._dependencies_mask[0] is not indexer:
+            self._dependencies_mask = (indexer, indexer.codes_mask(self._dependencies))
+        return self._dependencies_mask[1]
+
     def is_available(self, known_facts):
         """
-        :type known_facts: frozenset[Fact]
+        :type known_facts: FactSet | frozenset[Fact]
         """
-        return set(fact.code for fact in known_facts) >= self._dependencies
+        if not isinstance(known_facts, FactSet):
+            known_facts = FactSet.from_facts(known_facts)
+        dependencies_mask = self.dependencies_mask(known_facts.indexer)
+        return known_facts.mask & dependencies_mask == dependencies_mask
 
     def __hash__(self):
-        return hash(self.code)
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other, Fact) and self.code == other.code
@@ -45,13 +64,17 @@ class Fact:
 
 
 class Competency:
-    def __init__(self, code, facts):
+    __slots__ = ('_code', '_facts', '_hash')
+
+    def __init__(self, code, facts, indexer=None):
         """
         :type code: str
         :type facts: list[knowledge_representation.fact.Fact]
+        :param FactIndexer|None indexer: fact indexer of the curriculum
         """
         self._code = code
-        self._facts = frozenset(facts)
+        self._facts = FactSet.from_facts(facts, indexer)
+        self._hash = hash(code)
 
     @property
     def code(self):
@@ -63,20 +86,35 @@ class Competency:
     @property
     def facts(self):
         """
-        :rtype: frozenset[knowledge_representation.fact.Fact]
+        :rtype: FactSet
         """
         return self._facts
 
+    def with_indexer(self, indexer):
+        """
+        Competency with facts built with curriculum fact indexer, so operations with knowledge of students are bit
+        operations. Competencies are immutable - a new one is built unless facts already use the indexer.
+        :param FactIndexer indexer: fact indexer
+        :rtype: Competency
+        """
+        if self._facts.indexer is indexer:
+            return self
+        return type(self)(self._code, self._facts, indexer)
+
     def is_mastered(self, fact_set):
-        return set(fact_set) >= self._facts
+        """
+        :param FactSet|frozenset[Fact] fact_set: known facts
+        :rtype: bool
+        """
+        return FactSet.from_facts(fact_set, self._facts.indexer) >= self._facts
 
     def mastered_ratio(self, knowledge):
         """
         Calculates known facts to all facts ratio as number in interval [0, 1]
-        :param knowledge: set[Fact] | frozenset[Fact]
+        :param knowledge: FactSet | set[Fact] | frozenset[Fact]
         :return: double
         """
-        return len(knowledge & self._facts) / len(self._facts)
+        return len(self._facts & knowledge) / len(self._facts)
 
     def __str__(self):
         return self.code
@@ -94,4 +132,4 @@ class Competency:
         return self.code in other.dependencies
 
     def __hash__(self):
-        return hash(self.code)
\ No newline at end of file
+        return self._hash
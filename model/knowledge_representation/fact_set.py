@@ -0,0 +1,338 @@
+from collections.abc import Set
+
+
+__author__ = 'e.kolpakov'
+
+
+def popcount(mask):
+    """
+    Counts set bits in non-negative integer
+    :param int mask: bitmask
+    :rtype: int
+    """
+    return bin(mask).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+
+
+class FactIndexer:
+    """
+    Assigns dense integer indices to fact codes, so sets of facts can be represented as integer bitmasks.
+    Indices are never reassigned, so masks built with the same indexer stay valid as new facts are registered.
+    Every curriculum has its own indexer: facts of different curricula sharing a code never mix.
+    """
+    def __init__(self):
+        self._code_index = {}
+        self._facts = []
+
+    def __len__(self):
+        return len(self._facts)
+
+    def index_of(self, code):
+        """
+        Gets index of fact code, assigning next free index to codes seen for the first time
+        :param str code: fact code
+        :rtype: int
+        """
+        index = self._code_index.get(code)
+        if index is None:
+            index = len(self._facts)
+            self._code_index[code] = index
+            self._facts.append(None)
+        return index
+
+    def find_index(self, code):
+        """
+        Gets index of fact code without registering it
+        :param str code: fact code
+        :rtype: int | None
+        """
+        return self._code_index.get(code)
+
+    def find_fact_index(self, fact):
+        """
+        Gets index of fact without registering it
+        :param knowledge_representation.Fact fact: fact, items that are not facts are never found
+        :rtype: int | None
+        """
+        index = self._code_index.get(getattr(fact, 'code', None))
+        if index is None or self._facts[index] != fact:
+            return None
+        return index
+
+    def register(self, fact):
+        """
+        Registers fact with indexer. First fact registered with a code is used to represent that code in fact sets.
+        :param knowledge_representation.Fact fact: fact to register
+        :rtype: int
+        """
+        index = self.index_of(fact.code)
+        if self._facts[index] is None:
+            self._facts[index] = fact
+        return index
+
+    def replace(self, fact):
+        """
+        Makes fact represent its code in fact sets, e.g. when fact is edited
+        :param knowledge_representation.Fact fact: fact
+        :rtype: int
+        """
+        index = self.index_of(fact.code)
+        self._facts[index] = fact
+        return index
+
+    def fact_at(self, index):
+        """
+        :param int index: fact index
+        :rtype: knowledge_representation.Fact
+        """
+        return self._facts[index]
+
+    def mask_of(self, facts):
+        """
+        Builds bitmask for facts, registering unknown facts on the way
+        :param collections.Iterable[knowledge_representation.Fact] facts: facts
+        :rtype: int
+        """
+        return self.mask_of_indices(self.register(fact) for fact in facts)
+
+    def find_mask(self, facts):
+        """
+        Builds bitmask for facts known to indexer without registering anything
+        :param collections.Iterable facts: facts, items that are not known facts are left out of the mask
+        :return: bitmask and number of items left out
+        :rtype: tuple[int, int]
+        """
+        indices, missing = [], 0
+        for fact in facts:
+            index = self.find_fact_index(fact)
+            if index is None:
+                missing += 1
+            else:
+                indices.append(index)
+        return self.mask_of_indices(indices), missing
+
+    def codes_mask(self, codes):
+        """
+        Builds bitmask for fact codes
+        :param collections.Iterable[str] codes: fact codes
+        :rtype: int
+        """
+        return self.mask_of_indices(self.index_of(code) for code in codes)
+
+    def indices_of(self, mask):
+        """
+        Lists indices of set bits in ascending order
+        :param int mask: bitmask
+        :rtype: collections.Iterable[int]
+        """
+        bits = bin(mask)[:1:-1]
+        position = bits.find('1')
+        while position >= 0:
+            yield position
+            position = bits.find('1', position + 1)
+
+    def facts_of(self, mask):
+        """
+        Lists facts for bitmask in index order
+        :param int mask: bitmask
+        :rtype: collections.Iterable[knowledge_representation.Fact]
+        """
+        facts = self._facts
+        return (facts[index] for index in self.indices_of(mask))
+
+    @staticmethod
+    def mask_of_indices(indices):
+        """
+        Builds bitmask with given bits set
+        :param collections.Iterable[int] indices: bit indices
+        :rtype: int
+        """
+        # setting bits one by one reallocates the whole integer on every step - byte buffer is linear instead
+        indices = list(indices)
+        if not indices:
+            return 0
+        buffer = bytearray((max(indices) >> 3) + 1)
+        for index in indices:
+            buffer[index >> 3] |= 1 << (index & 7)
+        return int.from_bytes(bytes(buffer), 'little')
+
+
+class FactSet(Set):
+    """
+    Immutable set of facts backed by integer bitmask. Set operations between fact sets sharing an indexer are
+    performed as word-level bit operations; any other iterable of facts is converted to a mask first.
+    Fact sets built without an indexer get a private one. Comparisons and intersections only look facts up, so facts
+    unknown to the indexer (and items that are not facts) are treated as absent rather than registered.
+    """
+    __slots__ = ('_mask', '_indexer', '_hash', '__weakref__')
+
+    def __init__(self, mask=0, indexer=None):
+        """
+        :param int mask: bitmask of fact indices
+        :param FactIndexer|None indexer: indexer mask is built with, only empty set can be built without one
+        """
+        if indexer is None:
+            if mask:
+                raise ValueError("Fact indexer expected for non-empty fact set")
+            indexer = FactIndexer()
+        self._mask = mask
+        self._indexer = indexer
+        self._hash = None
+
+    @classmethod
+    def from_facts(cls, facts, indexer=None):
+        """
+        :param collections.Iterable[knowledge_representation.Fact] facts: facts
+        :param FactIndexer|None indexer: indexer to use, fact set keeps its own indexer and other facts get a private
+            one by default
+        :rtype: FactSet
+        """
+        if indexer is None:
+            if isinstance(facts, FactSet):
+                return facts
+            indexer = FactIndexer()
+        if isinstance(facts, FactSet) and facts._indexer is indexer:
+            return facts
+        return cls(indexer.mask_of(facts), indexer)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return cls.from_facts(iterable)
+
+    @property
+    def mask(self):
+        """ :rtype: int """
+        return self._mask
+
+    @property
+    def indexer(self):
+        """ :rtype: FactIndexer """
+        return self._indexer
+
+    def mask_of(self, facts):
+        """
+        Converts facts to bitmask compatible with this set
+        :param collections.Iterable[knowledge_representation.Fact] facts: facts
+        :rtype: int
+        """
+        if isinstance(facts, FactSet) and facts._indexer is self._indexer:
+            return facts._mask
+        return self._indexer.mask_of(facts)
+
+    def _find_mask(self, facts):
+        """
+        Converts facts to bitmask compatible with this set without registering them
+        :param collections.Iterable facts: facts
+        :return: bitmask and number of items not known to indexer
+        :rtype: tuple[int, int]
+        """
+        if isinstance(facts, FactSet) and facts._indexer is self._indexer:
+            return facts._mask, 0
+        return self._indexer.find_mask(facts)
+
+    def with_fact(self, fact):
+        """
+        :param knowledge_representation.Fact fact: fact to add
+        :rtype: FactSet
+        """
+        return type(self)(self._mask | (1 << self._indexer.register(fact)), self._indexer)
+
+    def with_facts(self, facts):
+        """
+        :param collections.Iterable[knowledge_representation.Fact] facts: facts to add
+        :rtype: FactSet
+        """
+        return type(self)(self._mask | self.mask_of(facts), self._indexer)
+
+    def __contains__(self, fact):
+        index = self._indexer.find_fact_index(fact)
+        return index is not None and bool(self._mask >> index & 1)
+
+    def __iter__(self):
+        return self._indexer.facts_of(self._mask)
+
+    def __len__(self):
+        return popcount(self._mask)
+
+    def __bool__(self):
+        return self._mask != 0
+
+    def __and__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return type(self)(self._mask & self._find_mask(other)[0], self._indexer)
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        if not self._mask and isinstance(other, FactSet):
+            # union built up from an empty set keeps indexer of the added facts
+            return other
+        return type(self)(self._mask | self.mask_of(other), self._indexer)
+
+    __ror__ = __or__
+
+    def __xor__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return type(self)(self._mask ^ self.mask_of(other), self._indexer)
+
+    __rxor__ = __xor__
+
+    def __sub__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return type(self)(self._mask & ~self._find_mask(other)[0], self._indexer)
+
+    def __rsub__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return type(self)(self.mask_of(other) & ~self._mask, self._indexer)
+
+    def __le__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._mask & ~self._find_mask(other)[0] == 0
+
+    def __ge__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        other_mask, missing = self._find_mask(other)
+        return not missing and self._mask & other_mask == other_mask
+
+    def __lt__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        other_mask, missing = self._find_mask(other)
+        return bool(missing or self._mask != other_mask) and self._mask & ~other_mask == 0
+
+    def __gt__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        other_mask, missing = self._find_mask(other)
+        return not missing and self._mask != other_mask and self._mask & other_mask == other_mask
+
+    def __eq__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        other_mask, missing = self._find_mask(other)
+        return not missing and self._mask == other_mask
+
+    def isdisjoint(self, other):
+        return self._mask & self._find_mask(other)[0] == 0
+
+    def __hash__(self):
+        # fact sets are equal to any set with the same facts, so the hash has to match frozenset hash
+        if self._hash is None:
+            self._hash = self._hash_facts()
+        return self._hash
+
+    _hash_facts = Set._hash
+
+    def __repr__(self):
+        return "FactSet({{{facts}}})".format(facts=", ".join(str(fact) for fact in self))
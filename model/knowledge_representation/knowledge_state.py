@@ -0,0 +1,223 @@
+from collections import OrderedDict
+from weakref import WeakValueDictionary
+
+from model.knowledge_representation.dependency_graph import DependencyGraph
+from model.knowledge_representation.fact import Fact
+from model.knowledge_representation.fact_set import FactSet
+
+
+__author__ = 'e.kolpakov'
+
+
+class LRUCache:
+    """
+    Bounded mapping evicting least recently used entries
+    """
+    def __init__(self, max_size):
+        """
+        :param int max_size: maximum number of entries
+        """
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits, self.misses = 0, 0
+
+
+class LessonTransition:
+    """
+    Quantities derived from taking a lesson in a given knowledge state. Computed on first access.
+    """
+    __slots__ = ('_table', '_state', '_lesson', '_facts_to_acquire', '_resulting_state', '_known_count')
+
+    def __init__(self, table, state, lesson):
+        """
+        :param KnowledgeStateTable table: owning table
+        :param FactSet state: knowledge state
+        :param BaseLesson lesson: lesson
+        """
+        self._table = table
+        self._state = state
+        self._lesson = lesson
+        self._facts_to_acquire = None
+        self._resulting_state = None
+        self._known_count = None
+
+    @property
+    def facts_to_acquire(self):
+        """
+        Lesson facts that can be learnt in this state, including ones depending on other lesson facts
+        :rtype: FactSet
+        """
+        if self._facts_to_acquire is None:
+            self._facts_to_acquire = self._table.available_facts(self._lesson.facts, self._state)
+        return self._facts_to_acquire
+
+    @property
+    def resulting_state(self):
+        """
+        Knowledge state after all acquirable facts are learnt
+        :rtype: FactSet
+        """
+        if self._resulting_state is None:
+            self._resulting_state = self._table.intern(self._state | self.facts_to_acquire)
+        return self._resulting_state
+
+    @property
+    def known_count(self):
+        """
+        Number of lesson facts known in this state
+        :rtype: int
+        """
+        if self._known_count is None:
+            self._known_count = len(self._state & self._lesson.facts)
+        return self._known_count
+
+    @property
+    def known_ratio(self):
+        """
+        Share of lesson facts known in this state
+        :rtype: float
+        """
+        return self.known_count / float(len(self._lesson.facts))
+
+
+class KnowledgeStateTable:
+    """
+    Interns knowledge states - students with the same knowledge share single immutable FactSet - and memoizes
+    transitions between them, so students of a homogeneous cohort walking the same path hit dictionaries instead of
+    recomputing dependency closures. Every simulation has its own table.
+    Lesson transitions are keyed by lesson identity, so a lesson replaced by another one with the same code is never
+    served transitions of its predecessor. Memos derived from fact dependencies are dropped when curriculum facts
+    change - see on_curriculum_change.
+    """
+    def __init__(self, max_transitions=100000, max_dependency_graphs=1024):
+        """
+        :param int max_transitions: maximum number of memoized transitions of each kind
+        :param int max_dependency_graphs: maximum number of memoized dependency graphs of lessons and resources
+        """
+        self._states = WeakValueDictionary()
+        self._lesson_transitions = LRUCache(max_transitions)
+        self._fact_transitions = LRUCache(max_transitions)
+        self._available_facts = LRUCache(max_transitions)
+        self._dependency_graphs = LRUCache(max_dependency_graphs)
+
+    @property
+    def lesson_transitions(self):
+        """ :rtype: LRUCache """
+        return self._lesson_transitions
+
+    def intern(self, state):
+        """
+        Gets shared instance of knowledge state
+        :param FactSet state: knowledge state
+        :rtype: FactSet
+        """
+        key = (state.indexer, state.mask)
+        interned = self._states.get(key)
+        if interned is None:
+            self._states[key] = interned = state
+        return interned
+
+    def with_fact(self, state, fact):
+        """
+        Gets knowledge state with fact added
+        :param FactSet state: knowledge state
+        :param knowledge_representation.Fact fact: fact to add
+        :rtype: FactSet
+        """
+        key = (state, fact)
+        result = self._fact_transitions.get(key)
+        if result is None:
+            result = self.intern(state.with_fact(fact))
+            self._fact_transitions.put(key, result)
+        return result
+
+    def transition(self, state, lesson):
+        """
+        Gets memoized lesson transition from knowledge state
+        :param FactSet state: knowledge state
+        :param BaseLesson lesson: lesson
+        :rtype: LessonTransition
+        """
+        # lessons are equal by code - cached transition keeps its lesson alive, so its id is not reused meanwhile
+        key = (state, id(lesson))
+        result = self._lesson_transitions.get(key)
+        if result is None:
+            result = LessonTransition(self, state, lesson)
+            self._lesson_transitions.put(key, result)
+        return result
+
+    def available_facts(self, facts, state):
+        """
+        Finds facts that can be learnt in knowledge state. Memoized if facts are given as FactSet.
+        :param FactSet|collections.Iterable[knowledge_representation.Fact] facts: facts to learn
+        :param FactSet|collections.Iterable[knowledge_representation.Fact] state: knowledge state
+        :rtype: FactSet
+        """
+        if not isinstance(facts, FactSet):
+            return DependencyGraph(facts).available_facts(state)
+        if not isinstance(state, FactSet):
+            state = FactSet.from_facts(state, facts.indexer)
+
+        key = (facts, state)
+        result = self._available_facts.get(key)
+        if result is None:
+            result = self._get_dependency_graph(facts).available_facts(state)
+            self._available_facts.put(key, result)
+        return result
+
+    def on_curriculum_change(self, change):
+        """
+        Drops memos derived from fact dependencies when a fact is added or removed, e.g. edited. Lesson changes need
+        no invalidation as lesson transitions are keyed by lesson identity.
+        :param CurriculumChange change: curriculum change
+        """
+        if isinstance(change.entity, Fact):
+            self._lesson_transitions.clear()
+            self._available_facts.clear()
+            self._dependency_graphs.clear()
+
+    def clear(self):
+        self._lesson_transitions.clear()
+        self._fact_transitions.clear()
+        self._available_facts.clear()
+        self._dependency_graphs.clear()
+
+    def _get_dependency_graph(self, facts):
+        """
+        Lessons and resources expose the same fact sets over and over - their graphs are reused
+        :param FactSet facts: facts
+        :rtype: DependencyGraph
+        """
+        graph = self._dependency_graphs.get(facts)
+        if graph is None:
+            graph = DependencyGraph(facts, facts.indexer)
+            self._dependency_graphs.put(facts, graph)
+        return graph
@@ -1,23 +1,26 @@
 from abc import ABCMeta, abstractmethod
-from collections import defaultdict
-import logging
-
-from lazy import lazy
+from bisect import bisect_right
+from copy import copy
+from itertools import accumulate
 
 from model.infrastructure import INFINITY
+from model.knowledge_representation.fact_set import FactSet
 
 
 __author__ = 'e.kolpakov'
 
 
 class BaseLesson(metaclass=ABCMeta):
+    """
+    Lessons are immutable value objects compared by type and code, so their hash is computed once
+    """
+    __slots__ = ('_code', '_name', '_publish_at', '_hash')
+
     def __init__(self, code, publish_at=0, name=None, **kwargs):
         self._code = code
-
-        self.name = name
-        self.publish_at = publish_at
-
-        self._logger = logging.getLogger(__name__)
+        self._name = name
+        self._publish_at = publish_at
+        self._hash = hash((code, type(self)))
 
         # noinspection PyArgumentList
         super(BaseLesson, self).__init__(**kwargs)
@@ -29,6 +32,20 @@ class BaseLesson(metaclass=ABCMeta):
         """
         return self._code
 
+    @property
+    def name(self):
+        """
+        :rtype: str|None
+        """
+        return self._name
+
+    @property
+    def publish_at(self):
+        """
+        :rtype: float
+        """
+        return self._publish_at
+
     def __lt__(self, other):
         """
         :param other:
@@ -45,21 +62,11 @@ class BaseLesson(metaclass=ABCMeta):
         return isinstance(other, type(self)) and self.code == other.code
 
     def __hash__(self):
-        return hash((self.code, type(self)))
-
-    @lazy
-    def _format_template(self):
-        return "{type} {code}" + " ({name})" if self.name else ""
-
-    @lazy
-    def _get_format_parameters(self):
-        result = {'type': type(self).__name__, 'code': self.code}
-        if self.name:
-            result['name'] = self.name
-        return result
+        return self._hash
 
     def __str__(self):
-        return self._format_template.format(**self._get_format_parameters)
+        template = "{type} {code} ({name})" if self.name else "{type} {code}"
+        return template.format(type=type(self).__name__, code=self.code, name=self.name)
 
     def __unicode__(self):
         return self.__str__()
@@ -70,54 +77,113 @@ class BaseLesson(metaclass=ABCMeta):
 
 
 class FactBasedLessonMixin:
-    def __init__(self, facts=None, **kwargs):
+    """
+    Concrete lessons declare _facts and _total_complexity slots: only one base of a class can define slot layout
+    """
+    __slots__ = ()
+
+    def __init__(self, facts=None, indexer=None, **kwargs):
+        """
+        :param FactIndexer|None indexer: fact indexer of the curriculum
+        """
         # noinspection PyArgumentList
         super(FactBasedLessonMixin, self).__init__(**kwargs)
-        self._facts = facts if facts else {}
+        self._facts = FactSet.from_facts(facts if facts else (), indexer)
+        self._total_complexity = sum(fact.complexity for fact in self._facts)
 
     @property
     def facts(self):
         """
-        :rtype: tuple[knowledge_representation.Fact]
+        :rtype: FactSet
         """
-        return frozenset(self._facts)
+        return self._facts
 
-    @property
-    def total_complexity(self):
-        return sum(fact.complexity for fact in self.facts)
+    def with_indexer(self, indexer):
+        """
+        Lesson with facts built with curriculum fact indexer, so operations with knowledge of students are bit
+        operations. Lessons are immutable - a copy is built unless facts already use the indexer.
+        :param FactIndexer indexer: fact indexer
+        :rtype: BaseLesson
+        """
+        if self._facts.indexer is indexer:
+            return self
+        lesson = copy(self)
+        lesson._rebuild_facts(indexer)
+        return lesson
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.facts == other.facts
+    def _rebuild_facts(self, indexer):
+        """
+        Only called on fresh copies, before they are handed out
+        :param FactIndexer indexer: fact indexer
+        """
+        self._facts = FactSet.from_facts(self._facts, indexer)
 
-    def __hash__(self):
-        return super(FactBasedLessonMixin, self).__hash__() * 31 + hash(self.facts)
+    @property
+    def total_complexity(self):
+        """
+        :rtype: float
+        """
+        return self._total_complexity
 
 
 class Lecture(BaseLesson, FactBasedLessonMixin):
+    __slots__ = ('_facts', '_total_complexity')
+
     def take(self, student, until=INFINITY):
         """
-        Student learns all facts available in lecture
+        Student learns all facts available in lecture. Lecture interrupted by lack of time is resumed from the first
+        fact not studied yet when taken next time.
         :param Student student:
         :param float|None until: upper time bound for activity
         :return: True if had enough time to study all the facts, False otherwise
         """
-        knowledge_to_acquire = student.behavior.knowledge_acquisition.acquire_facts(student, self)
-        for fact in knowledge_to_acquire:
+        lecture_progress = student.lecture_progress
+        cursor = lecture_progress.cursor(self)
+        if cursor is None:
+            knowledge_to_acquire = student.behavior.knowledge_acquisition.acquire_facts(student, self)
+            cursor = lecture_progress.start(self, knowledge_to_acquire)
+
+        if student.coalesced_study:
+            yield from student.study_facts(cursor, until)
+            if not cursor.is_complete:
+                return False
+
+        fact = cursor.next_fact()
+        while fact is not None:
             success = yield from student.study_fact(fact, until)
             if not success:
                 return False
+            cursor.advance()
+            fact = cursor.next_fact()
 
+        lecture_progress.complete(self)
         return True
 
 
 class Exam(BaseLesson, FactBasedLessonMixin):
-    def __init__(self, code, allowed_time=INFINITY, weight=1.0, pass_threshold=0.8, *args, **kwargs):
+    __slots__ = (
+        '_facts', '_total_complexity', '_weight', '_pass_threshold', '_allowed_time', '_batch_grading',
+        '_cumulative_complexity'
+    )
+
+    def __init__(
+            self, code, allowed_time=INFINITY, weight=1.0, pass_threshold=0.8, batch_grading=True, *args, **kwargs
+    ):
+        """
+        :param bool batch_grading: check all facts within single simulation event instead of an event per fact, every
+            fact is still graded against knowledge retained by the time it would be checked
+        """
         super(Exam, self).__init__(code, *args, **kwargs)
         self._weight = weight
         self._pass_threshold = pass_threshold
         self._allowed_time = allowed_time
+        self._batch_grading = batch_grading
+        self._cumulative_complexity = tuple(accumulate(fact.complexity for fact in self._facts))
 
-        self._exam_attempts = defaultdict(int)
+    def _rebuild_facts(self, indexer):
+        super(Exam, self)._rebuild_facts(indexer)
+        # facts are checked in index order, which differs between indexers
+        self._cumulative_complexity = tuple(accumulate(fact.complexity for fact in self._facts))
 
     @property
     def weight(self):
@@ -131,6 +197,18 @@ class Exam(BaseLesson, FactBasedLessonMixin):
     def allowed_time(self):
         return self._allowed_time
 
+    @property
+    def batch_grading(self):
+        return self._batch_grading
+
+    def facts_checked_within(self, complexity):
+        """
+        Number of exam facts, in order, that can be checked within given total complexity
+        :param float complexity: complexity budget
+        :rtype: int
+        """
+        return bisect_right(self._cumulative_complexity, complexity)
+
     def take(self, student, until=INFINITY):
         """
         Student checks all facts available in exam
@@ -141,25 +219,51 @@ class Exam(BaseLesson, FactBasedLessonMixin):
         attempt_start = student.env.now
         complete_until = attempt_start + self.allowed_time
         stop_attempt_at = min(until, complete_until)
-        self._exam_attempts[student] += 1
+        attempt_number = student.register_exam_attempt(self)
 
         knows, total = 0, float(len(self.facts))
-        for fact in self.facts:
-            knows_fact = yield from student.check_fact(fact, stop_attempt_at)
-            if knows_fact:
-                knows += 1
+        if self._batch_grading:
+            knows = yield from student.check_exam_facts(self, stop_attempt_at)
+        else:
+            for fact in self.facts:
+                knows_fact = yield from student.check_fact(fact, stop_attempt_at)
+                if knows_fact:
+                    knows += 1
 
         ratio = knows / total
-        return ExamFeedback(self, ratio, ratio >= self.pass_threshold, self._exam_attempts[student])
+        return ExamFeedback(self, ratio, ratio >= self.pass_threshold, attempt_number)
 
 
 class ExamFeedback:
+    __slots__ = ('_exam', '_grade', '_passed', '_attempt_number', '_feedback')
+
     def __init__(self, exam, grade, passed, attempt_number, feedback=None):
-        self.exam = exam
-        self.grade = grade
-        self.passed = passed
-        self.attempt_number = attempt_number
-        self.feedback = feedback
+        self._exam = exam
+        self._grade = grade
+        self._passed = passed
+        self._attempt_number = attempt_number
+        self._feedback = feedback
 
+    @property
+    def exam(self):
+        """ :rtype: Exam """
+        return self._exam
 
+    @property
+    def grade(self):
+        """ :rtype: float """
+        return self._grade
 
+    @property
+    def passed(self):
+        """ :rtype: bool """
+        return self._passed
+
+    @property
+    def attempt_number(self):
+        """ :rtype: int """
+        return self._attempt_number
+
+    @property
+    def feedback(self):
+        return self._feedback
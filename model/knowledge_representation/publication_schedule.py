@@ -0,0 +1,87 @@
+from bisect import bisect_left, bisect_right
+
+from model.infrastructure import INFINITY
+
+
+__author__ = 'e.kolpakov'
+
+
+class PublicationSchedule:
+    """
+    Lessons indexed by publication time. Lessons published by any given time form a prefix of the schedule, so
+    newly published lessons are found by bisecting publication times instead of scanning all lessons.
+    Lessons can be added and removed at any time, each change costs a bisection and a list insert or delete.
+    """
+    def __init__(self, lessons=()):
+        """
+        :param collections.Iterable[BaseLesson] lessons: lessons
+        """
+        self._lessons = sorted(lessons, key=lambda lesson: lesson.publish_at)
+        self._publish_times = [lesson.publish_at for lesson in self._lessons]
+
+    @property
+    def lessons(self):
+        """
+        Lessons ordered by publication time
+        :rtype: tuple[BaseLesson]
+        """
+        return tuple(self._lessons)
+
+    def add(self, lesson):
+        """
+        :param BaseLesson lesson: lesson to add, goes after lessons published at the same time
+        """
+        position = bisect_right(self._publish_times, lesson.publish_at)
+        self._lessons.insert(position, lesson)
+        self._publish_times.insert(position, lesson.publish_at)
+
+    def remove(self, lesson):
+        """
+        :param BaseLesson lesson: lesson to remove
+        :raises ValueError: if lesson is not in schedule
+        """
+        start = bisect_left(self._publish_times, lesson.publish_at)
+        stop = bisect_right(self._publish_times, lesson.publish_at)
+        for position in range(start, stop):
+            if self._lessons[position] is lesson:
+                del self._lessons[position]
+                del self._publish_times[position]
+                return
+        raise ValueError("{0} is not in schedule".format(lesson))
+
+    @property
+    def publish_times(self):
+        """
+        Distinct publication times in ascending order
+        :rtype: tuple[float]
+        """
+        return tuple(sorted(set(self._publish_times)))
+
+    def __len__(self):
+        return len(self._lessons)
+
+    def published_count(self, time):
+        """
+        Number of lessons published by given time
+        :param float time: time
+        :rtype: int
+        """
+        return bisect_right(self._publish_times, time)
+
+    def published_between(self, start, end):
+        """
+        Lessons published after start and by end
+        :param float start: start time, exclusive
+        :param float end: end time, inclusive
+        :rtype: tuple[BaseLesson]
+        """
+        return tuple(self._lessons[bisect_right(self._publish_times, start):bisect_right(self._publish_times, end)])
+
+    def next_publication(self, time):
+        """
+        Time of first publication strictly after given time
+        :param float time: time
+        :rtype: float
+        """
+        position = bisect_right(self._publish_times, time)
+        return self._publish_times[position] if position < len(self._publish_times) else INFINITY
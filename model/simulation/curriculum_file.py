@@ -0,0 +1,341 @@
+from array import array
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+
+from model.agents.resource import Resource
+from model.infrastructure import INFINITY
+from model.knowledge_representation.curriculum import Curriculum
+from model.knowledge_representation.fact import Competency, Fact
+from model.knowledge_representation.lesson_type import Lecture, Exam
+
+
+__author__ = 'e.kolpakov'
+
+
+class CurriculumFormat:
+    """
+    Declarative JSON curriculum format:
+
+        {
+            "facts": [{"code": "Sum", "dependencies": [], "complexity": 1.0}, ...],
+            "competencies": [{"code": "algebra", "facts": ["Sum", ...]}, ...],
+            "lectures": [{"code": "algebra", "facts": ["Sum", ...], "name": "Algebra", "publish_at": 0}, ...],
+            "exams": [{"code": "exam", "facts": [...], "weight": 0.3, "pass_threshold": 0.8, "allowed_time": 10}, ...],
+            "resources": [{"name": "Basic Math", "agent_id": "r1", "lessons": ["algebra", "exam"]}, ...]
+        }
+
+    Only fact and lesson codes are required, everything else has defaults.
+    """
+    LECTURE, EXAM = 0, 1
+    LESSON_TYPES = {LECTURE: Lecture, EXAM: Exam}
+
+
+class _CurriculumColumns:
+    """
+    Column-oriented curriculum description shared by JSON parser and binary cache. Variable-length lists (fact
+    dependencies, lesson facts, etc.) are stored flat with offsets: items of row i are values[offsets[i]:offsets[i+1]].
+    """
+    # (name, typecode); 's' columns hold strings and are stored as indices into string table
+    LAYOUT = (
+        ('fact_codes', 's'), ('fact_complexities', 'd'), ('fact_dependency_offsets', 'I'), ('fact_dependencies', 's'),
+        ('competency_codes', 's'), ('competency_fact_offsets', 'I'), ('competency_facts', 's'),
+        ('lesson_types', 'B'), ('lesson_codes', 's'), ('lesson_names', 's'), ('lesson_publish_at', 'd'),
+        ('lesson_weights', 'd'), ('lesson_pass_thresholds', 'd'), ('lesson_allowed_times', 'd'),
+        ('lesson_fact_offsets', 'I'), ('lesson_facts', 's'),
+        ('resource_names', 's'), ('resource_agent_ids', 's'), ('resource_lesson_offsets', 'I'),
+        ('resource_lessons', 's'),
+    )
+
+    def __init__(self):
+        for name, typecode in self.LAYOUT:
+            setattr(self, name, [] if typecode == 's' else array(typecode))
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        :param dict data: parsed JSON curriculum
+        :rtype: _CurriculumColumns
+        """
+        columns = cls()
+        columns.fact_dependency_offsets.append(0)
+        for fact in data.get('facts', []):
+            columns.fact_codes.append(fact['code'])
+            columns.fact_complexities.append(float(fact.get('complexity', 1.0)))
+            columns.fact_dependencies.extend(fact.get('dependencies', []))
+            columns.fact_dependency_offsets.append(len(columns.fact_dependencies))
+
+        columns.competency_fact_offsets.append(0)
+        for competency in data.get('competencies', []):
+            columns.competency_codes.append(competency['code'])
+            columns.competency_facts.extend(competency.get('facts', []))
+            columns.competency_fact_offsets.append(len(columns.competency_facts))
+
+        columns.lesson_fact_offsets.append(0)
+        lessons = [(CurriculumFormat.LECTURE, lecture) for lecture in data.get('lectures', [])]
+        lessons += [(CurriculumFormat.EXAM, exam) for exam in data.get('exams', [])]
+        for lesson_type, lesson in lessons:
+            allowed_time = lesson.get('allowed_time')
+            columns.lesson_types.append(lesson_type)
+            columns.lesson_codes.append(lesson['code'])
+            columns.lesson_names.append(lesson.get('name'))
+            columns.lesson_publish_at.append(float(lesson.get('publish_at', 0)))
+            columns.lesson_weights.append(float(lesson.get('weight', 1.0)))
+            columns.lesson_pass_thresholds.append(float(lesson.get('pass_threshold', 0.8)))
+            columns.lesson_allowed_times.append(INFINITY if allowed_time is None else float(allowed_time))
+            columns.lesson_facts.extend(lesson.get('facts', []))
+            columns.lesson_fact_offsets.append(len(columns.lesson_facts))
+
+        columns.resource_lesson_offsets.append(0)
+        for resource in data.get('resources', []):
+            columns.resource_names.append(resource['name'])
+            columns.resource_agent_ids.append(resource.get('agent_id'))
+            columns.resource_lessons.extend(resource.get('lessons', []))
+            columns.resource_lesson_offsets.append(len(columns.resource_lessons))
+
+        return columns
+
+    def build(self):
+        """
+        :rtype: (Curriculum, list[Resource])
+        """
+        curriculum = Curriculum()
+        offsets = self.fact_dependency_offsets
+        for position, code in enumerate(self.fact_codes):
+            dependencies = self.fact_dependencies[offsets[position]:offsets[position + 1]]
+            curriculum.register_fact(Fact(code, dependencies, self.fact_complexities[position]))
+
+        indexer = curriculum.fact_indexer
+        offsets = self.competency_fact_offsets
+        for position, code in enumerate(self.competency_codes):
+            fact_codes = self.competency_facts[offsets[position]:offsets[position + 1]]
+            curriculum.register_competency(Competency(code, self._find_facts(curriculum, code, fact_codes), indexer))
+
+        offsets = self.lesson_fact_offsets
+        for position, code in enumerate(self.lesson_codes):
+            lesson_type = self.lesson_types[position]
+            fact_codes = self.lesson_facts[offsets[position]:offsets[position + 1]]
+            kwargs = dict(
+                facts=self._find_facts(curriculum, code, fact_codes), indexer=indexer,
+                name=self.lesson_names[position], publish_at=self.lesson_publish_at[position]
+            )
+            if lesson_type == CurriculumFormat.EXAM:
+                kwargs.update(
+                    weight=self.lesson_weights[position], pass_threshold=self.lesson_pass_thresholds[position],
+                    allowed_time=self.lesson_allowed_times[position]
+                )
+            curriculum.register_lesson(CurriculumFormat.LESSON_TYPES[lesson_type](code, **kwargs))
+
+        resources = []
+        offsets = self.resource_lesson_offsets
+        for position, name in enumerate(self.resource_names):
+            lesson_codes = self.resource_lessons[offsets[position]:offsets[position + 1]]
+            lessons = [curriculum.find_lesson(lesson_code) for lesson_code in lesson_codes]
+            unknown = [lesson_code for lesson_code, lesson in zip(lesson_codes, lessons) if lesson is None]
+            if unknown:
+                raise ValueError("{0} refers to unknown lesson codes: {1}".format(name, ", ".join(unknown)))
+            resources.append(Resource(name, lessons, agent_id=self.resource_agent_ids[position]))
+
+        return curriculum, resources
+
+    @staticmethod
+    def _find_facts(curriculum, code, fact_codes):
+        """
+        :param Curriculum curriculum: curriculum
+        :param str code: code of competency or lesson referring to facts
+        :param list[str] fact_codes: fact codes
+        :rtype: list[Fact]
+        :raises ValueError: if curriculum has no fact with some of the codes
+        """
+        facts = [curriculum.find_fact(fact_code) for fact_code in fact_codes]
+        unknown = [fact_code for fact_code, fact in zip(fact_codes, facts) if fact is None]
+        if unknown:
+            raise ValueError("{0} refers to unknown fact codes: {1}".format(code, ", ".join(unknown)))
+        return facts
+
+
+class _BinaryCache:
+    """
+    Binary curriculum cache: fixed header followed by typed arrays, each 8-byte aligned so that numeric columns are
+    used in place as memoryviews over cache file contents. Strings are deduplicated and joined by NUL characters into
+    a single UTF-8 blob, split back with a single call; string columns hold indices into resulting list.
+    """
+    MAGIC = b'SMCC'
+    VERSION = 2
+    HEADER = struct.Struct('<4sHB?20s')
+    ARRAY_HEADER = struct.Struct('<cxxxxxxxQ')
+    SEPARATOR = '\0'
+    ALIGNMENT = 8
+
+    @classmethod
+    def write(cls, path, columns, source_hash):
+        """
+        :param str path: cache file path
+        :param _CurriculumColumns columns: curriculum columns
+        :param bytes source_hash: hash of source file
+        """
+        string_columns = [getattr(columns, name) for name, typecode in columns.LAYOUT if typecode == 's']
+        strings = list(dict.fromkeys(value for values in string_columns for value in values if value is not None))
+        string_ids = {value: string_id for string_id, value in enumerate(strings)}
+        # missing strings refer to the slot after the last string
+        string_ids[None] = len(strings)
+        arrays = []
+        for name, typecode in columns.LAYOUT:
+            values = getattr(columns, name)
+            arrays.append(array('I', map(string_ids.__getitem__, values)) if typecode == 's' else values)
+
+        blob = cls.SEPARATOR.join(strings).encode('utf-8')
+        arrays = [array('Q', [len(strings)]), array('B', blob)] + arrays
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            cache_file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, sys.byteorder == 'little', False, source_hash))
+            for values in arrays:
+                cls._pad(cache_file)
+                cache_file.write(cls.ARRAY_HEADER.pack(values.typecode.encode('ascii'), len(values)))
+                values.tofile(cache_file)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def read(cls, path, source_hash):
+        """
+        :param str path: cache file path
+        :param bytes source_hash: expected hash of source file
+        :rtype: _CurriculumColumns|None
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as cache_file:
+            content = cache_file.read()
+        if len(content) < cls.HEADER.size:
+            return None
+        magic, version, little_endian, _, cached_hash = cls.HEADER.unpack_from(content, 0)
+        if (magic, version, little_endian, cached_hash) != (
+                cls.MAGIC, cls.VERSION, sys.byteorder == 'little', source_hash
+        ):
+            return None
+
+        view, arrays = memoryview(content), []
+        position = cls.HEADER.size
+        for _ in range(len(_CurriculumColumns.LAYOUT) + 2):
+            position = cls._align(position)
+            typecode, count = cls.ARRAY_HEADER.unpack_from(content, position)
+            position += cls.ARRAY_HEADER.size
+            typecode = typecode.decode('ascii')
+            size = count * array(typecode).itemsize
+            arrays.append(view[position:position + size].cast(typecode))
+            position += size
+        return cls._to_columns(arrays)
+
+    @classmethod
+    def _to_columns(cls, arrays):
+        (string_count,), blob = arrays[0], arrays[1]
+        strings = blob.tobytes().decode('utf-8').split(cls.SEPARATOR) if string_count else []
+        if len(strings) != string_count:
+            # strings containing separator cannot be cached, source file is parsed instead
+            return None
+        strings.append(None)
+        columns = _CurriculumColumns()
+        for (name, typecode), values in zip(columns.LAYOUT, arrays[2:]):
+            setattr(columns, name, list(map(strings.__getitem__, values)) if typecode == 's' else values)
+        return columns
+
+    @classmethod
+    def _align(cls, position):
+        return (position + cls.ALIGNMENT - 1) // cls.ALIGNMENT * cls.ALIGNMENT
+
+    @classmethod
+    def _pad(cls, stream):
+        position = stream.tell()
+        stream.write(b'\0' * (cls._align(position) - position))
+
+
+class CurriculumLoader:
+    """
+    Loads curriculum and resources from JSON file. Parsed file is cached in binary form next to it (or in cache
+    directory), keyed by hash of file contents, so subsequent loads of unchanged file skip JSON parsing.
+    """
+    CACHE_SUFFIX = '.cache'
+
+    def __init__(self, use_cache=True, cache_dir=None):
+        """
+        :param bool use_cache: read and write binary cache
+        :param str|None cache_dir: directory for cache files, defaults to directory of curriculum file
+        """
+        self._use_cache = use_cache
+        self._cache_dir = cache_dir
+        self._logger = logging.getLogger(__name__)
+
+    def load(self, path):
+        """
+        :param str path: path to curriculum JSON file
+        :rtype: (Curriculum, list[Resource])
+        """
+        with open(path, 'rb') as source:
+            content = source.read()
+
+        if not self._use_cache:
+            return _CurriculumColumns.from_json(json.loads(content.decode('utf-8'))).build()
+
+        source_hash = hashlib.sha1(content).digest()
+        cache_path = self._get_cache_path(path)
+        columns = _BinaryCache.read(cache_path, source_hash)
+        if columns is None:
+            self._logger.debug("Curriculum cache {cache} is missing or stale, parsing {path}".format(
+                cache=cache_path, path=path
+            ))
+            columns = _CurriculumColumns.from_json(json.loads(content.decode('utf-8')))
+            _BinaryCache.write(cache_path, columns, source_hash)
+        return columns.build()
+
+    def _get_cache_path(self, path):
+        if self._cache_dir is None:
+            return path + self.CACHE_SUFFIX
+        os.makedirs(self._cache_dir, exist_ok=True)
+        return os.path.join(self._cache_dir, os.path.basename(path) + self.CACHE_SUFFIX)
+
+    @staticmethod
+    def dump(path, curriculum, resources=()):
+        """
+        Writes curriculum and resources to JSON file
+        :param str path: path to curriculum JSON file
+        :param Curriculum curriculum: curriculum
+        :param collections.Iterable[Resource] resources: resources
+        """
+        def lesson_data(lesson):
+            result = {
+                'code': lesson.code, 'facts': [fact.code for fact in lesson.facts], 'publish_at': lesson.publish_at
+            }
+            if lesson.name:
+                result['name'] = lesson.name
+            if isinstance(lesson, Exam):
+                result.update(weight=lesson.weight, pass_threshold=lesson.pass_threshold)
+                if lesson.allowed_time != INFINITY:
+                    result['allowed_time'] = lesson.allowed_time
+            return result
+
+        lessons = list(curriculum.all_lessons())
+        data = {
+            'facts': [
+                {'code': fact.code, 'dependencies': sorted(fact.dependencies), 'complexity': fact.complexity}
+                for fact in curriculum.all_facts()
+            ],
+            'competencies': [
+                {'code': competency.code, 'facts': [fact.code for fact in competency.facts]}
+                for competency in curriculum.all_competencies()
+            ],
+            'lectures': [lesson_data(lesson) for lesson in lessons if isinstance(lesson, Lecture)],
+            'exams': [lesson_data(lesson) for lesson in lessons if isinstance(lesson, Exam)],
+            'resources': [
+                {
+                    'name': resource.name, 'agent_id': resource.agent_id,
+                    'lessons': [lesson.code for lesson in resource.lessons]
+                }
+                for resource in resources
+            ],
+        }
+        with open(path, 'w') as target:
+            json.dump(data, target)
@@ -0,0 +1,145 @@
+import random
+
+from model.agents.resource import Resource
+from model.knowledge_representation.curriculum import Curriculum
+from model.knowledge_representation.fact import Competency, Fact
+from model.knowledge_representation.lesson_type import Lecture, Exam
+
+
+__author__ = 'e.kolpakov'
+
+
+class CurriculumGenerator:
+    """
+    Generates random curricula shaped as layered dependency DAGs: facts of every layer depend only on facts of previous
+    layers. Generation is linear in number of facts and dependencies, so curricula of 100k facts take seconds.
+    """
+    def __init__(
+            self, fact_count=1000, depth=10, fan_in=3, skip_layer_probability=0.1, complexity=(1.0, 1.0),
+            competency_size=50, lecture_size=10, lectures_per_exam=5, exam_size=20, publish_interval=0.0,
+            seed=None
+    ):
+        """
+        :param int fact_count: number of facts
+        :param int depth: number of fact layers
+        :param int fan_in: maximum number of dependencies of a fact
+        :param float skip_layer_probability: probability of dependency coming from any earlier layer, not previous one
+        :param (float, float) complexity: fact complexity range
+        :param int competency_size: number of facts in competency
+        :param int lecture_size: number of facts in lecture
+        :param int lectures_per_exam: an exam is placed after this many lectures
+        :param int exam_size: maximum number of facts in exam, sampled from lectures it follows
+        :param float publish_interval: time between publication of consecutive lectures
+        :param int|None seed: random seed
+        """
+        if fact_count < 0 or depth < 1 or fan_in < 0:
+            raise ValueError("Non-negative fact count and fan in and positive depth expected, got {0}, {1}, {2}".format(
+                fact_count, fan_in, depth
+            ))
+        if competency_size < 1 or lecture_size < 1 or lectures_per_exam < 1:
+            raise ValueError("Positive competency, lecture sizes and lectures per exam expected")
+
+        self._fact_count = fact_count
+        self._depth = depth
+        self._fan_in = fan_in
+        self._skip_layer_probability = skip_layer_probability
+        self._complexity = complexity
+        self._competency_size = competency_size
+        self._lecture_size = lecture_size
+        self._lectures_per_exam = lectures_per_exam
+        self._exam_size = exam_size
+        self._publish_interval = publish_interval
+        self._random = random.Random(seed)
+
+    def generate(self):
+        """
+        :rtype: Curriculum
+        """
+        curriculum = Curriculum()
+        layers = self._generate_facts()
+        facts = [fact for layer in layers for fact in layer]
+        for fact in facts:
+            curriculum.register_fact(fact)
+
+        indexer = curriculum.fact_indexer
+        for competency in self._generate_competencies(facts, indexer):
+            curriculum.register_competency(competency)
+
+        for lesson in self._generate_lessons(facts, indexer):
+            curriculum.register_lesson(lesson)
+
+        return curriculum
+
+    def _layer_sizes(self):
+        base, remainder = divmod(self._fact_count, self._depth)
+        return [base + (1 if layer < remainder else 0) for layer in range(self._depth)]
+
+    def _generate_facts(self):
+        rng = self._random
+        min_complexity, max_complexity = self._complexity
+        layers, earlier_codes = [], []
+        fact_number = 0
+        for layer_size in self._layer_sizes():
+            previous_codes = [fact.code for fact in layers[-1]] if layers else []
+            layer = []
+            for _ in range(layer_size):
+                dependencies = self._choose_dependencies(previous_codes, earlier_codes) if previous_codes else []
+                complexity = rng.uniform(min_complexity, max_complexity)
+                layer.append(Fact("f{0}".format(fact_number), dependencies, complexity))
+                fact_number += 1
+            earlier_codes.extend(previous_codes)
+            layers.append(layer)
+        return layers
+
+    def _choose_dependencies(self, previous_codes, earlier_codes):
+        rng = self._random
+        dependency_count = rng.randint(1, min(self._fan_in, len(previous_codes))) if self._fan_in else 0
+        dependencies = set()
+        for _ in range(dependency_count):
+            pool = earlier_codes if earlier_codes and rng.random() < self._skip_layer_probability else previous_codes
+            dependencies.add(pool[rng.randrange(len(pool))])
+        return dependencies
+
+    def _generate_competencies(self, facts, indexer):
+        size = self._competency_size
+        for number, start in enumerate(range(0, len(facts), size)):
+            yield Competency("competency{0}".format(number), facts[start:start + size], indexer)
+
+    def _generate_lessons(self, facts, indexer):
+        rng = self._random
+        lecture_facts, size = [], self._lecture_size
+        for number, start in enumerate(range(0, len(facts), size)):
+            chunk = facts[start:start + size]
+            publish_at = number * self._publish_interval
+            yield Lecture(
+                "lecture{0}".format(number), facts=chunk, name="Lecture {0}".format(number), publish_at=publish_at,
+                indexer=indexer
+            )
+
+            lecture_facts.extend(chunk)
+            is_last = start + size >= len(facts)
+            if (number + 1) % self._lectures_per_exam == 0 or is_last:
+                exam_number = number // self._lectures_per_exam
+                exam_facts = rng.sample(lecture_facts, min(self._exam_size, len(lecture_facts)))
+                yield Exam(
+                    "exam{0}".format(exam_number), facts=exam_facts, name="Exam {0}".format(exam_number),
+                    publish_at=publish_at + self._publish_interval, indexer=indexer
+                )
+                lecture_facts = []
+
+    @staticmethod
+    def generate_resources(curriculum, lessons_per_resource=10):
+        """
+        Splits curriculum lessons into resources in publication order
+        :param Curriculum curriculum: curriculum
+        :param int lessons_per_resource: number of lessons in resource
+        :rtype: list[Resource]
+        """
+        lessons = list(curriculum.compile().lessons.values())
+        return [
+            Resource(
+                "Resource {0}".format(number), lessons[start:start + lessons_per_resource],
+                agent_id="r{0}".format(number)
+            )
+            for number, start in enumerate(range(0, len(lessons), lessons_per_resource))
+        ]
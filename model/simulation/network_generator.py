@@ -0,0 +1,217 @@
+from abc import ABCMeta, abstractmethod
+from math import log
+import random
+
+
+__author__ = 'e.kolpakov'
+
+
+def _random_pairs(rng, node_count, probability, offset=0):
+    """
+    Pairs of nodes linked independently with given probability. Gaps between linked pairs are geometrically
+    distributed, so pairs are generated in time linear in number of pairs rather than number of all possible pairs.
+    :param random.Random rng: random number generator
+    :param int node_count: number of nodes
+    :param float probability: link probability
+    :param int offset: id of the first node
+    :rtype: collections.Iterable[(int, int)]
+    """
+    if probability <= 0 or node_count < 2:
+        return
+    if probability >= 1:
+        for second in range(1, node_count):
+            for first in range(second):
+                yield offset + first, offset + second
+        return
+
+    log_miss = log(1.0 - probability)
+    second, first = 1, -1
+    while second < node_count:
+        first += 1 + int(log(1.0 - rng.random()) / log_miss)
+        while first >= second and second < node_count:
+            first -= second
+            second += 1
+        if second < node_count:
+            yield offset + first, offset + second
+
+
+class NetworkGenerator(metaclass=ABCMeta):
+    """
+    Generates random undirected peer networks. Nodes are positions of students in the list passed to connect, edges
+    link students both ways. Generation is linear in number of nodes and edges, so networks of 100k students are
+    built in seconds.
+    """
+    def __init__(self, seed=None):
+        """
+        :param int|None seed: random seed
+        """
+        self._random = random.Random(seed)
+
+    @abstractmethod
+    def edges(self, node_count):
+        """
+        :param int node_count: number of nodes
+        :return collections.Iterable[(int, int)]: unique undirected edges, no self loops
+        """
+        pass
+
+    def connect(self, students):
+        """
+        Links students with a generated network. Students are expected to share a social graph and have no peers yet.
+        :param collections.Sequence[Student] students: students
+        """
+        if not students:
+            return
+        graph = students[0].social_graph
+        if any(student.social_graph is not graph for student in students):
+            raise ValueError("Students expected to belong to the same social graph")
+        nodes = [student.social_id for student in students]
+        graph.add_edges(
+            directed
+            for first, second in self.edges(len(students))
+            for directed in ((nodes[first], nodes[second]), (nodes[second], nodes[first]))
+        )
+
+
+class ErdosRenyiNetworkGenerator(NetworkGenerator):
+    """
+    Every pair of students is linked with the same probability
+    """
+    def __init__(self, average_degree=10.0, seed=None):
+        """
+        :param float average_degree: expected number of peers of a student
+        :param int|None seed: random seed
+        """
+        super(ErdosRenyiNetworkGenerator, self).__init__(seed)
+        if average_degree < 0:
+            raise ValueError("Non-negative average degree expected, got {0}".format(average_degree))
+        self._average_degree = average_degree
+
+    def edges(self, node_count):
+        if node_count < 2:
+            return iter(())
+        return _random_pairs(self._random, node_count, self._average_degree / (node_count - 1))
+
+
+class BarabasiAlbertNetworkGenerator(NetworkGenerator):
+    """
+    Preferential attachment: students join one by one and link to existing students with probability proportional
+    to their number of peers, producing a few very well connected students
+    """
+    def __init__(self, links_per_node=5, seed=None):
+        """
+        :param int links_per_node: number of peers every joining student links to
+        :param int|None seed: random seed
+        """
+        super(BarabasiAlbertNetworkGenerator, self).__init__(seed)
+        if links_per_node < 1:
+            raise ValueError("Positive links per node expected, got {0}".format(links_per_node))
+        self._links_per_node = links_per_node
+
+    def edges(self, node_count):
+        rng, links = self._random, self._links_per_node
+        # every node appears here once per its edge, so uniform choice from it is proportional to degree
+        endpoints = []
+        # first joining node links to all initial nodes
+        for target in range(1, min(links + 1, node_count)):
+            endpoints.extend((0, target))
+            yield 0, target
+        for source in range(links + 1, node_count):
+            targets, chosen = [], set()
+            while len(targets) < links:
+                target = endpoints[int(rng.random() * len(endpoints))]
+                if target not in chosen:
+                    chosen.add(target)
+                    targets.append(target)
+            for target in targets:
+                endpoints.extend((target, source))
+                yield target, source
+
+
+class SmallWorldNetworkGenerator(NetworkGenerator):
+    """
+    Watts-Strogatz model: students on a ring are linked to their nearest neighbors, then every link is rewired to a
+    random student with given probability, giving highly clustered networks with short paths
+    """
+    def __init__(self, ring_degree=10, rewire_probability=0.1, seed=None):
+        """
+        :param int ring_degree: number of nearest neighbors on the ring, even
+        :param float rewire_probability: probability of a link being rewired
+        :param int|None seed: random seed
+        """
+        super(SmallWorldNetworkGenerator, self).__init__(seed)
+        if ring_degree < 0 or ring_degree % 2:
+            raise ValueError("Non-negative even ring degree expected, got {0}".format(ring_degree))
+        self._ring_degree = ring_degree
+        self._rewire_probability = rewire_probability
+
+    def edges(self, node_count):
+        rng, probability = self._random, self._rewire_probability
+        half_degree = min(self._ring_degree // 2, (node_count - 1) // 2)
+        # edge (first, second) is keyed as first * node_count + second with first < second, dict keeps edge order
+        edges = {}
+        for distance in range(1, half_degree + 1):
+            for node in range(node_count):
+                first, second = sorted((node, (node + distance) % node_count))
+                edges[first * node_count + second] = None
+
+        if node_count - 1 > 2 * half_degree:
+            for distance in range(1, half_degree + 1):
+                for node in range(node_count):
+                    if rng.random() >= probability:
+                        continue
+                    target = int(rng.random() * node_count)
+                    first, second = sorted((node, target))
+                    key = first * node_count + second
+                    if target == node or key in edges:
+                        continue
+                    first, second = sorted((node, (node + distance) % node_count))
+                    edges.pop(first * node_count + second, None)
+                    edges[key] = None
+
+        return (divmod(key, node_count) for key in edges)
+
+
+class ClusteredNetworkGenerator(NetworkGenerator):
+    """
+    Students are split into study groups - consecutive blocks of students list, so students can be grouped by cohort
+    by ordering them. Students of a group are linked with high probability, students of different groups are linked
+    by a few random links.
+    """
+    def __init__(self, group_size=20, within_probability=1.0, between_degree=1.0, seed=None):
+        """
+        :param int group_size: number of students in a group, last group may be smaller
+        :param float within_probability: probability of two students of the same group being linked
+        :param float between_degree: expected number of peers of a student from other groups
+        :param int|None seed: random seed
+        """
+        super(ClusteredNetworkGenerator, self).__init__(seed)
+        if group_size < 1:
+            raise ValueError("Positive group size expected, got {0}".format(group_size))
+        if between_degree < 0:
+            raise ValueError("Non-negative between groups degree expected, got {0}".format(between_degree))
+        self._group_size = group_size
+        self._within_probability = within_probability
+        self._between_degree = between_degree
+
+    def edges(self, node_count):
+        rng, group_size = self._random, self._group_size
+        for offset in range(0, node_count, group_size):
+            yield from _random_pairs(rng, min(group_size, node_count - offset), self._within_probability, offset)
+
+        if node_count <= group_size:
+            return
+        full_groups, last_group = divmod(node_count, group_size)
+        within_pairs = full_groups * group_size * (group_size - 1) // 2 + last_group * (last_group - 1) // 2
+        between_pairs = node_count * (node_count - 1) // 2 - within_pairs
+        linked, remaining = set(), min(int(round(node_count * self._between_degree / 2)), between_pairs)
+        while remaining:
+            first, second = int(rng.random() * node_count), int(rng.random() * node_count)
+            if first // group_size == second // group_size:
+                continue
+            first, second = min(first, second), max(first, second)
+            key = first * node_count + second
+            if key not in linked:
+                linked.add(key)
+                remaining -= 1
+                yield first, second
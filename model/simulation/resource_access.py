@@ -6,6 +6,7 @@ __author__ = 'e.kolpakov'
 class ResourceRosterMixin:
     def __init__(self, *args, **kwargs):
         self._known_resources = set()
+        self._roster_version = 0
         self._logger = getattr(self, '_logger', None)
 
     def add_resource(self, resource):
@@ -13,14 +14,37 @@ class ResourceRosterMixin:
             self._logger.debug("{self} already knows about resource {resource}".format(self=self, resource=resource))
         self._logger.debug("{self} adds resource {resource}".format(self=self, resource=resource))
         self._known_resources.add(resource)
+        self._roster_version += 1
 
     def forget_resource(self, resource):
         self._known_resources.remove(resource)
+        self._roster_version += 1
+
+    def access_changed(self):
+        """
+        Called when access to known resources is granted or revoked - resources accessible to agent change as well
+        """
+        self._roster_version += 1
 
     @property
     def known_resources(self):
         return frozenset(self._known_resources)
 
+    def knows_resource(self, resource):
+        """
+        :type resource: agents.resource.Resource
+        :rtype: bool
+        """
+        return resource in self._known_resources
+
+    @property
+    def roster_version(self):
+        """
+        Incremented whenever resource is added or forgotten or access to resources changes
+        :rtype: int
+        """
+        return self._roster_version
+
     @property
     def logger(self):
         if not self._logger:
@@ -47,6 +71,10 @@ class ResourceAccessService:
         if student.name not in self._access_privileges:
             self._access_privileges[student.name] = dict()
         self._access_privileges[student.name][resource.name] = True
+        # exams and resources student chose from are outdated - caches are dropped before student wakes up
+        student.access_changed()
+        # new resource might give dormant student something to do
+        student.wake()
 
     def check_access(self, student, resource):
         """
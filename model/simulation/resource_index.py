@@ -0,0 +1,238 @@
+import heapq
+from itertools import count
+
+from model.infrastructure import INFINITY
+from model.knowledge_representation import DependencyGraph, Fact, FactIndexer, FactSet
+from model.knowledge_representation.curriculum import CurriculumChange
+
+
+__author__ = 'e.kolpakov'
+
+
+class FactResourceIndex:
+    """
+    Reverse index from facts to resources that have published lectures teaching them. Resources notify index when
+    their facts to study change, so only the changed facts are reindexed. Publications that are due but were not
+    processed by resources yet are picked up by sync. Published exams are tracked too, so students only collect
+    available exams again after some exam gets published or withdrawn. Dependency graph follows curriculum changes
+    of taught facts when index is subscribed to curriculum.
+    """
+    def __init__(self, resources=(), indexer=None):
+        """
+        :param collections.Iterable[Resource] resources: resources to index
+        :param FactIndexer|None indexer: indexer to build masks with, fact indexer of the curriculum is expected
+        """
+        self._indexer = indexer if indexer is not None else FactIndexer()
+        self._masks = {}
+        self._exams = {}
+        self._resources_by_fact = {}
+        self._graph = DependencyGraph((), self._indexer)
+        # indices of facts in order they were first taught or changed in curriculum, frontiers recheck them from here
+        self._changes = []
+        self._publications = []
+        self._publication_order = count()
+        self._version = 0
+        self._exams_version = 0
+
+        for resource in resources:
+            self.add_resource(resource)
+
+    @property
+    def indexer(self):
+        """ :rtype: FactIndexer """
+        return self._indexer
+
+    @property
+    def version(self):
+        """
+        Incremented whenever any resource starts or stops teaching some fact
+        :rtype: int
+        """
+        return self._version
+
+    @property
+    def exams_version(self):
+        """
+        Incremented whenever set of exams published by indexed resources changes
+        :rtype: int
+        """
+        return self._exams_version
+
+    @property
+    def dependency_graph(self):
+        """
+        Dependency graph of all facts ever taught by indexed resources
+        :rtype: DependencyGraph
+        """
+        return self._graph
+
+    def add_resource(self, resource):
+        """
+        :param Resource resource: resource
+        """
+        if resource in self._masks:
+            return
+        self._masks[resource] = 0
+        resource.subscribe(self._resource_changed)
+        self._resource_changed(resource)
+
+    def remove_resource(self, resource):
+        """
+        :param Resource resource: resource
+        """
+        if resource not in self._masks:
+            return
+        resource.unsubscribe(self._resource_changed)
+        self._reindex(resource, 0)
+        del self._masks[resource]
+        if self._exams.pop(resource, ()):
+            self._exams_version += 1
+
+    def close(self):
+        """
+        Stops listening to indexed resources, index is not updated afterwards
+        """
+        for resource in self._masks:
+            resource.unsubscribe(self._resource_changed)
+        self._publications = []
+
+    def resources_teaching(self, fact_index):
+        """
+        :param int fact_index: fact index
+        :rtype: collections.Set[Resource]
+        """
+        return self._resources_by_fact.get(fact_index, frozenset())
+
+    def changed_since(self, position):
+        """
+        Facts taught for the first time or changed in curriculum after given number of changes were seen
+        :param int position: number of changes already seen
+        :rtype: list[int]
+        """
+        return self._changes[position:]
+
+    def on_curriculum_change(self, change):
+        """
+        Keeps dependency graph in line with curriculum: removed facts leave the graph and re-registered (edited) facts
+        replace their previous version, so frontiers do not check stale prerequisites
+        :param CurriculumChange change: curriculum change
+        """
+        fact = change.entity
+        if not isinstance(fact, Fact):
+            return
+        fact_index = self._indexer.find_index(fact.code)
+        if fact_index is None or fact_index not in self._resources_by_fact:
+            return
+        self._graph.remove_fact(fact)
+        if change.kind == CurriculumChange.ADDED:
+            self._graph.add_fact(fact)
+        self._changes.append(fact_index)
+        self._version += 1
+
+    def sync(self, now):
+        """
+        Makes resources process publications due by given time
+        :param float now: current time
+        """
+        publications = self._publications
+        while publications and publications[0][0] <= now:
+            _, _, resource = heapq.heappop(publications)
+            if resource in self._masks:
+                # accessing facts makes resource publish due lessons and notify index
+                resource.facts_to_study
+
+    def create_frontier(self):
+        """ :rtype: LearnableFrontier """
+        return LearnableFrontier(self)
+
+    def _resource_changed(self, resource):
+        """
+        :param Resource resource: resource that changed
+        """
+        self._reindex(resource, FactSet.from_facts(resource.facts_to_study, self._indexer).mask)
+        exams = resource.exams
+        if exams != self._exams.get(resource, ()):
+            self._exams[resource] = exams
+            self._exams_version += 1
+        if resource.next_publication < INFINITY:
+            heapq.heappush(self._publications, (resource.next_publication, next(self._publication_order), resource))
+
+    def _reindex(self, resource, mask):
+        old_mask = self._masks[resource]
+        if mask == old_mask:
+            return
+        self._masks[resource] = mask
+        self._version += 1
+        for fact_index in self._indexer.indices_of(mask & ~old_mask):
+            resources = self._resources_by_fact.get(fact_index)
+            if resources is None:
+                resources = self._resources_by_fact[fact_index] = set()
+                self._graph.add_fact(self._indexer.fact_at(fact_index))
+                self._changes.append(fact_index)
+            resources.add(resource)
+        for fact_index in self._indexer.indices_of(old_mask & ~mask):
+            self._resources_by_fact[fact_index].discard(resource)
+
+
+class LearnableFrontier:
+    """
+    Facts taught by indexed resources that a student can learn right away: not known yet, with all dependencies
+    known. Kept up to date incrementally - on update only facts whose knowledge changed, their dependents and newly
+    taught facts are rechecked.
+    """
+    def __init__(self, index):
+        """
+        :param FactResourceIndex index: fact to resources index
+        """
+        self._index = index
+        self._known_mask = 0
+        self._changes_position = 0
+        self._facts = set()
+
+    def __len__(self):
+        return len(self._facts)
+
+    def __contains__(self, fact_index):
+        return fact_index in self._facts
+
+    def update(self, knowledge):
+        """
+        :param FactSet knowledge: current knowledge
+        """
+        index, indexer, graph = self._index, self._index.indexer, self._index.dependency_graph
+        known_mask = FactSet.from_facts(knowledge, indexer).mask
+        changed_mask = known_mask ^ self._known_mask
+        changed_facts = index.changed_since(self._changes_position)
+        if not changed_mask and not changed_facts:
+            return
+        self._known_mask = known_mask
+        self._changes_position += len(changed_facts)
+
+        to_check = set(changed_facts)
+        for fact_index in indexer.indices_of(changed_mask):
+            to_check.add(fact_index)
+            to_check.update(graph.dependents_of(fact_index))
+
+        # testing single bit of a large integer is linear in its size, testing a byte is not
+        known_bits = known_mask.to_bytes((known_mask.bit_length() + 7) >> 3, 'little')
+        known_limit = len(known_bits) << 3
+
+        def is_known(position):
+            return position < known_limit and known_bits[position >> 3] >> (position & 7) & 1
+
+        for fact_index in to_check:
+            dependencies = graph.dependencies_of(fact_index)
+            if dependencies is not None and not is_known(fact_index) and all(map(is_known, dependencies)):
+                self._facts.add(fact_index)
+            else:
+                self._facts.discard(fact_index)
+
+    def resources(self):
+        """
+        Resources teaching at least one fact of the frontier
+        :rtype: set[Resource]
+        """
+        result = set()
+        for fact_index in self._facts:
+            result.update(self._index.resources_teaching(fact_index))
+        return result
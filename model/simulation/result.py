@@ -89,6 +89,18 @@ class SimulationResult(SimulationResultBase):
         self._register_result_handler(self.knowledge_delta_listener, ResultTopics.KNOWLEDGE_DELTA)
         self._register_result_handler(self.knowledge_count_listener, ResultTopics.KNOWLEDGE_COUNT)
         self._register_result_handler(self.exam_feedback_listener, ResultTopics.EXAM_RESULTS)
+        self._register_result_handler(self.knowledge_distribution_listener, ResultTopics.KNOWLEDGE_DISTRIBUTION)
+        self._register_result_handler(self.cohort_resource_usage_listener, ResultTopics.COHORT_RESOURCE_USAGE)
+        self._register_result_handler(self.cohort_exam_feedback_listener, ResultTopics.COHORT_EXAM_RESULTS)
+        self._register_result_handler(
+            self.cohort_common_knowledge_listener, ResultTopics.COHORT_COMMON_KNOWLEDGE
+        )
+        self._register_result_handler(
+            self.cohort_common_knowledge_delta_listener, ResultTopics.COHORT_COMMON_KNOWLEDGE_DELTA
+        )
+        self._register_result_handler(
+            self.cohort_mean_knowledge_count_listener, ResultTopics.COHORT_MEAN_KNOWLEDGE_COUNT
+        )
 
     def resource_usage_listener(self, agent, args, kwargs):
         """
@@ -120,6 +132,13 @@ class SimulationResult(SimulationResultBase):
         """
         self.register_result(SimulationResultItem(agent, ResultTopics.KNOWLEDGE_COUNT, agent.time, value))
 
+    def knowledge_distribution_listener(self, agent, value):
+        """
+        :type agent: BaseAgent
+        :type value: dict[FactSet, int]
+        """
+        self.register_result(SimulationResultItem(agent, ResultTopics.KNOWLEDGE_DISTRIBUTION, agent.time, value))
+
     def exam_feedback_listener(self, agent, args, kwargs):
         """
         Listens for exam feedback events
@@ -132,11 +151,67 @@ class SimulationResult(SimulationResultBase):
             SimulationResultItem(agent, ResultTopics.EXAM_RESULTS, agent.time, kwargs.get('exam_feedback'))
         )
 
+    def cohort_resource_usage_listener(self, agent, args, kwargs):
+        """
+        Listens for resources studied by a group of cohort members, value is (resource, count) pair
+        :param agent: BaseAgent
+        :param args: list[Any]
+        :param kwargs: dict[str, Any]
+        """
+        resource, count = args
+        self.register_result(SimulationResultItem(
+            agent, ResultTopics.COHORT_RESOURCE_USAGE, agent.time, (resource, count)
+        ))
+
+    def cohort_exam_feedback_listener(self, agent, args, kwargs):
+        """
+        Listens for exam feedback got by a group of cohort members, value is (feedback, count) pair
+        :param agent: BaseAgent
+        :param args: list[Any]
+        :param kwargs: dict[str, Any]
+        """
+        self.register_result(SimulationResultItem(
+            agent, ResultTopics.COHORT_EXAM_RESULTS, agent.time, (kwargs.get('exam_feedback'), kwargs.get('count', 1))
+        ))
+
+    def cohort_common_knowledge_listener(self, agent, value):
+        """
+        :type agent: BaseAgent
+        :type value: FactSet
+        """
+        self.register_result(SimulationResultItem(agent, ResultTopics.COHORT_COMMON_KNOWLEDGE, agent.time, value))
+
+    def cohort_common_knowledge_delta_listener(self, agent, delta):
+        """
+        :type agent: BaseAgent
+        :type delta: FactSet
+        """
+        self.register_result(
+            SimulationResultItem(agent, ResultTopics.COHORT_COMMON_KNOWLEDGE_DELTA, agent.time, delta)
+        )
+
+    def cohort_mean_knowledge_count_listener(self, agent, value):
+        """
+        :type agent: BaseAgent
+        :type value: float
+        """
+        self.register_result(
+            SimulationResultItem(agent, ResultTopics.COHORT_MEAN_KNOWLEDGE_COUNT, agent.time, value)
+        )
+
 
 class ResultTopics:
     RESOURCE_USAGE = 'Resource.Usage'
     KNOWLEDGE_SNAPSHOT = 'Knowledge.Snapshot'
     KNOWLEDGE_COUNT = 'Knowledge.Count'
     KNOWLEDGE_DELTA = 'Knowledge.Delta'
+    KNOWLEDGE_DISTRIBUTION = 'Knowledge.Distribution'
 
     EXAM_RESULTS = 'Exam.Result'
+
+    # cohort aggregates - values describe a group of cohort members rather than a single student
+    COHORT_RESOURCE_USAGE = 'Cohort.Resource.Usage'
+    COHORT_EXAM_RESULTS = 'Cohort.Exam.Result'
+    COHORT_COMMON_KNOWLEDGE = 'Cohort.Knowledge.Common'
+    COHORT_COMMON_KNOWLEDGE_DELTA = 'Cohort.Knowledge.CommonDelta'
+    COHORT_MEAN_KNOWLEDGE_COUNT = 'Cohort.Knowledge.MeanCount'
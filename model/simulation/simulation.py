@@ -1,15 +1,24 @@
+import random
+
 from simpy import Environment
 
+from model.infrastructure import INFINITY
+from model.infrastructure.random_streams import RandomStreams
+from model.knowledge_representation import KnowledgeStateTable
+from model.knowledge_representation.curriculum import CurriculumChange
+from model.knowledge_representation.lesson_type import BaseLesson
 from model.simulation.resource_access import ResourceAccessService
+from model.simulation.resource_index import FactResourceIndex
 
 
 __author__ = 'e.kolpakov'
 
 
 class Simulation(ResourceAccessService):
-    def __init__(self, simulation_input, *args, **kwargs):
+    def __init__(self, simulation_input, *args, seed=None, **kwargs):
         """
         :type simulation_input: study_model.simulation.simulation_input.SimulationInput
+        :param seed: seed random streams of all agents are derived from, drawn from global random module by default
         """
         super(Simulation, self).__init__(*args, **kwargs)
 
@@ -17,18 +26,42 @@ class Simulation(ResourceAccessService):
         """ :type: int """
 
         self._environment = Environment()
+        self._random_streams = RandomStreams(seed if seed is not None else random.getrandbits(64))
 
         self._students = simulation_input.students
         self._resources = simulation_input.resources
         self._curriculum = simulation_input.curriculum
+        # fails fast on broken curriculum, e.g. unlearnable facts depending on missing codes
+        self._curriculum.compile()
+        self._curriculum.subscribe(self._on_curriculum_change)
+        # knowledge state transitions are shared by all students of this simulation only
+        self._knowledge_states = KnowledgeStateTable()
+        self._curriculum.subscribe(self._knowledge_states.on_curriculum_change)
 
         self._register_resources(self._resources)
 
+    @property
+    def seed(self):
+        return self._random_streams.seed
+
     @property
     def state(self):
         """ :rtype: SimulationState """
         return SimulationState(self._students, self._resources, self._curriculum)
 
+    def _on_curriculum_change(self, change):
+        """
+        Lessons removed from curriculum are withdrawn from resources. Lessons are value objects, so resources might
+        hold a lesson equal to the registered one rather than the registered instance itself.
+        :param CurriculumChange change: curriculum change
+        """
+        if change.kind != CurriculumChange.REMOVED or not isinstance(change.entity, BaseLesson):
+            return
+        for resource in self._resources:
+            for lesson in resource.lessons:
+                if lesson == change.entity:
+                    resource.remove_lesson(lesson)
+
     def _grant_initial_access_permissions(self):
         for student in self._students:
             for resource in self._resources:
@@ -39,16 +72,39 @@ class Simulation(ResourceAccessService):
         for resource in self._resources:
             resource.resource_access_service = self
             resource.env = self._environment
+            self._environment.process(resource.publish())
+        resource_index = FactResourceIndex(self._resources, self._curriculum.fact_indexer)
+        self._curriculum.subscribe(resource_index.on_curriculum_change)
 
         for student in self._students:
             student.curriculum = self._curriculum
+            student.resource_index = resource_index
+            student.random_streams = self._random_streams
+            student.knowledge_states = self._knowledge_states
             student.env = self._environment
             self._environment.process(student.start())
             student_stop_conditions.append(student.stop_participation_event)
 
         self._grant_initial_access_permissions()
 
-        self._environment.run(self._environment.all_of(student_stop_conditions))
+        all_stopped = self._environment.all_of(student_stop_conditions)
+        try:
+            # run ends early when remaining students are dormant and nothing is scheduled that could wake them
+            while not all_stopped.processed and self._environment.peek() < INFINITY:
+                self._environment.step()
+        finally:
+            self._detach(resource_index)
+
+    def _detach(self, resource_index):
+        """
+        Stops listening to curriculum and resources once simulation is over, so that finished simulations are not kept
+        alive and updated by curriculum shared with other simulations
+        :param FactResourceIndex resource_index: resource index of the run
+        """
+        self._curriculum.unsubscribe(self._on_curriculum_change)
+        self._curriculum.unsubscribe(self._knowledge_states.on_curriculum_change)
+        self._curriculum.unsubscribe(resource_index.on_curriculum_change)
+        resource_index.close()
 
 
 class SimulationState():
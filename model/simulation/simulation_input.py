@@ -5,7 +5,9 @@ from model.agents.student.goals import StudyCompetenciesGoal, PassExamGoal
 from model.agents.student import GoalDrivenStudent, RationalStudent
 from model.knowledge_representation.fact import Competency, Fact
 from model.knowledge_representation.curriculum import Curriculum
+from model.infrastructure.mailbox import MailboxBus
 from model.knowledge_representation.lesson_type import Lecture, Exam
+from model.simulation.social_graph import SocialGraph
 
 
 __author__ = 'e.kolpakov'
@@ -53,10 +55,13 @@ class SimulationInputBuilder:
         """
         curriculum = self.build_curriculum()
         resources = self.build_resources(curriculum)
-        return SimulationInput(curriculum, resources, self.build_students(curriculum, resources))
+        # students of one simulation meet and exchange messages within a graph and a bus of their own
+        students = self.build_students(curriculum, resources, MailboxBus(), SocialGraph())
+        return SimulationInput(curriculum, resources, students)
 
     def build_curriculum(self):
         curriculum = Curriculum()
+        indexer = curriculum.fact_indexer
 
         alg_facts = [Fact(code) for code in self.alg_fact_codes]
         calc_facts = [Fact(code, self.alg_fact_codes) for code in self.calc_fact_codes]
@@ -67,24 +72,27 @@ class SimulationInputBuilder:
         for fact in all_facts:
             curriculum.register_fact(fact)
 
-        curriculum.register_competency(Competency('algebra', alg_facts))
-        curriculum.register_competency(Competency("calculus", calc_facts))
-        curriculum.register_competency(Competency("diff_eq", diff_eq_facts))
-        curriculum.register_competency(Competency("trigonometry", trig_facts))
-
-        curriculum.register_lesson(Lecture("algebra", facts=alg_facts, name="Algebra"))
-        curriculum.register_lesson(Lecture("trigonometry", facts=trig_facts, name="Trigonometry"))
-        curriculum.register_lesson(Lecture("calculus1", facts=calc_facts[:2], name="Calculus 1"))
-        curriculum.register_lesson(Lecture("calculus2", facts=calc_facts[2:], name="Calculus 2"))
-        curriculum.register_lesson(Lecture("diff_eq1", facts=diff_eq_facts[:2], name="Differential Equations 1"))
-        curriculum.register_lesson(Lecture("diff_eq2", facts=diff_eq_facts[2:], name="Differential Equations 2"))
-
-        curriculum.register_lesson(
-            Exam("half_semester_exam", facts=alg_facts+trig_facts, weight=0.3, name="Half semester exam", publish_at=40)
-        )
-        curriculum.register_lesson(
-            Exam("final_exam", facts=alg_facts+trig_facts, weight=0.7, name="Final exam", publish_at=80)
-        )
+        curriculum.register_competency(Competency('algebra', alg_facts, indexer))
+        curriculum.register_competency(Competency("calculus", calc_facts, indexer))
+        curriculum.register_competency(Competency("diff_eq", diff_eq_facts, indexer))
+        curriculum.register_competency(Competency("trigonometry", trig_facts, indexer))
+
+        # lessons are built with curriculum fact indexer, so curriculum registers them as they are
+        lecture = lambda code, facts, name: Lecture(code, facts=facts, name=name, indexer=indexer)
+        curriculum.register_lesson(lecture("algebra", alg_facts, "Algebra"))
+        curriculum.register_lesson(lecture("trigonometry", trig_facts, "Trigonometry"))
+        curriculum.register_lesson(lecture("calculus1", calc_facts[:2], "Calculus 1"))
+        curriculum.register_lesson(lecture("calculus2", calc_facts[2:], "Calculus 2"))
+        curriculum.register_lesson(lecture("diff_eq1", diff_eq_facts[:2], "Differential Equations 1"))
+        curriculum.register_lesson(lecture("diff_eq2", diff_eq_facts[2:], "Differential Equations 2"))
+
+        curriculum.register_lesson(Exam(
+            "half_semester_exam", facts=alg_facts+trig_facts, weight=0.3, name="Half semester exam", publish_at=40,
+            indexer=indexer
+        ))
+        curriculum.register_lesson(Exam(
+            "final_exam", facts=alg_facts+trig_facts, weight=0.7, name="Final exam", publish_at=80, indexer=indexer
+        ))
 
         return curriculum
 
@@ -98,17 +106,18 @@ class SimulationInputBuilder:
         ]
 
     @staticmethod
-    def build_students(curriculum, resources):
-        student1 = GoalDrivenStudent("Andy", [], agent_id='s1', skill=2.0)
+    def build_students(curriculum, resources, mailbox_bus, social_graph):
+        shared = dict(mailbox_bus=mailbox_bus, social_graph=social_graph)
+        student1 = GoalDrivenStudent("Andy", [], agent_id='s1', skill=2.0, **shared)
         student1.goals.extend((
             StudyCompetenciesGoal([curriculum.find_competency('diff_eq')]),
         ))
-        student2 = GoalDrivenStudent("Ben", [], agent_id='s2', skill=1.0)
+        student2 = GoalDrivenStudent("Ben", [], agent_id='s2', skill=1.0, **shared)
         student2.goals.extend((
             StudyCompetenciesGoal([curriculum.find_competency('diff_eq')], weight=1.0),
             PassExamGoal(curriculum.find_lesson('final_exam'), weight=0.5)
         ))
-        student3 = RationalStudent("Charlie", [], agent_id='s3', skill=1.0)
+        student3 = RationalStudent("Charlie", [], agent_id='s3', skill=1.0, **shared)
         student1.meet(student2)
         student2.meet(student1)
 
@@ -0,0 +1,173 @@
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+import random
+
+
+__author__ = 'e.kolpakov'
+
+
+class SocialGraph:
+    """
+    Directed graph of acquaintances in compressed sparse row form. Members are numbered in order they join, neighbors
+    of all members are stored in a single integer array, so neighbors of a member are a slice of it between two
+    offsets. Edges added one at a time are kept in short per-member lists until enough of them accumulate to be merged
+    into the arrays, edges added in bulk are merged right away. Merged neighbors of a member are sorted by node id, so
+    edges are looked up by binary search; neighbors not merged yet follow in the order they were added in.
+    """
+    COMPACT_THRESHOLD = 1024
+
+    def __init__(self):
+        self._members = []
+        self._offsets = array('q', [0])
+        self._neighbors = array('q')
+        self._pending = {}
+        self._pending_count = 0
+
+    def __len__(self):
+        return len(self._members)
+
+    @property
+    def edge_count(self):
+        """ :rtype: int """
+        return len(self._neighbors) + self._pending_count
+
+    def add_member(self, member):
+        """
+        :param member: agent joining the graph
+        :return int: node id of the member
+        """
+        self._members.append(member)
+        return len(self._members) - 1
+
+    def member(self, node):
+        """
+        :param int node: node id
+        """
+        return self._members[node]
+
+    def degree(self, node):
+        """
+        :param int node: node id
+        :rtype: int
+        """
+        pending = self._pending.get(node)
+        return self._compact_degree(node) + (len(pending) if pending is not None else 0)
+
+    def neighbors(self, node):
+        """
+        :param int node: node id
+        :rtype: tuple[int]
+        """
+        pending = self._pending.get(node, ())
+        if node + 1 >= len(self._offsets):
+            return tuple(pending)
+        return tuple(self._neighbors[self._offsets[node]:self._offsets[node + 1]]) + tuple(pending)
+
+    def has_edge(self, source, target):
+        """
+        :param int source: source node id
+        :param int target: target node id
+        :rtype: bool
+        """
+        if target in self._pending.get(source, ()):
+            return True
+        if source + 1 >= len(self._offsets):
+            return False
+        neighbors, end = self._neighbors, self._offsets[source + 1]
+        position = bisect_left(neighbors, target, self._offsets[source], end)
+        return position < end and neighbors[position] == target
+
+    def add_edge(self, source, target):
+        """
+        :param int source: source node id
+        :param int target: target node id
+        :return bool: False if edge was already present
+        """
+        self._validate_nodes((source, target))
+        if self.has_edge(source, target):
+            return False
+        self._pending.setdefault(source, []).append(target)
+        self._pending_count += 1
+        if self._pending_count > max(self.COMPACT_THRESHOLD, len(self._neighbors) >> 2):
+            self.compact()
+        return True
+
+    def add_edges(self, edges):
+        """
+        Adds edges in bulk in a single pass over the arrays. Edges are not checked against existing ones, so they are
+        expected to be new and unique.
+        :param collections.Iterable[(int, int)] edges: (source, target) node id pairs
+        """
+        sources, targets = array('q'), array('q')
+        for source, target in edges:
+            sources.append(source)
+            targets.append(target)
+        self._validate_nodes(sources)
+        self._validate_nodes(targets)
+        self._rebuild(sources, targets)
+
+    def compact(self):
+        """
+        Merges edges added one at a time into the arrays
+        """
+        if self._pending_count or len(self._offsets) <= len(self._members):
+            self._rebuild(array('q'), array('q'))
+
+    def sample_neighbors(self, node, count, rng=random):
+        """
+        Random neighbors without replacement, in time proportional to count rather than degree
+        :param int node: node id
+        :param int count: number of neighbors
+        :param random.Random rng: random number generator
+        :rtype: list[int]
+        """
+        compact_degree = self._compact_degree(node)
+        start = self._offsets[node] if compact_degree else 0
+        pending, neighbors = self._pending.get(node, ()), self._neighbors
+        return [
+            neighbors[start + position] if position < compact_degree else pending[position - compact_degree]
+            for position in rng.sample(range(self.degree(node)), count)
+        ]
+
+    def _compact_degree(self, node):
+        offsets = self._offsets
+        return offsets[node + 1] - offsets[node] if node + 1 < len(offsets) else 0
+
+    def _validate_nodes(self, nodes):
+        if not nodes:
+            return
+        for node in (min(nodes), max(nodes)):
+            if not 0 <= node < len(self._members):
+                raise ValueError("Unknown node {0}".format(node))
+
+    def _rebuild(self, sources, targets):
+        size = len(self._members)
+        degrees = [self.degree(node) for node in range(size)]
+        for source in sources:
+            degrees[source] += 1
+        offsets = array('q', [0])
+        offsets.extend(accumulate(degrees))
+
+        neighbors = array('q', [0]) * offsets[-1]
+        positions = list(offsets[:-1])
+        for node in range(size):
+            if node + 1 < len(self._offsets):
+                row = self._neighbors[self._offsets[node]:self._offsets[node + 1]]
+                neighbors[positions[node]:positions[node] + len(row)] = row
+            row_end = positions[node] + self._compact_degree(node)
+            pending = self._pending.get(node)
+            if pending is not None:
+                neighbors[row_end:row_end + len(pending)] = array('q', pending)
+                row_end += len(pending)
+            positions[node] = row_end
+        for source, target in zip(sources, targets):
+            neighbors[positions[source]] = target
+            positions[source] += 1
+        for node in range(size):
+            start, end = offsets[node], offsets[node + 1]
+            if end - start > 1:
+                neighbors[start:end] = array('q', sorted(neighbors[start:end]))
+
+        self._offsets, self._neighbors = offsets, neighbors
+        self._pending, self._pending_count = {}, 0
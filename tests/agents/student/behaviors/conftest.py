@@ -3,6 +3,7 @@ from unittest import mock
 import pytest
 
 from model.agents.student import Student
+from model.infrastructure.random_streams import RandomStreams
 
 
 __author__ = 'e.kolpakov'
@@ -10,4 +11,7 @@ __author__ = 'e.kolpakov'
 
 @pytest.fixture
 def student():
-    return mock.Mock(spec=Student)
\ No newline at end of file
+    result = mock.Mock(spec=Student)
+    streams = RandomStreams(0)
+    result.random_stream = mock.Mock(side_effect=lambda purpose: streams.stream('student', purpose))
+    return result
\ No newline at end of file
@@ -1,7 +1,11 @@
+from unittest import mock
+
 import pytest
 
 from model.agents.student.behaviors.activity_period import FixedActivityLengthsBehavior, BaseActivityLengthsBehavior, \
-    RandomActivityLengthsBehavior, QuarterHourRandomActivityLengthsBehavior
+    RandomActivityLengthsBehavior, QuarterHourRandomActivityLengthsBehavior, BatchedRandomActivityLengthsBehavior, \
+    BatchedQuarterHourRandomActivityLengthsBehavior
+from model.infrastructure.random_streams import RandomStreams
 
 
 __author__ = 'e.kolpakov'
@@ -97,4 +101,34 @@ class TestQuarterHourRandomActivityLengthsBehavior(RandomizedBehaviorTextMixin,
 
     @pytest.mark.parametrize('parameters', period_configs)
     def test_periods(self, student, parameters):
-        self.verify_all_methods(student, parameters)
\ No newline at end of file
+        self.verify_all_methods(student, parameters)
+
+
+class TestBatchedRandomActivityLengthsBehavior(TestRandomActivityLengthsBehavior):
+    behavior_to_test = BatchedRandomActivityLengthsBehavior
+
+
+class TestBatchedQuarterHourRandomActivityLengthsBehavior(TestQuarterHourRandomActivityLengthsBehavior):
+    behavior_to_test = BatchedQuarterHourRandomActivityLengthsBehavior
+
+    @pytest.mark.parametrize('batch_size', [1, 7, 64])
+    def test_batches_cover_same_values(self, student, batch_size):
+        behavior = self.behavior_to_test(study_period=2, batch_size=batch_size)
+        periods = [behavior.get_study_period(student, 0) for _ in range(200)]
+        assert set(periods) == {0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75}
+        assert 0.7 < sum(periods) / len(periods) < 1.05
+
+    def test_batches_follow_injected_streams(self, student):
+        behavior = self.behavior_to_test(study_period=10, batch_size=7)
+        runs = []
+        for _ in range(2):
+            streams = RandomStreams(1)
+            student.random_stream = mock.Mock(side_effect=lambda purpose: streams.stream('student', purpose))
+            runs.append([behavior.get_study_period(student, 0) for _ in range(10)])
+        assert runs[0] == runs[1]
+
+    def test_batch_is_kept_by_stream(self, student):
+        behavior = self.behavior_to_test(study_period=10, batch_size=7)
+        behavior.get_study_period(student, 0)
+        stream = student.random_stream(behavior.RANDOM_STREAM)
+        assert len(stream.buffer) == 6
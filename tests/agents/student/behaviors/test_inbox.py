@@ -0,0 +1,84 @@
+from unittest.mock import PropertyMock
+
+from model.agents.resource import Resource
+from model.agents.student.behaviors.inbox import DeduplicatingInboxBehavior
+from model.agents.student.messages import FactMessage, ResourceMessage
+from model.infrastructure.mailbox import Mailbox
+from model.knowledge_representation import Fact, FactSet
+
+
+__author__ = 'e.kolpakov'
+
+
+class TestDeduplicatingInboxBehavior:
+    def _make_inbox(self, student, behavior):
+        inbox = Mailbox()
+        inbox.configure(
+            key=behavior.message_key, admit=lambda message: behavior.admit(student, message),
+            priority=lambda message: behavior.priority(student, message),
+            blocker=lambda message: behavior.blocker(student, message)
+        )
+        return inbox
+
+    def test_duplicates_and_known_facts_dropped_on_delivery(self, student):
+        behavior = DeduplicatingInboxBehavior()
+        known, unknown = Fact('IBF1'), Fact('IBF2')
+        type(student).knowledge = PropertyMock(return_value=FactSet.from_facts([known]))
+        resource = Resource('IBR1', [], agent_id='ibr1')
+        student.knows_resource.return_value = False
+        inbox = self._make_inbox(student, behavior)
+
+        messages = [FactMessage(known), FactMessage(unknown), FactMessage(unknown), ResourceMessage(resource)]
+        for message in messages + [ResourceMessage(resource)]:
+            inbox.put(message)
+        assert list(inbox) == [messages[1], messages[3]]
+        assert inbox.collapsed == 2
+
+    def test_learnable_facts_processed_first(self, student):
+        behavior = DeduplicatingInboxBehavior()
+        base, dependent, other = Fact('IBF3'), Fact('IBF4', ['IBF3']), Fact('IBF5', ['IBF6'])
+        knowledge = PropertyMock(return_value=FactSet.from_facts([base]))
+        type(student).knowledge = knowledge
+        student.knows_resource.return_value = False
+        inbox = self._make_inbox(student, behavior)
+        resource_message = ResourceMessage(Resource('IBR2', [], agent_id='ibr2'))
+        for message in (FactMessage(dependent), resource_message, FactMessage(other)):
+            inbox.put(message)
+
+        assert behavior.next_message(student, inbox).fact == dependent
+        knowledge.return_value = FactSet.from_facts([base, other])
+        assert behavior.next_message(student, inbox) is resource_message
+        assert behavior.next_message(student, inbox) is None
+        assert not inbox
+
+    def test_blocked_fact_processed_first_once_learnable(self, student):
+        behavior = DeduplicatingInboxBehavior()
+        base, middle, dependent = Fact('IBF7'), Fact('IBF8', ['IBF7']), Fact('IBF9', ['IBF7', 'IBF8'])
+        knowledge = PropertyMock(return_value=FactSet())
+        type(student).knowledge = knowledge
+        student.knows_resource.return_value = False
+        inbox = self._make_inbox(student, behavior)
+        resource_message = ResourceMessage(Resource('IBR3', [], agent_id='ibr3'))
+        for message in (FactMessage(dependent), resource_message):
+            inbox.put(message)
+
+        for learnt in (base, middle):
+            knowledge.return_value = knowledge.return_value.with_fact(learnt)
+            behavior.fact_learnt(student, inbox, learnt)
+        assert behavior.next_message(student, inbox).fact == dependent
+        assert behavior.next_message(student, inbox) is resource_message
+
+    def test_fact_with_forgotten_dependency_processed_last(self, student):
+        behavior = DeduplicatingInboxBehavior()
+        base, dependent = Fact('IBF10'), Fact('IBF11', ['IBF10'])
+        knowledge = PropertyMock(return_value=FactSet.from_facts([base]))
+        type(student).knowledge = knowledge
+        student.knows_resource.return_value = False
+        inbox = self._make_inbox(student, behavior)
+        resource_message = ResourceMessage(Resource('IBR4', [], agent_id='ibr4'))
+        for message in (FactMessage(dependent), resource_message):
+            inbox.put(message)
+
+        knowledge.return_value = FactSet(0, knowledge.return_value.indexer)
+        assert behavior.next_message(student, inbox) is resource_message
+        assert behavior.next_message(student, inbox).fact == dependent
@@ -6,7 +6,7 @@ from model.agents.resource import Resource
 from model.agents.student.behaviors.knowledge_acquisition import (
     AllDependenciesAcquisitionBehavior, GetAllFactsAcquisitionBehavior
 )
-from model.knowledge_representation import Fact
+from model.knowledge_representation import Fact, KnowledgeStateTable
 
 
 __author__ = 'e.kolpakov'
@@ -16,6 +16,7 @@ __author__ = 'e.kolpakov'
 def student(knowledge_mock):
     s = mock.MagicMock(spec=student)
     type(s).knowledge = knowledge_mock
+    s.knowledge_states = KnowledgeStateTable()
     return s
 
 
@@ -5,7 +5,8 @@ import pytest
 
 from model.agents.resource import Resource
 from model.agents.student.behaviors.resource_choice import RandomResourceChoiceBehavior, RationalResourceChoiceBehavior
-from model.knowledge_representation import Fact, Curriculum
+from model.infrastructure.random_streams import RandomStreams
+from model.knowledge_representation import Fact, Curriculum, KnowledgeStateTable
 from model.knowledge_representation.lesson_type import Lecture
 
 
@@ -14,7 +15,11 @@ __author__ = 'e.kolpakov'
 
 @pytest.fixture
 def student():
-    return mock.Mock(spec=student)
+    result = mock.Mock(spec=student)
+    result.resources_to_learn_from = mock.Mock(side_effect=tuple)
+    result.knowledge_states = KnowledgeStateTable()
+    result.random_stream = mock.Mock(return_value=RandomStreams(0).stream('student', 'resource_choice'))
+    return result
 
 
 @pytest.fixture
@@ -37,6 +42,15 @@ class TestRandomResourceChoiceBehavior:
 
         assert chosen in resources
 
+    def test_choice_does_not_depend_on_resource_order(self, curriculum, behavior):
+        resources = [Resource('r{0}'.format(index), [], agent_id='r{0}'.format(index)) for index in range(5)]
+        choices = []
+        for ordered in (resources, resources[::-1]):
+            student = mock.Mock()
+            student.random_stream = mock.Mock(return_value=RandomStreams(0).stream('student', 'resource_choice'))
+            choices.append(behavior.resource_choice_map(student, curriculum, ordered))
+        assert choices[0] == choices[1]
+
 
 class TestRationalResourceChoiceBehavior:
     @pytest.fixture
@@ -7,7 +7,9 @@ from simpy import Environment
 from model.agents.resource import Resource
 from model.agents.student import Student
 from model.agents.student.behaviors.behavior_group import BehaviorGroup
+from model.agents.student.behaviors.inbox import BaseInboxBehavior
 from model.agents.student.behaviors.knowledge_acquisition import BaseFactsAcquisitionBehavior
+from model.agents.student.behaviors.knowledge_decay import BaseKnowledgeDecayBehavior
 from model.agents.student.behaviors.resource_choice import BaseResourceChoiceBehavior
 from model.agents.student.behaviors.stop_participation import BaseStopParticipationBehavior
 from model.agents.student.behaviors.activity_period import BaseActivityLengthsBehavior
@@ -28,6 +30,8 @@ def behavior_group():
     bhg.stop_participation = mock.Mock(BaseStopParticipationBehavior)
     bhg.study_period = mock.Mock(BaseActivityLengthsBehavior)
     bhg.send_messages = mock.Mock(BaseSendMessagesBehavior)
+    bhg.knowledge_decay = BaseKnowledgeDecayBehavior()
+    bhg.inbox = BaseInboxBehavior()
     return bhg
 
 
@@ -65,6 +69,7 @@ def student(behavior_group, curriculum, env):
     student_mock.env = env
     type(student_mock).curriculum = PropertyMock(return_value=curriculum)
     student_mock.env = env
+    student_mock.resources_to_learn_from = mock.Mock(side_effect=tuple)
     return student_mock
 
 
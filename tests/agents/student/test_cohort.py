@@ -0,0 +1,91 @@
+import pytest
+
+from model.agents.resource import Resource
+from model.agents.student import RationalCohort, RationalStudent
+from model.knowledge_representation import Competency, Curriculum, Fact
+from model.knowledge_representation.lesson_type import Exam, Lecture
+from model.simulation.result import ResultTopics, SimulationResult
+from model.simulation.simulation import Simulation
+from model.simulation.simulation_input import SimulationInput
+from model.simulation.social_graph import SocialGraph
+
+
+__author__ = 'e.kolpakov'
+
+
+def _make_simulation(cohort):
+    curriculum = Curriculum()
+    facts = [Fact('CHA'), Fact('CHB', ['CHA']), Fact('CHC')]
+    for fact in facts:
+        curriculum.register_fact(fact)
+    curriculum.register_competency(Competency('CHComp', facts))
+    lessons = [
+        Lecture('CHL1', facts=facts[:1]), Lecture('CHL2', facts=facts[1:], publish_at=100), Exam('CHE', facts=facts)
+    ]
+    for lesson in lessons:
+        curriculum.register_lesson(lesson)
+    resource = Resource('Resource', lessons, agent_id='chr1')
+    student = RationalStudent('Student', [], agent_id='chs1', social_graph=SocialGraph())
+    for agent in (student, cohort):
+        agent.add_resource(resource)
+    return Simulation(SimulationInput(curriculum, [resource], [student, cohort]), seed=1), student
+
+
+class TestCohort:
+    @pytest.mark.parametrize("size, branches", [(0, 1), (10, 0)])
+    def test_invalid_parameters_rejected(self, size, branches):
+        with pytest.raises(ValueError):
+            RationalCohort('cohort', size, branches=branches)
+
+    @pytest.mark.parametrize("count, branches, expected", [
+        (1, 4, [1]),
+        (10, 1, [10]),
+        (10, 4, [3, 3, 2, 2]),
+        (1000, 3, [334, 333, 333]),
+    ])
+    def test_split(self, count, branches, expected):
+        cohort = RationalCohort('cohort', 1000, branches=branches)
+        assert cohort._split(count) == expected
+
+    def test_cohort_runs_alongside_students(self):
+        result = SimulationResult()
+        cohort = RationalCohort('Cohort', 1000, agent_id='chc1', branches=4)
+        simulation, student = _make_simulation(cohort)
+        simulation.run()
+
+        assert student.stop_participation_event.triggered
+        assert cohort.stop_participation_event.triggered
+        assert {fact.code for fact in cohort.knowledge} == {'CHA', 'CHB', 'CHC'}
+        assert sum(cohort.knowledge_distribution.values()) == 1000
+        assert cohort.mean_knowledge_count == pytest.approx(3.0)
+
+        distributions = result.get_time_series(ResultTopics.KNOWLEDGE_DISTRIBUTION, cohort)
+        assert distributions
+        assert all(sum(item.value.values()) == 1000 for item in distributions)
+        exam_results = result.get_time_series(ResultTopics.COHORT_EXAM_RESULTS, cohort)
+        assert [(feedback.passed, count) for feedback, count in (item.value for item in exam_results)] == [(True, 1000)]
+        assert not result.get_time_series(ResultTopics.EXAM_RESULTS, cohort)
+        usages = result.get_time_series(ResultTopics.COHORT_RESOURCE_USAGE, cohort)
+        assert usages and all(count > 0 for _, count in (item.value for item in usages))
+        assert not result.get_time_series(ResultTopics.RESOURCE_USAGE, cohort)
+        assert result.get_time_series(ResultTopics.COHORT_MEAN_KNOWLEDGE_COUNT, cohort)[-1].value == pytest.approx(3.0)
+        assert not result.get_time_series(ResultTopics.KNOWLEDGE_COUNT, cohort)
+        # cohort waits for the second lecture publication, like a student does
+        assert min(item.time for item in exam_results) > 100
+
+    @pytest.mark.parametrize("seed", range(1, 11))
+    def test_short_study_sessions_do_not_stall_cohort(self, seed):
+        curriculum = Curriculum()
+        facts = [Fact('CHS{0}'.format(index)) for index in range(12)]
+        for fact in facts:
+            curriculum.register_fact(fact)
+        curriculum.register_competency(Competency('CHSComp', facts))
+        lecture = Lecture('CHSL', facts=facts)
+        curriculum.register_lesson(lecture)
+        resource = Resource('Resource', [lecture], agent_id='chr2')
+        cohort = RationalCohort('Cohort', 1000, agent_id='chc2')
+        cohort.add_resource(resource)
+        Simulation(SimulationInput(curriculum, [resource], [cohort]), seed=seed).run()
+
+        assert cohort.stop_participation_event.triggered
+        assert cohort.mean_knowledge_count == pytest.approx(12.0)
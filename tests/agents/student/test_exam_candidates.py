@@ -0,0 +1,49 @@
+import random
+
+from simpy import Environment
+
+from model.agents.student import Student
+from model.agents.student.exam_candidates import ExamCandidates
+from model.knowledge_representation import Fact
+from model.knowledge_representation.lesson_type import Exam, ExamFeedback
+
+
+__author__ = 'e.kolpakov'
+
+
+def _choose_by_scanning(student, exams, complete_before):
+    scores = {}
+    for exam in exams:
+        probability = len(student.knowledge & exam.facts) / float(len(exam.facts))
+        fits = student.env.now + student.estimate_exam_time(exam) <= complete_before
+        if fits and probability > Student.EXPECTED_PASS_PROBABILITY and not student.progress.passed_exam(exam):
+            scores.setdefault(exam, exam.weight * probability)
+    return max(scores, key=scores.get) if scores else None
+
+
+class TestExamCandidates:
+    def test_choice_matches_scanning_all_exams(self, behavior_group):
+        rnd = random.Random(11)
+        facts = [Fact('ECF{0}'.format(number), complexity=rnd.choice([1.0, 2.0])) for number in range(12)]
+        exams = [
+            Exam('ECE{0}'.format(number), facts=rnd.sample(facts, rnd.randint(1, 5)), weight=rnd.choice([0.5, 1.0]))
+            for number in range(15)
+        ]
+        env = Environment()
+        student = Student("student", [], behavior_group, agent_id='ec1')
+        student.env = env
+        candidates = ExamCandidates(student)
+        candidates.rebuild(exams + exams[:3])
+        assert len(candidates) == len(exams)
+
+        for _ in range(60):
+            action = rnd.random()
+            if action < 0.6:
+                student._add_fact(rnd.choice(facts))
+            elif action < 0.8 and student.knowledge:
+                student._retention.reinforce(rnd.choice(sorted(student.knowledge, key=str)), env.now, 0)
+            else:
+                exam = rnd.choice(exams)
+                student.accept_feedback(exam=exam, exam_feedback=ExamFeedback(exam, 1.0, True, 1))
+            complete_before = rnd.choice([0.1, 0.5, 1.0])
+            assert candidates.choose(complete_before) == _choose_by_scanning(student, exams, complete_before)
@@ -63,7 +63,7 @@ class TestStudyCompetenciesGoal:
         ]
 
         with mock.patch('model.agents.student.goals.get_available_facts') as available_facts_mock:
-            available_facts_mock.side_effect = lambda res, stud: res
+            available_facts_mock.side_effect = lambda res, stud, states: res
             resource_map = goal.resource_choice_map(student, curriculum, resources)
             return {resource.agent_id: weight for resource, weight in resource_map.items()}
 
@@ -205,6 +205,6 @@ class TestPassExamGoal:
         expected_weight_map.update(reduced_expected_map)
 
         with mock.patch('model.agents.student.goals.get_available_facts') as available_facts_mock:
-            available_facts_mock.side_effect = lambda res, stud: res
+            available_facts_mock.side_effect = lambda res, stud, states: res
             resource_map = goal.resource_choice_map(student, curriculum, resources)
             assert {resource.agent_id: weight for resource, weight in resource_map.items()} == expected_weight_map
\ No newline at end of file
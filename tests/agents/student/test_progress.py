@@ -0,0 +1,73 @@
+from unittest import mock
+
+import pytest
+
+from model.agents.student import Student
+from model.agents.student.activities import IdleActivity
+from model.agents.student.goals import StudyCompetenciesGoal, PassExamGoal
+from model.knowledge_representation import Competency, Fact
+from model.knowledge_representation.lesson_type import Exam, ExamFeedback
+
+
+__author__ = 'e.kolpakov'
+
+
+@pytest.fixture
+def student(behavior_group, env):
+    result = Student("student", [], behavior_group, agent_id='sp1')
+    result.env = env
+    return result
+
+
+@pytest.fixture
+def competency():
+    return Competency('PC1', [Fact('PF1'), Fact('PF2')])
+
+
+class TestStudentProgress:
+    def test_competency_counters(self, student, competency):
+        progress = student.progress
+        assert progress.mastered_ratio(competency) == 0
+        student._add_fact(Fact('PF1'))
+        student._add_fact(Fact('PF1'))
+        assert progress.mastered_ratio(competency) == 0.5
+        assert not progress.is_mastered(competency)
+        student._add_fact(Fact('PF2'))
+        assert progress.is_mastered(competency)
+
+    def test_goal_achieved_event(self, student, competency):
+        goal = StudyCompetenciesGoal([competency])
+        assert not student.progress.is_achieved(goal)
+        event = student.progress.goal_achieved_event
+        student._add_fact(Fact('PF1'))
+        assert not event.triggered
+        student._add_fact(Fact('PF2'))
+        assert event.triggered and event.value == (goal, )
+        assert student.progress.is_achieved(goal)
+
+    def test_passed_exam(self, student):
+        exam = Exam('PE1', facts=[Fact('PF1')])
+        goal = PassExamGoal(exam)
+        assert not student.progress.is_achieved(goal)
+        student.accept_feedback(exam=exam, exam_feedback=ExamFeedback(exam, 0.5, False, 1))
+        assert not student.progress.is_achieved(goal)
+        student.accept_feedback(exam=exam, exam_feedback=ExamFeedback(exam, 1.0, True, 2))
+        assert student.progress.passed_exam(exam)
+        assert student.progress.is_achieved(goal)
+
+    def test_student_stops_when_goal_achieved(self, student, behavior_group, competency, env):
+        goal = StudyCompetenciesGoal([competency])
+        student.goals.append(goal)
+        behavior_group.stop_participation.stop_participation.side_effect = \
+            lambda stud, curriculum, resources: stud.progress.is_achieved(goal)
+
+        def learn():
+            yield env.timeout(5)
+            student._add_fact(Fact('PF1'))
+            student._add_fact(Fact('PF2'))
+
+        with mock.patch.object(student, '_next_activity_generator', return_value=iter([IdleActivity(student, 100)])):
+            env.process(student.start())
+            env.process(learn())
+            env.run(student.stop_participation_event)
+        assert env.now == 5
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from model.agents.student import Student
+from model.agents.student.behaviors.knowledge_decay import ExponentialKnowledgeDecayBehavior
+from model.agents.student.retention import FactRetention
+from model.infrastructure import INFINITY
+from model.knowledge_representation import Competency, Fact
+
+
+__author__ = 'e.kolpakov'
+
+
+class TestFactRetention:
+    def test_pop_expired_skips_superseded_entries(self):
+        retention = FactRetention()
+        fact1, fact2 = Fact('RTF1'), Fact('RTF2')
+        retention.reinforce(fact1, 0, 10)
+        retention.reinforce(fact2, 0, 15)
+        retention.reinforce(fact1, 5, 20)
+        assert retention.next_expiry == 10
+        assert retention.pop_expired(12) == []
+        assert retention.reinforcements(fact1) == 2
+        assert retention.pop_expired(30) == [fact2, fact1]
+        assert len(retention) == 0 and retention.next_expiry == INFINITY
+
+    def test_infinite_retention_is_not_tracked(self):
+        retention = FactRetention()
+        retention.reinforce(Fact('RTF1'), 0, INFINITY)
+        assert not retention.is_tracked(Fact('RTF1'))
+        assert retention.next_expiry == INFINITY
+
+
+class TestExponentialKnowledgeDecay:
+    @pytest.fixture
+    def student(self, behavior_group, env):
+        behavior_group.knowledge_decay = ExponentialKnowledgeDecayBehavior(
+            stability=10.0, stability_growth=2.0, retention_threshold=math.exp(-1)
+        )
+        result = Student("student", [Fact('RTF0')], behavior_group, agent_id='sr1')
+        result.env = env
+        return result
+
+    def test_retention_period_grows_with_reinforcements(self):
+        behavior = ExponentialKnowledgeDecayBehavior(stability=10.0, stability_growth=3.0, retention_threshold=0.5)
+        assert behavior.retention_period(None, None, 1) == pytest.approx(10 * math.log(2))
+        assert behavior.retention_period(None, None, 3) == pytest.approx(90 * math.log(2))
+
+    def test_facts_are_forgotten_lazily(self, student, env):
+        facts = [Fact('RTF1'), Fact('RTF2')]
+        competency = Competency('RTC1', facts)
+
+        def learn():
+            student._add_fact(facts[0])
+            yield env.timeout(5)
+            student._add_fact(facts[1])
+            yield env.timeout(6)
+            assert set(student.knowledge) == {Fact('RTF0'), facts[1]}
+            assert student.progress.mastered_ratio(competency) == 0.5
+            student._add_fact(facts[1])
+            yield env.timeout(15)
+            assert set(student.knowledge) == {Fact('RTF0'), facts[1]}
+            yield env.timeout(10)
+            assert set(student.knowledge) == {Fact('RTF0')}
+
+        assert student.progress.mastered_ratio(competency) == 0
+        env.run(env.process(learn()))
+        assert student.progress.mastered_ratio(competency) == 0
+        with pytest.raises(ValueError):
+            ExponentialKnowledgeDecayBehavior(retention_threshold=1.0)
@@ -1,10 +1,23 @@
+import math
 from unittest import mock
 from unittest.mock import patch, PropertyMock
 
 import pytest
+from simpy import Environment, Interrupt
 
+from model.agents.resource import Resource
 from model.agents.student import Student
+from model.agents.student.behaviors.knowledge_decay import ExponentialKnowledgeDecayBehavior
+from model.agents.student.lecture_progress import LectureCursor
+from model.agents.student.messages import FactMessage
+from model.infrastructure import INFINITY
+from model.infrastructure.mailbox import MailboxBus, OverflowPolicy
+from model.knowledge_representation import Fact
+from model.knowledge_representation.lesson_type import Exam, Lecture
+from model.simulation.resource_access import ResourceAccessService
+from model.simulation.resource_index import FactResourceIndex
 from model.simulation.result import ResultTopics
+from model.simulation.social_graph import SocialGraph
 
 
 __author__ = 'e.kolpakov'
@@ -51,3 +64,225 @@ class TestStudent:
             assert args == (ResultTopics.RESOURCE_USAGE, )
             assert kwargs['args'] == (resource, )
             assert kwargs['agent'] == student
+
+    def test_register_exam_attempt_counts_per_exam(self, student):
+        exam1, exam2 = Exam('SE1'), Exam('SE2')
+        assert [student.register_exam_attempt(exam) for exam in (exam1, exam1, exam2, exam1)] == [1, 2, 1, 3]
+
+    @pytest.mark.parametrize("allowed_time", [INFINITY, 0.25, 0.4, 0.5, 0.0])
+    def test_batch_grading_matches_per_fact_grading(self, behavior_group, env, allowed_time):
+        facts = [Fact('SF1', complexity=1.0), Fact('SF2', complexity=2.0), Fact('SF3', complexity=1.5)]
+        results = []
+        for batch_grading in (False, True):
+            exam = Exam('SE3', facts=facts, allowed_time=allowed_time, batch_grading=batch_grading)
+            student = Student("student", facts[:1] + facts[2:], behavior_group, agent_id='s2')
+            student.env = env
+            start = env.now
+            feedback = env.run(env.process(exam.take(student)))
+            results.append((feedback.grade, feedback.passed, env.now - start))
+        assert results[0] == pytest.approx(results[1])
+
+    @pytest.mark.parametrize("exam_start", [5.0, 10.8, 10.95, 12.65, 20.0])
+    @pytest.mark.parametrize("allowed_time", [INFINITY, 0.35])
+    def test_batch_grading_checks_decaying_facts_at_their_time(self, behavior_group, exam_start, allowed_time):
+        behavior_group.knowledge_decay = ExponentialKnowledgeDecayBehavior(
+            stability=10.0, stability_growth=2.0, retention_threshold=math.exp(-1)
+        )
+        facts = [Fact('SF14', complexity=1.0), Fact('SF15', complexity=2.0), Fact('SF16', complexity=1.5)]
+        results = []
+        for batch_grading in (False, True):
+            env = Environment()
+            exam = Exam('SE4', facts=facts, allowed_time=allowed_time, batch_grading=batch_grading)
+            student = Student("student", [], behavior_group, agent_id='s7')
+            student.env = env
+            for fact in facts:
+                env.run(env.process(student.study_fact(fact)))
+            env.run(exam_start)
+            feedback = env.run(env.process(exam.take(student)))
+            results.append((feedback.grade, env.now, sorted(fact.code for fact in student.knowledge)))
+        assert results[0] == results[1]
+
+    def test_interrupted_lecture_resumes_without_planning_again(self, behavior_group, env):
+        facts = [Fact('SF4', complexity=1.0), Fact('SF5', complexity=1.0), Fact('SF6', complexity=1.0)]
+        lecture = Lecture('SL1', facts=facts)
+        resource = Resource('SR1', [lecture], agent_id='sr1')
+        resource.env = env
+        behavior_group.knowledge_acquisition.acquire_facts = mock.Mock(return_value=tuple(facts))
+        student = Student("student", [], behavior_group, agent_id='s3')
+        student.env = env
+
+        assert not env.run(env.process(student.study_resource(resource, until=1.5)))
+        assert set(student.knowledge) == set(facts[:1])
+        assert student.lecture_progress.interrupted_resource is resource
+        assert student.lecture_progress.cursor(lecture).position == 1
+
+        assert env.run(env.process(student.study_resource(resource, until=INFINITY)))
+        assert set(student.knowledge) == set(facts)
+        assert env.now == 3.0
+        assert behavior_group.knowledge_acquisition.acquire_facts.call_count == 1
+        assert lecture not in student.lecture_progress
+        assert student.lecture_progress.interrupted_resource is None
+
+    def test_unavailable_lecture_progress_is_discarded(self, behavior_group, env):
+        facts = [Fact('SF17', complexity=1.0), Fact('SF18', complexity=1.0)]
+        lecture = Lecture('SL5', facts=facts)
+        resource = Resource('SR5', [lecture], agent_id='sr5')
+        resource.env = env
+        resource.resource_access_service = mock.Mock(spec=ResourceAccessService)
+        resource.resource_access_service.check_access.return_value = True
+        behavior_group.knowledge_acquisition.acquire_facts = mock.Mock(return_value=tuple(facts))
+        student = Student("student", [], behavior_group, agent_id='s8')
+        student.env = env
+        student.add_resource(resource)
+
+        env.run(env.process(student.study_resource(resource, until=1.5)))
+        student.access_changed()
+        assert lecture in student.lecture_progress
+        assert student.lecture_progress.interrupted_resource is resource
+
+        resource.resource_access_service.check_access.return_value = False
+        student.access_changed()
+        assert lecture not in student.lecture_progress
+        assert student.lecture_progress.interrupted_resource is None
+
+    def test_forgotten_resource_lecture_progress_is_discarded(self, behavior_group, env):
+        facts = [Fact('SF19', complexity=1.0), Fact('SF20', complexity=1.0)]
+        lecture = Lecture('SL6', facts=facts)
+        resource = Resource('SR6', [lecture], agent_id='sr6')
+        resource.env = env
+        behavior_group.knowledge_acquisition.acquire_facts = mock.Mock(return_value=tuple(facts))
+        student = Student("student", [], behavior_group, agent_id='s9')
+        student.env = env
+        student.add_resource(resource)
+
+        env.run(env.process(student.study_resource(resource, until=1.5)))
+        student.forget_resource(resource)
+        assert len(student.lecture_progress) == 0
+        assert student.lecture_progress.interrupted_resource is None
+
+    @pytest.mark.parametrize("until, interrupt_at", [(INFINITY, None), (2.5, None), (INFINITY, 1.5), (0.5, None)])
+    def test_coalesced_study_matches_per_fact_study(self, behavior_group, until, interrupt_at):
+        facts = [Fact('SF7', complexity=1.0), Fact('SF8', complexity=0.5), Fact('SF9', complexity=1.5)]
+        lecture = Lecture('SL2', facts=facts)
+        behavior_group.knowledge_acquisition.acquire_facts = mock.Mock(return_value=tuple(facts))
+        results = []
+        for coalesced_study in (False, True):
+            env = Environment()
+            student = Student("student", [], behavior_group, agent_id='s4', coalesced_study=coalesced_study)
+            student.env = env
+            observed = []
+
+            def study():
+                try:
+                    return (yield from lecture.take(student, until))
+                except Interrupt:
+                    return None
+
+            process = env.process(study())
+            with patch('model.infrastructure.observers.pub.sendMessage') as observe_mock:
+                observe_mock.side_effect = lambda topic, agent, **kwargs: observed.append((topic, agent.time))
+                if interrupt_at is not None:
+                    env.run(interrupt_at)
+                    process.interrupt()
+                env.run(process)
+            results.append((process.value, env.now, sorted(fact.code for fact in student.knowledge), observed))
+        assert results[0] == results[1]
+
+    def test_closed_study_learns_nothing(self, behavior_group, env):
+        facts = [Fact('SF12', complexity=1.0), Fact('SF13', complexity=1.0)]
+        cursor = LectureCursor(Lecture('SL3', facts=facts), tuple(facts))
+        student = Student("student", [], behavior_group, agent_id='s6', coalesced_study=True)
+        student.env = env
+        study = student.study_facts(cursor)
+        next(study)
+        study.close()
+        assert not student.knowledge
+        assert cursor.position == 0
+
+    def test_knowledge_version_changes_with_knowledge(self, behavior_group, env):
+        facts = [Fact('SF10'), Fact('SF11')]
+        student = Student("student", facts[:1], behavior_group, agent_id='s5')
+        student.env = env
+        knowledge, version = student.knowledge, student.knowledge_version
+        assert student.knowledge is knowledge
+
+        student._add_fact(facts[0])
+        assert (student.knowledge, student.knowledge_version) == (knowledge, version)
+
+        student._add_fact(facts[1])
+        assert student.knowledge_version == version + 1
+        assert set(student.knowledge) == set(facts)
+        assert set(knowledge) == set(facts[:1])
+
+    def test_send_messages_holds_back_messages_to_full_inbox(self, behavior_group, env):
+        bus = MailboxBus(capacity=1, policy=OverflowPolicy.BACKPRESSURE)
+        sender = Student("sender", [], behavior_group, agent_id='s6', mailbox_bus=bus)
+        recipient = Student("recipient", [], behavior_group, agent_id='s7', mailbox_bus=bus)
+        sender.env = recipient.env = env
+        messages = [FactMessage(Fact('SF12', complexity=5.0)), FactMessage(Fact('SF13', complexity=5.0))]
+        behavior_group.send_messages.get_messages = mock.Mock(return_value=[(recipient, messages)])
+
+        env.run(env.process(sender.send_messages()))
+        assert list(bus.mailbox(recipient.inbox_address)) == messages[:1]
+        assert env.now == messages[0].time_to_send(sender)
+
+    def test_send_messages_delivers_shared_message_at_once(self, behavior_group, env):
+        bus = MailboxBus()
+        sender = Student("sender", [], behavior_group, agent_id='s13', mailbox_bus=bus)
+        recipients = [
+            Student("recipient", [], behavior_group, agent_id='s{0}'.format(14 + index), mailbox_bus=bus)
+            for index in range(2)
+        ]
+        sender.env = env
+        message = FactMessage(Fact('SF15', complexity=5.0))
+        behavior_group.send_messages.get_messages = mock.Mock(
+            return_value=[(recipient, [message]) for recipient in recipients]
+        )
+
+        with patch.object(bus, 'send_many', wraps=bus.send_many) as send_many:
+            env.run(env.process(sender.send_messages()))
+        send_many.assert_called_once_with([recipient.inbox_address for recipient in recipients], message)
+        assert all(list(bus.mailbox(recipient.inbox_address)) == [message] for recipient in recipients)
+        assert env.now == message.time_to_send(sender)
+
+    def test_send_messages_requires_shared_bus(self, behavior_group, env):
+        sender = Student("sender", [], behavior_group, agent_id='s16')
+        recipient = Student("recipient", [], behavior_group, agent_id='s17')
+        sender.env = env
+        behavior_group.send_messages.get_messages = mock.Mock(
+            return_value=[(recipient, [FactMessage(Fact('SF16'))])]
+        )
+        with pytest.raises(ValueError):
+            env.run(env.process(sender.send_messages()))
+
+    def test_meet_links_students_in_social_graph(self, behavior_group):
+        graph = SocialGraph()
+        students = [
+            Student("peer", [], behavior_group, agent_id='s{0}'.format(8 + index), social_graph=graph)
+            for index in range(3)
+        ]
+        students[0].meet(students[2])
+        students[0].meet(students[1])
+        students[0].meet(students[2])
+        assert students[0].known_students == (students[2], students[1])
+        assert students[0].known_students_count == 2
+        assert students[1].known_students == ()
+        with pytest.raises(ValueError):
+            students[0].meet(Student("stranger", [], behavior_group, agent_id='s11', social_graph=SocialGraph()))
+
+    def test_granted_access_refreshes_exam_choice(self, behavior_group, env):
+        fact = Fact('SF14')
+        exam = Exam('SE1', facts=[fact])
+        resource = Resource('resource', [exam], agent_id='sr1')
+        resource.env = env
+        service = ResourceAccessService()
+        service._register_resources([resource])
+        resource.resource_access_service = service
+        student = Student("student", [fact], behavior_group, agent_id='s12', social_graph=SocialGraph())
+        student.env = env
+        student.resource_index = FactResourceIndex([resource])
+        student.add_resource(resource)
+
+        assert student.choose_exam() is None
+        service.grant_access(student, resource)
+        assert student.choose_exam() is exam
@@ -0,0 +1,91 @@
+from simpy import Environment
+
+from model.agents.resource import Resource
+from model.knowledge_representation import Fact
+from model.knowledge_representation.lesson_type import Lecture, Exam
+
+
+__author__ = 'e.kolpakov'
+
+
+class TestResource:
+    def _make_resource(self):
+        facts = [Fact('RF1'), Fact('RF2'), Fact('RF3')]
+        return Resource('resource', [
+            Lecture('RL2', facts=facts[1:2], publish_at=10), Lecture('RL1', facts=facts[:1], publish_at=0),
+            Exam('RE1', facts=facts[:2], publish_at=10), Lecture('RL3', facts=facts[2:], publish_at=20),
+        ])
+
+    def test_published_lessons_follow_time(self):
+        env = Environment()
+        resource = self._make_resource()
+        resource.env = env
+        observed = []
+
+        def observe():
+            for _ in range(3):
+                observed.append((
+                    env.now, [lecture.code for lecture in resource.lectures], [exam.code for exam in resource.exams],
+                    sorted(fact.code for fact in resource.facts_to_study)
+                ))
+                yield env.timeout(10)
+
+        env.process(observe())
+        env.run()
+        assert observed == [
+            (0, ['RL1'], [], ['RF1']),
+            (10, ['RL2', 'RL1'], ['RE1'], ['RF1', 'RF2']),
+            (20, ['RL2', 'RL1', 'RL3'], ['RE1'], ['RF1', 'RF2', 'RF3']),
+        ]
+
+    def test_publication_event(self):
+        env = Environment()
+        resource = self._make_resource()
+        resource.env = env
+        publications = []
+
+        def listen():
+            while True:
+                lessons = yield resource.publication_event
+                publications.append((env.now, sorted(lesson.code for lesson in lessons)))
+
+        env.process(resource.publish())
+        env.process(listen())
+        env.run(until=100)
+        assert publications == [(0, ['RL1']), (10, ['RE1', 'RL2']), (20, ['RL3'])]
+
+    def test_new_environment_resets_publications(self):
+        resource = self._make_resource()
+        resource.env = Environment(initial_time=20)
+        assert len(resource.lectures) == 3
+        resource.env = Environment()
+        assert [lecture.code for lecture in resource.lectures] == ['RL1']
+
+    def test_lessons_added_and_removed_during_simulation(self):
+        env = Environment()
+        resource = self._make_resource()
+        resource.env = env
+        late_lecture, early_lecture = Lecture('RL4', facts=[Fact('RF4')], publish_at=30), Lecture('RL5', publish_at=0)
+        publications = []
+
+        def listen():
+            while True:
+                lessons = yield resource.publication_event
+                publications.append((env.now, sorted(lesson.code for lesson in lessons)))
+
+        def edit():
+            yield env.timeout(15)
+            resource.add_lesson(late_lecture)
+            resource.add_lesson(early_lecture)
+            resource.remove_lesson(resource.lectures[0])
+            assert [lecture.code for lecture in resource.lectures] == ['RL1', 'RL5']
+            assert sorted(fact.code for fact in resource.facts_to_study) == ['RF1']
+
+        env.process(resource.publish())
+        env.process(listen())
+        env.process(edit())
+        env.run(until=100)
+        assert publications == [(0, ['RL1']), (10, ['RE1', 'RL2']), (15, ['RL5']), (20, ['RL3']), (30, ['RL4'])]
+        assert [lecture.code for lecture in resource.lectures] == ['RL1', 'RL3', 'RL4', 'RL5']
+        assert sorted(fact.code for fact in resource.facts_to_study) == ['RF1', 'RF3', 'RF4']
+        assert resource.has_lesson(late_lecture) and not resource.has_lesson(Lecture('RL2'))
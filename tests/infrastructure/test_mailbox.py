@@ -0,0 +1,117 @@
+import pytest
+
+from model.infrastructure.mailbox import Mailbox, MailboxBus, OverflowPolicy
+
+
+__author__ = 'e.kolpakov'
+
+
+class TestMailbox:
+    def test_unbounded_mailbox_reads_most_recent_first(self):
+        mailbox = Mailbox()
+        for message in range(5):
+            assert mailbox.put(message)
+        assert [mailbox.pop() for _ in range(len(mailbox))] == [4, 3, 2, 1, 0]
+        assert not mailbox
+
+    @pytest.mark.parametrize("policy, accepted, kept, dropped", [
+        (OverflowPolicy.DROP_NEWEST, [True, True, False, False], [0, 1], 2),
+        (OverflowPolicy.DROP_OLDEST, [True, True, True, True], [2, 3], 2),
+        (OverflowPolicy.BACKPRESSURE, [True, True, False, False], [0, 1], 0),
+    ])
+    def test_overflow_policies(self, policy, accepted, kept, dropped):
+        mailbox = Mailbox(capacity=2, policy=policy)
+        assert [mailbox.put(message) for message in range(4)] == accepted
+        assert list(mailbox) == kept
+        assert mailbox.dropped == dropped
+        assert mailbox.accepts() == (policy != OverflowPolicy.BACKPRESSURE)
+
+    def test_invalid_configuration_rejected(self):
+        with pytest.raises(ValueError):
+            Mailbox(policy='unknown')
+        with pytest.raises(ValueError):
+            Mailbox(capacity=0)
+
+
+    def test_admission_and_collapsing(self):
+        mailbox = Mailbox()
+        mailbox.configure(key=lambda message: message % 10, admit=lambda message: message >= 0)
+        assert [mailbox.put(message) for message in (1, 11, -1, 2)] == [True, False, False, True]
+        assert list(mailbox) == [1, 2]
+        assert mailbox.collapsed == 1
+        assert mailbox.pop() == 2
+        assert mailbox.put(12)
+        assert list(mailbox) == [1, 12]
+
+    def test_listener_called_for_added_messages(self):
+        added = []
+        mailbox = Mailbox(capacity=1)
+        mailbox.listen(lambda: added.append(len(mailbox)))
+        mailbox.put(1)
+        mailbox.put(2)
+        mailbox.listen(None)
+        mailbox.pop()
+        mailbox.put(3)
+        assert added == [1]
+
+    def test_take_prefers_priority_then_most_recent(self):
+        mailbox = Mailbox()
+        mailbox.configure(priority=lambda message: message[0] == 'a')
+        for message in ('a1', 'b1', 'a2', 'b2'):
+            mailbox.put(message)
+        assert mailbox.take() == 'a2'
+        assert mailbox.take() == 'a1'
+        assert mailbox.take() == 'b2'
+        assert list(mailbox) == ['b1']
+
+    def test_take_rechecks_priority_and_releases_blocked_messages(self):
+        priorities = {'a': 1, 'b': 1, 'c': 0}
+        mailbox = Mailbox()
+        mailbox.configure(
+            priority=lambda message: priorities[message], blocker=lambda message: 'go' if message == 'c' else None
+        )
+        for message in 'cab':
+            mailbox.put(message)
+        priorities['b'] = 0
+        priorities['c'] = 2
+        assert mailbox.take() == 'a'
+        mailbox.release('go')
+        assert [mailbox.take(), mailbox.take()] == ['c', 'b']
+        with pytest.raises(IndexError):
+            mailbox.take()
+
+    def test_take_without_priority_reads_most_recent(self):
+        mailbox = Mailbox(capacity=2, policy=OverflowPolicy.DROP_OLDEST)
+        for message in range(3):
+            mailbox.put(message)
+        assert [mailbox.take(), mailbox.take()] == [2, 1]
+
+
+class TestMailboxBus:
+    def test_send_and_send_many(self):
+        bus = MailboxBus(capacity=1)
+        addresses = [bus.register() for _ in range(3)]
+        assert addresses == [0, 1, 2]
+
+        assert bus.send(addresses[0], 'first')
+        assert bus.send_many(addresses, 'second') == 2
+        assert [list(bus.mailbox(address)) for address in addresses] == [['first'], ['second'], ['second']]
+
+    def test_collapsed_messages_are_not_counted_as_delivered(self):
+        bus = MailboxBus()
+        addresses = [bus.register() for _ in range(2)]
+        bus.mailbox(addresses[0]).configure(key=lambda message: message)
+        bus.send(addresses[0], 'message')
+        assert bus.send_many(addresses, 'message') == 1
+        assert bus.mailbox(addresses[0]).collapsed == 1
+
+    def test_unregistered_mailbox_discards_messages(self):
+        bus = MailboxBus()
+        address = bus.register()
+        bus.unregister(address)
+        assert not bus.send(address, 'message')
+        assert bus.accepts(address)
+        assert len(bus) == 0
+        with pytest.raises(ValueError):
+            bus.mailbox(address)
+
@@ -0,0 +1,49 @@
+import pytest
+
+from model.infrastructure.random_streams import RandomStream, RandomStreams
+
+
+__author__ = 'e.kolpakov'
+
+
+class TestRandomStreams:
+    def test_streams_do_not_depend_on_draw_order(self):
+        first, second = RandomStreams(42), RandomStreams(42)
+        first_draws = [first.stream('s1', 'choose').random() for _ in range(5)]
+        first_draws.append(first.stream('s2', 'choose').random())
+        second_draws = [second.stream('s2', 'choose').random()]
+        second_draws.extend(second.stream('s1', 'choose').random() for _ in range(5))
+        assert first_draws == second_draws[1:] + second_draws[:1]
+
+    def test_streams_of_different_keys_differ(self):
+        streams = RandomStreams(42)
+        draws = {
+            key: [streams.stream(*key).random() for _ in range(3)] for key in (('s1', 'a'), ('s1', 'b'), ('s2', 'a'))
+        }
+        draws[('other seed', 'a')] = [RandomStreams(43).stream('s1', 'a').random() for _ in range(3)]
+        assert len({tuple(values) for values in draws.values()}) == 4
+        assert streams.stream('s1', 'a') is streams.stream('s1', 'a')
+
+
+class TestRandomStream:
+    @pytest.fixture
+    def stream(self):
+        return RandomStream(RandomStreams.derive_key(1, 'agent', 'test'))
+
+    def test_numbers_within_bounds(self, stream):
+        assert all(0 <= stream.random() < 1 for _ in range(1000))
+        assert {stream.randrange(4) for _ in range(1000)} == {0, 1, 2, 3}
+        assert {stream.randrange(2, 4) for _ in range(1000)} == {2, 3}
+        assert {stream.randint(1, 3) for _ in range(1000)} == {1, 2, 3}
+        assert {stream.choice('ab') for _ in range(1000)} == {'a', 'b'}
+        assert stream.getrandbits(100) < 2 ** 100
+
+    def test_sample_picks_distinct_elements(self, stream):
+        sample = stream.sample(range(10 ** 9), 1000)
+        assert len(set(sample)) == 1000
+        assert sorted(stream.sample('abcde', 5)) == list('abcde')
+        assert stream.sample((), 0) == []
+        with pytest.raises(ValueError):
+            stream.sample('ab', 3)
+        with pytest.raises(ValueError):
+            stream.randrange(0)
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+
+from model.infrastructure import INFINITY
+from model.knowledge_representation.lesson_type import Exam
+from model.simulation.curriculum_file import CurriculumLoader
+from model.simulation.curriculum_generator import CurriculumGenerator
+
+
+__author__ = 'e.kolpakov'
+
+
+def _describe(curriculum, resources):
+    return (
+        [(fact.code, sorted(fact.dependencies), fact.complexity) for fact in curriculum.all_facts()],
+        [
+            (competency.code, sorted(fact.code for fact in competency.facts))
+            for competency in curriculum.all_competencies()
+        ],
+        sorted(
+            (type(lesson).__name__, lesson.code, lesson.name, lesson.publish_at, sorted(f.code for f in lesson.facts))
+            for lesson in curriculum.all_lessons()
+        ),
+        [(resource.name, resource.agent_id, [lesson.code for lesson in resource.lessons]) for resource in resources],
+    )
+
+
+class TestCurriculumLoader:
+    def _dump_generated(self, path):
+        curriculum = CurriculumGenerator(fact_count=200, depth=4, complexity=(0.5, 2.0), publish_interval=1.0, seed=7)\
+            .generate()
+        resources = CurriculumGenerator.generate_resources(curriculum, lessons_per_resource=5)
+        CurriculumLoader.dump(path, curriculum, resources)
+        return curriculum, resources
+
+    def test_round_trip(self, tmpdir):
+        path = str(tmpdir.join('curriculum.json'))
+        curriculum, resources = self._dump_generated(path)
+        loaded = CurriculumLoader(use_cache=False).load(path)
+        assert _describe(*loaded) == _describe(curriculum, resources)
+        assert not os.path.exists(path + CurriculumLoader.CACHE_SUFFIX)
+
+    def test_cached_load_matches_parsed(self, tmpdir):
+        path = str(tmpdir.join('curriculum.json'))
+        curriculum, resources = self._dump_generated(path)
+        loader = CurriculumLoader()
+        first = loader.load(path)
+        assert os.path.exists(path + CurriculumLoader.CACHE_SUFFIX)
+        second = loader.load(path)
+        assert _describe(*first) == _describe(*second) == _describe(curriculum, resources)
+
+    def test_cache_is_invalidated_on_change(self, tmpdir):
+        path = str(tmpdir.join('curriculum.json'))
+        loader = CurriculumLoader(cache_dir=str(tmpdir.join('cache')))
+        with open(path, 'w') as target:
+            json.dump({'facts': [{'code': 'CF1'}], 'lectures': [{'code': 'CL1', 'facts': ['CF1']}]}, target)
+        curriculum, _ = loader.load(path)
+        assert [fact.code for fact in curriculum.all_facts()] == ['CF1']
+
+        with open(path, 'w') as target:
+            json.dump({'facts': [{'code': 'CF1'}, {'code': 'CF2', 'dependencies': ['CF1']}]}, target)
+        curriculum, _ = loader.load(path)
+        assert [fact.code for fact in curriculum.all_facts()] == ['CF1', 'CF2']
+        assert curriculum.find_fact('CF2').dependencies == {'CF1'}
+        assert curriculum.find_lesson('CL1') is None
+
+    def test_exam_parameters(self, tmpdir):
+        path = str(tmpdir.join('curriculum.json'))
+        with open(path, 'w') as target:
+            json.dump({
+                'facts': [{'code': 'EF1'}],
+                'exams': [
+                    {'code': 'EE1', 'facts': ['EF1'], 'weight': 0.3, 'pass_threshold': 0.5, 'allowed_time': 10},
+                    {'code': 'EE2', 'facts': ['EF1']},
+                ]
+            }, target)
+        loader = CurriculumLoader()
+        for _ in range(2):
+            curriculum, _ = loader.load(path)
+            timed, untimed = curriculum.find_lesson('EE1'), curriculum.find_lesson('EE2')
+            assert isinstance(timed, Exam)
+            assert (timed.weight, timed.pass_threshold, timed.allowed_time) == (0.3, 0.5, 10)
+            assert (untimed.weight, untimed.pass_threshold, untimed.allowed_time) == (1.0, 0.8, INFINITY)
+
+    @pytest.mark.parametrize("data, message", [
+        ({'facts': [{'code': 'CF1'}], 'competencies': [{'code': 'CC1', 'facts': ['CF1', 'CFX']}]}, 'CC1 .* CFX'),
+        ({'facts': [{'code': 'CF1'}], 'lectures': [{'code': 'CL1', 'facts': ['CFY']}]}, 'CL1 .* CFY'),
+        ({'facts': [{'code': 'CF1'}], 'exams': [{'code': 'CE1', 'facts': ['CF1', 'CFZ']}]}, 'CE1 .* CFZ'),
+        ({'resources': [{'name': 'CR1', 'lessons': ['CLX']}]}, 'CR1 .* CLX'),
+    ])
+    def test_unknown_codes_rejected(self, tmpdir, data, message):
+        path = str(tmpdir.join('curriculum.json'))
+        with open(path, 'w') as target:
+            json.dump(data, target)
+        with pytest.raises(ValueError, match=message):
+            CurriculumLoader(use_cache=False).load(path)
+
+    def test_missing_and_repeated_strings_survive_cache(self, tmpdir):
+        path = str(tmpdir.join('curriculum.json'))
+        with open(path, 'w') as target:
+            json.dump({
+                'facts': [{'code': 'CF1'}, {'code': 'CF2', 'dependencies': ['CF1']}],
+                'lectures': [{'code': 'CL1', 'facts': ['CF1', 'CF2']}, {'code': 'CL2', 'name': 'CF1', 'facts': []}],
+                'resources': [{'name': 'CR1', 'agent_id': 'CF2', 'lessons': ['CL1', 'CL2']}],
+            }, target)
+        loader = CurriculumLoader()
+        parsed, cached = loader.load(path), loader.load(path)
+        assert _describe(*parsed) == _describe(*cached)
+        assert cached[0].find_lesson('CL1').name is None
+        assert cached[0].find_lesson('CL2').name == 'CF1'
@@ -0,0 +1,58 @@
+import pytest
+
+from model.knowledge_representation.lesson_type import Lecture, Exam
+from model.simulation.curriculum_generator import CurriculumGenerator
+
+
+__author__ = 'e.kolpakov'
+
+
+def _describe(curriculum):
+    return (
+        sorted((fact.code, sorted(fact.dependencies), fact.complexity) for fact in curriculum.all_facts()),
+        sorted((lesson.code, sorted(fact.code for fact in lesson.facts)) for lesson in curriculum.all_lessons()),
+    )
+
+
+class TestCurriculumGenerator:
+    def test_same_seed_generates_same_curriculum(self):
+        first = CurriculumGenerator(fact_count=200, depth=5, complexity=(0.5, 2.0), seed=42).generate()
+        second = CurriculumGenerator(fact_count=200, depth=5, complexity=(0.5, 2.0), seed=42).generate()
+        assert _describe(first) == _describe(second)
+
+    def test_curricula_generated_in_one_process_keep_own_facts(self):
+        curricula = [CurriculumGenerator(fact_count=100, depth=5, seed=seed).generate() for seed in (1, 2)]
+        for curriculum in curricula:
+            for lesson in curriculum.all_lessons():
+                assert all(fact is curriculum.find_fact(fact.code) for fact in lesson.facts)
+            for competency in curriculum.all_competencies():
+                assert all(fact is curriculum.find_fact(fact.code) for fact in competency.facts)
+
+    @pytest.mark.parametrize("fact_count, depth, fan_in", [(100, 1, 3), (100, 10, 1), (1000, 20, 5)])
+    def test_generates_valid_layered_curriculum(self, fact_count, depth, fan_in):
+        curriculum = CurriculumGenerator(fact_count=fact_count, depth=depth, fan_in=fan_in, seed=1).generate()
+        compiled = curriculum.compile()
+        assert len(compiled.facts) == fact_count
+        assert all(len(fact.dependencies) <= fan_in for fact in compiled.facts)
+        assert sum(1 for fact in compiled.facts if not fact.dependencies) >= fact_count // depth
+
+    def test_lessons_and_competencies_cover_all_facts(self):
+        generator = CurriculumGenerator(
+            fact_count=95, depth=3, competency_size=20, lecture_size=10, lectures_per_exam=4, exam_size=5,
+            publish_interval=2.0, seed=3
+        )
+        compiled = generator.generate().compile()
+        lectures, exams = compiled.lessons_of_type(Lecture), compiled.lessons_of_type(Exam)
+        assert len(lectures) == 10
+        assert len(exams) == 3
+        assert len(compiled.competencies) == 5
+        assert compiled.competency_facts == compiled.all_facts
+        assert set(fact for lecture in lectures for fact in lecture.facts) == set(compiled.all_facts)
+        assert all(len(exam.facts) == 5 for exam in exams)
+        assert [lecture.publish_at for lecture in lectures] == [2.0 * number for number in range(10)]
+
+    def test_generate_resources(self):
+        curriculum = CurriculumGenerator(fact_count=100, lecture_size=10, lectures_per_exam=5, seed=1).generate()
+        resources = CurriculumGenerator.generate_resources(curriculum, lessons_per_resource=4)
+        assert len(resources) == 3
+        assert sum(len(resource.lessons) for resource in resources) == 12
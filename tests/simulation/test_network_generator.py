@@ -0,0 +1,69 @@
+from collections import Counter
+from unittest.mock import Mock
+
+import pytest
+
+from model.simulation.network_generator import (
+    NetworkGenerator, ErdosRenyiNetworkGenerator, BarabasiAlbertNetworkGenerator, SmallWorldNetworkGenerator, ClusteredNetworkGenerator
+)
+from model.simulation.social_graph import SocialGraph
+
+
+__author__ = 'e.kolpakov'
+
+
+GENERATORS = [
+    lambda seed: ErdosRenyiNetworkGenerator(average_degree=6.0, seed=seed),
+    lambda seed: BarabasiAlbertNetworkGenerator(links_per_node=3, seed=seed),
+    lambda seed: SmallWorldNetworkGenerator(ring_degree=6, rewire_probability=0.2, seed=seed),
+    lambda seed: ClusteredNetworkGenerator(group_size=10, within_probability=0.5, between_degree=2.0, seed=seed),
+]
+
+
+def _degrees(edges):
+    return Counter(node for edge in edges for node in edge)
+
+
+class TestNetworkGenerators:
+    @pytest.mark.parametrize("make_generator", GENERATORS)
+    def test_same_seed_generates_same_simple_network(self, make_generator):
+        edges = list(make_generator(7).edges(2000))
+        assert edges == list(make_generator(7).edges(2000))
+        assert edges != list(make_generator(8).edges(2000))
+        assert all(0 <= first < 2000 and 0 <= second < 2000 and first != second for first, second in edges)
+        assert len({frozenset(edge) for edge in edges}) == len(edges)
+
+    def test_base_generator_is_abstract(self):
+        with pytest.raises(TypeError):
+            NetworkGenerator()
+
+    def test_erdos_renyi_average_degree(self):
+        edges = list(ErdosRenyiNetworkGenerator(average_degree=6.0, seed=1).edges(5000))
+        assert 5.7 < 2 * len(edges) / 5000 < 6.3
+        assert len(list(ErdosRenyiNetworkGenerator(average_degree=10.0).edges(5))) == 10
+
+    def test_barabasi_albert_links_every_node(self):
+        degrees = _degrees(BarabasiAlbertNetworkGenerator(links_per_node=3, seed=1).edges(5000))
+        assert min(degrees.values()) >= 3
+        assert len(degrees) == 5000
+        assert max(degrees.values()) > 50
+
+    def test_small_world_without_rewiring_is_ring_lattice(self):
+        edges = set(SmallWorldNetworkGenerator(ring_degree=4, rewire_probability=0.0).edges(10))
+        assert edges == {tuple(sorted((node, (node + distance) % 10))) for node in range(10) for distance in (1, 2)}
+
+    def test_clustered_network_links_whole_groups(self):
+        edges = list(ClusteredNetworkGenerator(group_size=5, between_degree=1.0, seed=1).edges(20))
+        within = [edge for edge in edges if edge[0] // 5 == edge[1] // 5]
+        assert len(within) == 4 * 10
+        assert len(edges) - len(within) == 10
+
+    def test_connect_links_students_both_ways(self):
+        graph = SocialGraph()
+        students = [Mock(social_graph=graph, social_id=graph.add_member(index)) for index in range(4)]
+        generator = SmallWorldNetworkGenerator(ring_degree=2, rewire_probability=0.0)
+        generator.connect(students[1:])
+        assert [graph.neighbors(node) for node in range(4)] == [(), (2, 3), (1, 3), (1, 2)]
+
+        with pytest.raises(ValueError):
+            generator.connect([students[0], Mock(social_graph=SocialGraph(), social_id=0)])
@@ -0,0 +1,116 @@
+import random
+
+from simpy import Environment
+
+from model.agents.resource import Resource
+from model.knowledge_representation import Curriculum, Fact, FactSet, get_available_facts
+from model.knowledge_representation.lesson_type import Exam, Lecture
+from model.simulation.resource_index import FactResourceIndex
+
+
+__author__ = 'e.kolpakov'
+
+
+def _make_facts(count, seed):
+    rnd = random.Random(seed)
+    facts = []
+    for number in range(count):
+        dependencies = rnd.sample(facts, min(len(facts), rnd.randint(0, 2)))
+        facts.append(Fact('IF{0}'.format(number), [fact.code for fact in dependencies]))
+    return facts
+
+
+class TestFactResourceIndex:
+    def _make_resources(self, facts, env):
+        rnd = random.Random(3)
+        resources = []
+        for number in range(10):
+            lectures = [
+                Lecture('IL{0}_{1}'.format(number, lecture), facts=rnd.sample(facts, 3), publish_at=rnd.randint(0, 3))
+                for lecture in range(3)
+            ]
+            resource = Resource('IR{0}'.format(number), lectures, agent_id='ir{0}'.format(number))
+            resource.env = env
+            resources.append(resource)
+        return resources
+
+    def test_frontier_resources_match_scoring_all_resources(self):
+        env = Environment()
+        facts = _make_facts(60, seed=1)
+        resources = self._make_resources(facts, env)
+        index = FactResourceIndex(resources)
+        frontier = index.create_frontier()
+        rnd = random.Random(5)
+
+        def check():
+            knowledge = set()
+            for _ in range(40):
+                # knowledge grows and shrinks, resources keep publishing
+                if rnd.random() < 0.8:
+                    knowledge |= set(rnd.sample(facts, 2))
+                else:
+                    knowledge -= set(rnd.sample(sorted(knowledge, key=str), min(2, len(knowledge))))
+                index.sync(env.now)
+                frontier.update(FactSet.from_facts(knowledge))
+                # index is queried before resources are touched, so due publications are picked up by sync
+                actual = frontier.resources()
+                expected = {
+                    resource for resource in resources if get_available_facts(resource.facts_to_study, knowledge)
+                }
+                assert actual == expected
+                yield env.timeout(0.1)
+
+        env.run(env.process(check()))
+
+    def test_removed_lesson_is_unindexed(self):
+        env = Environment()
+        fact = Fact('IF_R')
+        lecture = Lecture('IL_R', facts=[fact])
+        resource = Resource('IR_R', [lecture], agent_id='ir_r')
+        resource.env = env
+        index = FactResourceIndex([resource])
+        fact_index = index.indexer.index_of(fact.code)
+        assert index.resources_teaching(fact_index) == {resource}
+
+        resource.remove_lesson(lecture)
+        assert not index.resources_teaching(fact_index)
+        frontier = index.create_frontier()
+        frontier.update(FactSet())
+        assert fact_index in frontier
+        assert frontier.resources() == set()
+
+    def test_removed_exam_bumps_exams_version(self):
+        env = Environment()
+        exam = Exam('IE_R', facts=[Fact('IF_E')])
+        resource = Resource('IR_E', [exam], agent_id='ir_e')
+        resource.env = env
+        index = FactResourceIndex([resource])
+        version = index.exams_version
+
+        resource.remove_lesson(exam)
+        assert index.exams_version > version
+
+    def test_dependency_graph_follows_fact_changes(self):
+        env = Environment()
+        curriculum = Curriculum()
+        curriculum.register_fact(Fact('IF_A'))
+        curriculum.register_fact(Fact('IF_B', ['IF_A']))
+        resource = Resource('IR_C', [Lecture('IL_C', facts=[curriculum.find_fact('IF_B')])], agent_id='ir_c')
+        resource.env = env
+        index = FactResourceIndex([resource], curriculum.fact_indexer)
+        curriculum.subscribe(index.on_curriculum_change)
+        frontier = index.create_frontier()
+        fact_index = index.indexer.find_index('IF_B')
+        frontier.update(FactSet())
+        assert fact_index not in frontier
+
+        version = index.version
+        curriculum.remove_fact('IF_B')
+        assert index.version > version
+        assert index.dependency_graph.dependencies_of(fact_index) is None
+        # edited fact does not depend on anything any more
+        curriculum.register_fact(Fact('IF_B'))
+        frontier.update(FactSet())
+        assert index.dependency_graph.dependencies_of(fact_index) == ()
+        assert fact_index in frontier
+        assert frontier.resources() == {resource}
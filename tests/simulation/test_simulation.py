@@ -0,0 +1,120 @@
+from unittest import mock
+
+import pytest
+
+from model.agents.resource import Resource
+from model.agents.student.activities import DormantActivity
+from model.agents.student import RationalStudent
+from model.knowledge_representation import Competency, Curriculum, Fact
+from model.knowledge_representation.lesson_type import Exam, Lecture
+from model.simulation.simulation import Simulation
+from model.simulation.simulation_input import SimulationInput, get_simulation_input
+from model.simulation.social_graph import SocialGraph
+
+
+__author__ = 'e.kolpakov'
+
+
+def _make_simulation(competency_codes, dormant_when_idle):
+    curriculum = Curriculum()
+    facts = [Fact('SMA'), Fact('SMB', ['SMA']), Fact('SMC')]
+    for fact in facts:
+        curriculum.register_fact(fact)
+    curriculum.register_competency(Competency('SMComp', [fact for fact in facts if fact.code in competency_codes]))
+    lectures = [Lecture('SML1', facts=facts[:1]), Lecture('SML2', facts=facts[1:2], publish_at=100)]
+    for lecture in lectures:
+        curriculum.register_lesson(lecture)
+    resource = Resource('Resource', lectures, agent_id='smr1')
+    student = RationalStudent(
+        'Student', [], agent_id='sms1', dormant_when_idle=dormant_when_idle, social_graph=SocialGraph()
+    )
+    student.add_resource(resource)
+    return Simulation(SimulationInput(curriculum, [resource], [student]), seed=1), student
+
+
+class TestSimulation:
+    def test_same_seed_reproduces_run(self):
+        first, first_student = _make_simulation({'SMA', 'SMB'}, False)
+        second, second_student = _make_simulation({'SMA', 'SMB'}, False)
+        first.run()
+        second.run()
+        assert first_student.stop_participation_event.triggered
+        # each simulation has its own curriculum, so knowledge is compared by fact codes
+        assert set(first.state.students[0].knowledge) == set(second.state.students[0].knowledge)
+        assert first_student.env.now == second_student.env.now
+
+    def test_simulations_do_not_share_knowledge_states(self):
+        first, first_student = _make_simulation({'SMA', 'SMB'}, False)
+        second, second_student = _make_simulation({'SMA', 'SMB'}, False)
+        first.run()
+        second.run()
+        assert first_student.knowledge_states is not second_student.knowledge_states
+        assert first_student.knowledge.indexer is first.state.curriculum.fact_indexer
+        assert second_student.knowledge.indexer is second.state.curriculum.fact_indexer
+
+    def test_finished_simulation_stops_listening_to_curriculum(self):
+        simulation, student = _make_simulation({'SMA', 'SMB'}, False)
+        curriculum = simulation.state.curriculum
+        simulation.run()
+        states = student.knowledge_states
+        transition = states.transition(student.knowledge, curriculum.find_lesson('SML1'))
+        curriculum.register_fact(Fact('SMX'))
+        assert states.transition(student.knowledge, curriculum.find_lesson('SML1')) is transition
+        with pytest.raises(ValueError):
+            curriculum.unsubscribe(simulation._on_curriculum_change)
+
+    def test_removed_lesson_withdrawn_from_resources(self):
+        simulation, student = _make_simulation({'SMA', 'SMB'}, False)
+        resource = simulation.state.resources[0]
+        lecture = resource.lessons[1]
+        # resource holds the lesson it was built with, curriculum holds a copy built with its fact indexer
+        assert simulation.state.curriculum.find_lesson('SML2') is not lecture
+        simulation.state.curriculum.remove_lesson('SML2')
+        assert not resource.has_lesson(lecture)
+
+    def test_dormant_student_woken_by_publication(self):
+        simulation, student = _make_simulation({'SMA', 'SMB'}, True)
+        with mock.patch.object(DormantActivity, 'run', autospec=True, side_effect=DormantActivity.run) as dormant:
+            simulation.run()
+        assert dormant.call_count == 1
+        assert student.stop_participation_event.triggered
+        # woken up at publication, studies the only fact to learn right away
+        assert student.env.now == pytest.approx(101.0)
+
+    def test_simulation_ends_when_dormant_students_cannot_progress(self):
+        simulation, student = _make_simulation({'SMA', 'SMB', 'SMC'}, True)
+        simulation.run()
+        assert not student.stop_participation_event.triggered
+        assert {fact.code for fact in student.knowledge} == {'SMA', 'SMB'}
+
+    def test_dormant_student_woken_by_granted_exam(self):
+        simulation, student = _make_simulation({'SMA', 'SMB', 'SMC'}, True)
+        curriculum = simulation.state.curriculum
+        exam = Exam('SME', facts=[curriculum.find_fact('SMA')])
+        curriculum.register_lesson(exam)
+        exam_resource = Resource('Exams', [exam], agent_id='smr2')
+        exam_resource.resource_access_service = simulation
+        env = exam_resource.env = simulation._environment
+        # student knows about exam resource from the start, but is only given access to it later
+        student.add_resource(exam_resource)
+        attempts = []
+
+        def grant_later():
+            yield env.timeout(50)
+            simulation.grant_access(student, exam_resource)
+            yield env.timeout(49)
+            attempts.append(len(student.exam_results[exam.code]))
+
+        env.process(grant_later())
+        simulation.run()
+        assert attempts == [1]
+
+    def test_simulation_inputs_do_not_share_graph_and_bus(self):
+        first, second = get_simulation_input(), get_simulation_input()
+        for simulation_input in (first, second):
+            students = simulation_input.students
+            assert all(student.social_graph is students[0].social_graph for student in students)
+            assert all(student.mailbox_bus is students[0].mailbox_bus for student in students)
+        assert first.students[0].social_graph is not second.students[0].social_graph
+        assert first.students[0].mailbox_bus is not second.students[0].mailbox_bus
+        assert first.students[0].known_students_count == 1
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from model.simulation.social_graph import SocialGraph
+
+
+__author__ = 'e.kolpakov'
+
+
+@pytest.fixture
+def graph():
+    graph = SocialGraph()
+    for member in 'abcde':
+        graph.add_member(member)
+    return graph
+
+
+class TestSocialGraph:
+    def test_merged_neighbors_sorted_and_pending_in_insertion_order(self, graph):
+        assert graph.add_edge(0, 3)
+        assert graph.add_edge(0, 1)
+        assert not graph.add_edge(0, 3)
+        graph.compact()
+        assert graph.add_edge(0, 4)
+        assert graph.add_edge(0, 2)
+        assert not graph.add_edge(0, 1)
+        assert graph.neighbors(0) == (1, 3, 4, 2)
+        assert graph.degree(0) == 4
+        assert graph.degree(4) == 0
+        assert graph.has_edge(0, 1) and graph.has_edge(0, 2) and not graph.has_edge(1, 0)
+        assert not graph.has_edge(0, 0) and not graph.has_edge(0, 5)
+        assert graph.edge_count == 4
+
+    def test_bulk_edges_merged_with_existing(self, graph):
+        graph.add_edge(1, 4)
+        graph.add_edges([(1, 0), (2, 3), (1, 2), (4, 4)])
+        assert [graph.neighbors(node) for node in range(5)] == [(), (0, 2, 4), (3,), (), (4,)]
+        member = graph.add_member('f')
+        assert graph.degree(member) == 0
+        graph.add_edge(member, 1)
+        assert graph.neighbors(member) == (1,)
+        assert graph.member(member) == 'f'
+
+    def test_unknown_nodes_rejected(self, graph):
+        with pytest.raises(ValueError):
+            graph.add_edge(0, 5)
+        with pytest.raises(ValueError):
+            graph.add_edges([(0, 1), (-1, 2)])
+
+    def test_sample_matches_sampling_neighbor_sequence(self, graph):
+        graph.add_edges([(0, 1), (0, 2), (0, 3)])
+        graph.add_edge(0, 4)
+        sampled = graph.sample_neighbors(0, 3, random.Random(42))
+        assert sampled == random.Random(42).sample(graph.neighbors(0), 3)
@@ -1,6 +1,14 @@
 import pytest
 
-from model.knowledge_representation import Competency, Fact, Curriculum, get_available_facts
+from model.infrastructure import INFINITY
+from model.knowledge_representation import (
+    Competency, Fact, Curriculum, get_available_facts, FactSet, FactIndexer, DependencyGraph, KnowledgeStateTable
+)
+from model.knowledge_representation.compiled_curriculum import CompiledCurriculum
+from model.knowledge_representation.curriculum import CurriculumChange
+from model.knowledge_representation.knowledge_state import LRUCache
+from model.knowledge_representation.lesson_type import Lecture, Exam, ExamFeedback
+from model.knowledge_representation.publication_schedule import PublicationSchedule
 
 __author__ = 'e.kolpakov'
 
@@ -35,6 +43,261 @@ class TestCurriculum:
         assert curriculum.find_fact("Z") is None
 
 
+class TestCompiledCurriculum:
+    @pytest.fixture
+    def curriculum(self):
+        return Curriculum()
+
+    def _register_facts(self, curriculum, facts):
+        for code, dependencies in facts:
+            curriculum.register_fact(Fact(code, dependencies))
+
+    def test_facts_in_topological_order(self, curriculum):
+        self._register_facts(curriculum, [('C', ['B']), ('B', ['A']), ('A', []), ('D', [])])
+        compiled = curriculum.compile()
+        assert [fact.code for fact in compiled.facts] == ['A', 'D', 'B', 'C']
+
+    def test_prerequisites_closure(self, curriculum):
+        self._register_facts(curriculum, [('A', []), ('B', ['A']), ('C', ['B']), ('D', ['C', 'X']), ('X', [])])
+        compiled = curriculum.compile()
+        assert not compiled.prerequisites_of(Fact('A'))
+        assert set(compiled.prerequisites_of(Fact('C'))) == {Fact('A'), Fact('B')}
+        assert set(compiled.prerequisites_of(Fact('D'))) == {Fact('A'), Fact('B'), Fact('C'), Fact('X')}
+
+    def test_lessons_grouped_by_type(self, curriculum):
+        self._register_facts(curriculum, [('A', []), ('B', ['A'])])
+        lecture1 = Lecture('l1', facts=[Fact('A')], publish_at=10)
+        lecture2 = Lecture('l2', facts=[Fact('B')])
+        exam = Exam('e1', facts=[Fact('A'), Fact('B')])
+        for lesson in (lecture1, exam, lecture2):
+            curriculum.register_lesson(lesson)
+        compiled = curriculum.compile()
+        assert compiled.lessons_by_type[Lecture] == (lecture2, lecture1)
+        assert compiled.lessons_of_type(Exam) == (exam,)
+        assert set(compiled.lesson_facts_of('e1')) == {Fact('A'), Fact('B')}
+
+    def test_compiled_curriculum_is_updated_incrementally(self, curriculum):
+        self._register_facts(curriculum, [('A', [])])
+        compiled = curriculum.compile()
+        assert curriculum.compile() is compiled
+        curriculum.register_competency(Competency('comp', [Fact('A')]))
+        assert curriculum.compile() is compiled
+        assert set(compiled.competency_facts) == {Fact('A')}
+
+    def test_incremental_changes_match_fresh_compile(self, curriculum):
+        facts = [Fact('M1'), Fact('M2', ['M1']), Fact('M3', ['M2'])]
+        for fact in facts[:2]:
+            curriculum.register_fact(fact)
+        curriculum.register_lesson(Lecture('ML1', facts=facts[:1], publish_at=5))
+        compiled = curriculum.compile()
+
+        curriculum.register_fact(facts[2])
+        curriculum.register_competency(Competency('MC1', facts[1:]))
+        curriculum.register_lesson(Lecture('ML2', facts=facts[1:], publish_at=1))
+        curriculum.register_lesson(Exam('ME1', facts=facts, publish_at=3))
+        curriculum.remove_lesson('ML1')
+
+        fresh = CompiledCurriculum(
+            curriculum.all_facts(), curriculum.all_competencies(), curriculum.all_lessons(), curriculum.fact_indexer
+        )
+        assert curriculum.compile() is compiled
+        assert compiled.facts == fresh.facts
+        assert list(compiled.lessons) == list(fresh.lessons) == ['ML2', 'ME1']
+        assert dict(compiled.lessons_by_type) == dict(fresh.lessons_by_type)
+        assert compiled.competency_facts == fresh.competency_facts
+        assert compiled.publication_schedule.lessons == fresh.publication_schedule.lessons
+        assert compiled.dependency_graph.available_facts(FactSet()) == fresh.dependency_graph.available_facts(FactSet())
+
+    def test_removing_referenced_fact_rejected(self, curriculum):
+        self._register_facts(curriculum, [('R1', []), ('R2', ['R1'])])
+        curriculum.register_competency(Competency('RC1', [curriculum.find_fact('R2')]))
+        with pytest.raises(ValueError):
+            curriculum.remove_fact('R1')
+        with pytest.raises(ValueError):
+            curriculum.remove_fact('R2')
+        curriculum.remove_competency('RC1')
+        curriculum.remove_fact('R2')
+        assert [fact.code for fact in curriculum.compile().facts] == ['R1']
+        assert len(curriculum.compile().dependency_graph) == 1
+        with pytest.raises(ValueError):
+            curriculum.remove_fact('missing')
+
+    def test_edited_fact_replaces_previous_version(self, curriculum):
+        curriculum.register_fact(Fact('E1'))
+        curriculum.register_fact(Fact('E2'))
+        curriculum.compile()
+        curriculum.remove_fact('E2')
+        curriculum.register_fact(Fact('E2', ['E1'], complexity=2.0))
+        assert next(iter(FactSet.from_facts([Fact('E2')], curriculum.fact_indexer))).dependencies == {'E1'}
+        assert set(curriculum.compile().prerequisites_of(Fact('E2'))) == {Fact('E1')}
+        assert set(curriculum.compile().dependency_graph.available_facts(FactSet())) == {Fact('E1'), Fact('E2')}
+
+    @pytest.mark.parametrize("edited", [False, True])
+    def test_fact_with_unknown_dependency_rejected_after_compile(self, curriculum, edited):
+        curriculum.register_fact(Fact('V1', complexity=3.0))
+        curriculum.register_fact(Fact('V2'))
+        compiled = curriculum.compile()
+        if edited:
+            curriculum.remove_fact('V2')
+        with pytest.raises(ValueError):
+            curriculum.register_fact(Fact('V2', ['missing']))
+        assert curriculum.compile() is compiled
+        assert [fact.code for fact in curriculum.all_facts()] == (['V1'] if edited else ['V1', 'V2'])
+        assert set(compiled.facts) == set(curriculum.all_facts())
+
+        with pytest.raises(ValueError):
+            curriculum.register_fact(Fact('V3', ['missing']))
+        assert curriculum.find_fact('V3') is None
+        curriculum.register_fact(Fact('V3', ['V1'], complexity=2.0))
+        assert next(iter(FactSet.from_facts([Fact('V3')], curriculum.fact_indexer))).complexity == 2.0
+        assert set(compiled.prerequisites_of(Fact('V3'))) == {Fact('V1')}
+
+    def test_curricula_do_not_share_facts(self):
+        first, second = Curriculum(), Curriculum()
+        first.register_fact(Fact('S1'))
+        first.register_fact(Fact('S2', ['S1']))
+        second.register_fact(Fact('S1'))
+        second.register_fact(Fact('S2'))
+        second.register_lesson(Lecture('SL1', facts=[second.find_fact('S2')]))
+        assert first.fact_indexer is not second.fact_indexer
+        lesson_fact = next(iter(second.find_lesson('SL1').facts))
+        assert lesson_fact is second.find_fact('S2')
+        assert not lesson_fact.dependencies
+
+    def test_shared_competency_and_lessons_are_not_rebound(self):
+        first, second = Curriculum(), Curriculum()
+        facts = [Fact('SH1', complexity=2.0), Fact('SH2')]
+        competency = Competency('SHComp', facts)
+        exam = Exam('SHE', facts=facts)
+        original_indexer = competency.facts.indexer
+        for curriculum in (first, second):
+            for fact in reversed(facts):
+                curriculum.register_fact(fact)
+            curriculum.register_competency(competency)
+            curriculum.register_lesson(exam)
+        assert competency.facts.indexer is original_indexer
+        for curriculum in (first, second):
+            registered_competency, registered_exam = curriculum.find_competency('SHComp'), curriculum.find_lesson('SHE')
+            assert registered_competency == competency and registered_competency is not competency
+            assert registered_competency.facts.indexer is curriculum.fact_indexer
+            assert registered_exam == exam and registered_exam.facts.indexer is curriculum.fact_indexer
+            # facts are checked in curriculum index order
+            assert registered_exam.facts_checked_within(1.0) == 1
+        assert exam.facts_checked_within(1.0) == 0
+
+    def test_lesson_built_with_curriculum_indexer_is_registered_as_is(self, curriculum):
+        curriculum.register_fact(Fact('SH3'))
+        lecture = Lecture('SHL', facts=[Fact('SH3')], indexer=curriculum.fact_indexer)
+        curriculum.register_lesson(lecture)
+        assert curriculum.find_lesson('SHL') is lecture
+
+    def test_subscribers_notified(self, curriculum):
+        changes = []
+        curriculum.subscribe(lambda change: changes.append((change.kind, change.entity.code)))
+        curriculum.register_fact(Fact('N1'))
+        curriculum.register_lesson(Lecture('NL1', facts=[Fact('N1')]))
+        curriculum.remove_lesson('NL1')
+        assert changes == [
+            (CurriculumChange.ADDED, 'N1'), (CurriculumChange.ADDED, 'NL1'), (CurriculumChange.REMOVED, 'NL1')
+        ]
+
+    def test_dangling_dependency_rejected(self, curriculum):
+        self._register_facts(curriculum, [('A', []), ('B', ['A', 'missing'])])
+        with pytest.raises(ValueError):
+            curriculum.compile()
+
+    def test_cycle_rejected(self, curriculum):
+        self._register_facts(curriculum, [('A', []), ('B', ['A', 'C']), ('C', ['B'])])
+        with pytest.raises(ValueError):
+            curriculum.compile()
+
+
+class TestFactSet:
+    @pytest.fixture
+    def indexer(self):
+        return FactIndexer()
+
+    def test_indexer_assigns_dense_indices_in_registration_order(self, indexer):
+        assert [indexer.register(Fact(code)) for code in "ABC"] == [0, 1, 2]
+        assert indexer.register(Fact("B")) == 1
+        assert indexer.index_of("D") == 3
+
+    def test_from_facts_builds_mask(self, indexer):
+        fact_set = FactSet.from_facts([Fact("A"), Fact("C")], indexer)
+        indexer.register(Fact("B"))
+        assert fact_set.mask == 0b11
+        assert FactSet.from_facts([Fact("B"), Fact("C")], indexer).mask == 0b110
+
+    def test_behaves_as_set_of_facts(self, indexer):
+        fact_set = FactSet.from_facts([Fact("A"), Fact("B")], indexer)
+        assert len(fact_set) == 2
+        assert Fact("A") in fact_set
+        assert Fact("C") not in fact_set
+        assert set(fact_set) == {Fact("A"), Fact("B")}
+        assert fact_set <= {Fact("A"), Fact("B")} <= fact_set
+
+    def test_equal_to_sets_with_the_same_facts(self, indexer):
+        fact_set = FactSet.from_facts([Fact("A"), Fact("B")], indexer)
+        same = FactSet.from_facts([Fact("B"), Fact("A")], indexer)
+        other_indexer = FactSet.from_facts([Fact("A"), Fact("B")], FactIndexer())
+        frozen = frozenset([Fact("A"), Fact("B")])
+        assert fact_set == same and hash(fact_set) == hash(same)
+        assert fact_set == other_indexer and hash(fact_set) == hash(other_indexer)
+        assert fact_set == frozen and hash(fact_set) == hash(frozen)
+        assert fact_set == {Fact("A"), Fact("B")}
+        assert fact_set != {Fact("A")}
+        assert fact_set != {Fact("A"), Fact("B"), Fact("C")}
+        assert fact_set != {"A", "B"}
+        assert FactSet(0, indexer) == FactSet() == set() and hash(FactSet(0, indexer)) == hash(frozenset())
+
+    def test_read_only_operations_do_not_register_facts(self, indexer):
+        fact_set = FactSet.from_facts([Fact("A"), Fact("B")], indexer)
+        other = {Fact("B"), Fact("C"), "D", 1}
+        assert fact_set & other == {Fact("B")}
+        assert fact_set - other == {Fact("A")}
+        assert not fact_set <= other and not fact_set >= other and not fact_set < other and not fact_set > other
+        assert not fact_set.isdisjoint(other)
+        assert fact_set != other
+        assert len(indexer) == 2
+        assert fact_set < fact_set | {Fact("C")}
+        assert len(indexer) == 3
+        assert Fact("D") not in fact_set and "A" not in fact_set
+
+    def test_non_empty_fact_set_requires_indexer(self):
+        with pytest.raises(ValueError):
+            FactSet(0b1)
+
+    @pytest.mark.parametrize("left, right, expected_and, expected_or, expected_sub", [
+        ("AB", "BC", "B", "ABC", "A"),
+        ("AB", "", "", "AB", "AB"),
+        ("", "AB", "", "AB", ""),
+        ("ABC", "ABC", "ABC", "ABC", ""),
+    ])
+    def test_set_operations(self, indexer, left, right, expected_and, expected_or, expected_sub):
+        make = lambda codes: FactSet.from_facts([Fact(code) for code in codes], indexer)
+        as_set = lambda codes: {Fact(code) for code in codes}
+        assert make(left) & make(right) == make(expected_and)
+        assert make(left) | make(right) == make(expected_or)
+        assert make(left) - make(right) == make(expected_sub)
+        assert make(left) - as_set(right) == make(expected_sub)
+        assert set(as_set(left) - make(right)) == as_set(expected_sub)
+        assert (make(left) >= make(right)) == (as_set(left) >= as_set(right))
+
+    def test_with_fact_returns_new_set(self, indexer):
+        fact_set = FactSet.from_facts([Fact("A")], indexer)
+        extended = fact_set.with_fact(Fact("B"))
+        assert set(fact_set) == {Fact("A")}
+        assert set(extended) == {Fact("A"), Fact("B")}
+
+    def test_fact_availability_and_mastery_use_masks(self, indexer):
+        known = FactSet.from_facts([Fact("A"), Fact("B")], indexer)
+        assert Fact("C", ["A", "B"]).is_available(known)
+        assert not Fact("C", ["A", "D"]).is_available(known)
+        assert Competency("comp", [Fact("A")]).is_mastered(known)
+        assert not Competency("comp", [Fact("A"), Fact("D")]).is_mastered(known)
+        assert Competency("comp", [Fact("A"), Fact("D")]).mastered_ratio(known) == 0.5
+
+
 class TestGetAvailableFacts:
     def test_get_available_facts_empty_facts_returns_empty(self):
         facts = set()
@@ -72,4 +335,124 @@ class TestGetAvailableFacts:
         facts = {Fact('A'), Fact('B'), Fact('C'), Fact('D')}
         known = frozenset([Fact('A'), Fact('B'), Fact('C')])
         result = get_available_facts(facts, known)
-        assert result == {Fact('D')}
\ No newline at end of file
+        assert result == {Fact('D')}
+
+class TestDependencyGraph:
+    def test_available_facts_propagates_through_dependents(self):
+        facts = [Fact('D', ['B', 'C']), Fact('C', ['B']), Fact('B', ['A']), Fact('E', ['X'])]
+        graph = DependencyGraph(facts)
+        assert set(graph.available_facts(frozenset())) == set()
+        assert set(graph.available_facts(frozenset([Fact('A')]))) == {Fact('B'), Fact('C'), Fact('D')}
+        assert set(graph.available_facts(frozenset([Fact('A'), Fact('X')]))) == {Fact('B'), Fact('C'), Fact('D'), Fact('E')}
+
+    def test_available_facts_excludes_known_facts(self):
+        graph = DependencyGraph([Fact('A'), Fact('B', ['A'])])
+        assert set(graph.available_facts(frozenset([Fact('A')]))) == {Fact('B')}
+
+    def test_cycle_is_never_available(self):
+        graph = DependencyGraph([Fact('A', ['B']), Fact('B', ['A']), Fact('C')])
+        assert set(graph.available_facts(frozenset())) == {Fact('C')}
+
+    def test_dependents_of(self):
+        indexer = FactIndexer()
+        graph = DependencyGraph([Fact('A'), Fact('B', ['A']), Fact('C', ['A'])], indexer)
+        assert set(graph.dependents_of(indexer.index_of('A'))) == {indexer.index_of('B'), indexer.index_of('C')}
+        assert graph.dependents_of(indexer.index_of('C')) == ()
+
+
+class TestKnowledgeStateTable:
+    @pytest.fixture
+    def table(self):
+        return KnowledgeStateTable(max_transitions=10)
+
+    @pytest.fixture
+    def indexer(self):
+        return FactIndexer()
+
+    def test_intern_returns_shared_instance(self, table, indexer):
+        state1 = table.intern(FactSet.from_facts([Fact('A'), Fact('B')], indexer))
+        state2 = table.intern(FactSet.from_facts([Fact('B'), Fact('A')], indexer))
+        assert state1 is state2
+
+    def test_with_fact_returns_interned_state(self, table, indexer):
+        state = table.intern(FactSet.from_facts([Fact('A')], indexer))
+        next_state = table.with_fact(state, Fact('B'))
+        assert set(next_state) == {Fact('A'), Fact('B')}
+        assert table.with_fact(state, Fact('B')) is next_state
+        assert table.intern(FactSet.from_facts([Fact('A'), Fact('B')], indexer)) is next_state
+
+    def test_transition(self, table, indexer):
+        state = table.intern(FactSet.from_facts([Fact('A')], indexer))
+        lecture = Lecture(
+            'l1', facts=[Fact('A'), Fact('B', ['A']), Fact('C', ['B']), Fact('D', ['X'])], indexer=indexer
+        )
+        transition = table.transition(state, lecture)
+        assert set(transition.facts_to_acquire) == {Fact('B'), Fact('C')}
+        assert set(transition.resulting_state) == {Fact('A'), Fact('B'), Fact('C')}
+        assert transition.known_ratio == 0.25
+        assert table.transition(state, lecture) is transition
+
+    def test_transition_of_replaced_lesson_uses_its_facts(self, table, indexer):
+        state = table.intern(FactSet(0, indexer))
+        table.transition(state, Lecture('l1', facts=[Fact('A')], indexer=indexer))
+        transition = table.transition(state, Lecture('l1', facts=[Fact('B')], indexer=indexer))
+        assert set(transition.facts_to_acquire) == {Fact('B')}
+
+    def test_fact_change_drops_lesson_transitions(self, table, indexer):
+        state = table.intern(FactSet(0, indexer))
+        lecture = Lecture('l1', facts=[Fact('A'), Fact('B', ['A'])], indexer=indexer)
+        transition = table.transition(state, lecture)
+        table.on_curriculum_change(CurriculumChange(CurriculumChange.ADDED, Fact('A')))
+        assert table.transition(state, lecture) is not transition
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+
+class TestPublicationSchedule:
+    @pytest.fixture
+    def schedule(self):
+        return PublicationSchedule([
+            Lecture('PL3', publish_at=20), Lecture('PL1', publish_at=0), Exam('PE1', publish_at=10),
+            Lecture('PL2', publish_at=10),
+        ])
+
+    def test_lessons_ordered_by_publication_time(self, schedule):
+        assert [lesson.publish_at for lesson in schedule.lessons] == [0, 10, 10, 20]
+        assert schedule.publish_times == (0, 10, 20)
+
+    @pytest.mark.parametrize("time, exp_count, exp_next", [(-1, 0, 0), (0, 1, 10), (15, 3, 20), (20, 4, INFINITY)])
+    def test_published_count_and_next_publication(self, schedule, time, exp_count, exp_next):
+        assert schedule.published_count(time) == exp_count
+        assert schedule.next_publication(time) == exp_next
+
+    def test_published_between(self, schedule):
+        assert set(lesson.code for lesson in schedule.published_between(0, 10)) == {'PE1', 'PL2'}
+        assert schedule.published_between(10, 15) == ()
+
+
+class TestValueObjects:
+    @pytest.mark.parametrize("value", [
+        Fact('VF1'), Competency('VC1', [Fact('VF1')]), Lecture('VL1', facts=[Fact('VF1')]), Exam('VE1', weight=0.5),
+        ExamFeedback(Exam('VE1'), 1.0, True, 1)
+    ])
+    def test_slotted_and_immutable(self, value):
+        assert not hasattr(value, '__dict__')
+        with pytest.raises(AttributeError):
+            value.code = 'other'
+
+    def test_lessons_cache_derived_values(self):
+        lecture = Lecture('VL2', facts=[Fact('VF2', complexity=2.0), Fact('VF3', complexity=0.5)], name='Lecture')
+        assert lecture.facts is lecture.facts
+        assert lecture.total_complexity == 2.5
+        assert hash(lecture) == hash(Lecture('VL2')) != hash(Exam('VL2'))
+        assert str(lecture) == "Lecture VL2 (Lecture)"
+        assert str(Exam('VE2')) == "Exam VE2"